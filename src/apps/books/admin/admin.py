@@ -6,9 +6,9 @@ from django.http import HttpRequest
 from django.utils.html import format_html
 from import_export.admin import ImportExportModelAdmin
 
-from apps.books.const import ReservationExtensionStatus
-from apps.books.models import Author, Book, Publisher, Reservation
-from apps.books.models.book import Order, ReservationExtension
+from apps.books.const import ReservationExtensionStatus, ReservationStatus
+from apps.books.models import Author, Book, MemberFee, Publisher, Reservation
+from apps.books.models.book import Order, ReservationExtension, ReservationQuerySet
 from core.utils.admin import ModelAdmin, ReadonlyTabularInline
 
 
@@ -87,6 +87,21 @@ class PublisherAdmin(ModelAdmin, ImportExportModelAdmin):
     inlines = (BookInline,)
 
 
+class OverdueFilter(admin.SimpleListFilter):
+    title = "overdue"
+    parameter_name = "overdue"
+
+    def lookups(self, request: HttpRequest, model_admin: admin.ModelAdmin) -> list[tuple[str, str]]:
+        return [("yes", "Yes"), ("no", "No")]
+
+    def queryset(self, request: HttpRequest, queryset: ReservationQuerySet) -> ReservationQuerySet | None:
+        if self.value() == "yes":
+            return queryset.overdue()
+        if self.value() == "no":
+            return queryset.exclude(pk__in=queryset.overdue().values("pk"))
+        return None
+
+
 @admin.register(Reservation)
 class ReservationAdmin(ModelAdmin):
     readonly_fields = (
@@ -100,11 +115,13 @@ class ReservationAdmin(ModelAdmin):
         "status",
         "member",
         "book",
+        "term",
+        "days_overdue",
         "created_at",
         "modified_at",
     )
 
-    list_filter = ("status",)
+    list_filter = ("status", OverdueFilter)
     list_select_related = ["member", "book"]
     list_display_links = (
         "id",
@@ -112,6 +129,24 @@ class ReservationAdmin(ModelAdmin):
     )
 
     inlines = (OrderInline, ReservationExtensionInline)
+    actions = ("issue_selected", "complete_selected")
+
+    @admin.action(description="Mark selected reservations issued")
+    def issue_selected(self, request: HttpRequest, queryset: ReservationQuerySet) -> None:
+        issued = queryset.transitionable(ReservationStatus.ISSUED).transition(ReservationStatus.ISSUED)
+        self.message_bulk_result(request, queryset, len(issued), "issued")
+
+    @admin.action(description="Complete selected reservations")
+    def complete_selected(self, request: HttpRequest, queryset: ReservationQuerySet) -> None:
+        completed = queryset.transitionable(ReservationStatus.COMPLETED).transition(ReservationStatus.COMPLETED)
+        self.message_bulk_result(request, queryset, len(completed), "completed")
+
+    def get_queryset(self, request: HttpRequest) -> ReservationQuerySet:
+        return super().get_queryset(request).with_overdue()
+
+    @admin.display(description="Days overdue", ordering="days_overdue")
+    def days_overdue(self, obj: Reservation) -> int:
+        return obj.days_overdue
 
     def has_add_permission(self, request: HttpRequest) -> bool | None:  # pragma: no cover
         """
@@ -165,3 +200,15 @@ class ReservationExtensionAdmin(ModelAdmin):
         "API only creation supported"
 
         return False  # pragma: no cover
+
+
+@admin.register(MemberFee)
+class MemberFeeAdmin(ModelAdmin):
+    search_fields = ("member__first_name", "member__last_name", "member__email")
+    list_display = ("member", "amount", "overdue_reservations", "computed_at")
+    list_select_related = ("member",)
+    readonly_fields = ("member", "amount", "overdue_reservations", "computed_at")
+
+    def has_add_permission(self, request: HttpRequest) -> bool:
+        # fees are only computed, see `LateFeeService`
+        return False
@@ -1,16 +1,30 @@
 from typing import Any
 
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.actions import delete_selected
+from django.contrib.admin.helpers import ActionForm
 from django.db.models.query import QuerySet
 from django.http import HttpRequest
+from django.template.response import TemplateResponse
 
 from apps.books.models import Order
-from apps.books.models.book import OrderQuerySet, Reservation
+from apps.books.models.book import OrderQuerySet
+from apps.books.services import OrderService
+from apps.tasks import delete_orders
+from core.outbox import Outbox
 from core.utils.admin import HistoricalModelAdmin
 
 
+class OrderActionForm(ActionForm):
+    change_reason = forms.CharField(label="Change reason", required=False, max_length=100)
+
+
 @admin.register(Order)
 class OrderAdmin(HistoricalModelAdmin):
+    # larger selections are deleted by a background task
+    BACKGROUND_DELETE_THRESHOLD = 1000
+
     readonly_fields = (
         "last_modified_by",
         "reservation",
@@ -41,6 +55,8 @@ class OrderAdmin(HistoricalModelAdmin):
         "status",
         "book",
     )
+    action_form = OrderActionForm
+    actions = ("process_selected", "refuse_selected", "delete_selected")
 
     def get_queryset(self, request: HttpRequest) -> OrderQuerySet:
         qs = super().get_queryset(request).select_related("reservation", "book", "member", "last_modified_by")
@@ -59,12 +75,36 @@ class OrderAdmin(HistoricalModelAdmin):
             order._change_reason = form.cleaned_data["change_reason"]
         return super().save_model(request, order, form, change)
 
+    @admin.action(description="Process selected orders")
+    def process_selected(self, request: HttpRequest, queryset: OrderQuerySet) -> None:
+        processed = OrderService.process(queryset, request.user, request.POST.get("change_reason", ""))
+        self.message_bulk_result(request, queryset, len(processed), "processed")
+
+    @admin.action(description="Refuse selected orders")
+    def refuse_selected(self, request: HttpRequest, queryset: OrderQuerySet) -> None:
+        refused = OrderService.refuse(queryset, request.user, request.POST.get("change_reason", ""))
+        self.message_bulk_result(request, queryset, len(refused), "refused")
+
     def delete_model(self, request: HttpRequest, order: Order) -> None:
-        order.delete_reservation()
-        return super().delete_model(request, order)
+        OrderService.delete([order.pk], request.user)
 
-    def delete_queryset(self, request: HttpRequest, queryset: QuerySet[Order]) -> None:
-        reservation_ids = [order.reservation.id for order in queryset if order.reservation]
-        Reservation.objects.filter(id__in=reservation_ids).delete()
+    @admin.action(permissions=["delete"], description=delete_selected.short_description)  # type: ignore[attr-defined]
+    def delete_selected(self, request: HttpRequest, queryset: OrderQuerySet) -> TemplateResponse | None:
+        """
+        Replaces the default delete action, so confirmed large selections are deleted by a background task
+        and reported with a single message.
+        """
+        if not request.POST.get("post"):
+            return delete_selected(self, request, queryset)
+
+        order_ids = list(queryset.order_by("pk").values_list("pk", flat=True))
+        if len(order_ids) <= self.BACKGROUND_DELETE_THRESHOLD:
+            return delete_selected(self, request, queryset)
 
-        return super().delete_queryset(request, queryset)
+        self.log_deletions(request, queryset)
+        Outbox.enqueue(delete_orders, order_ids, request.user.pk)
+        self.message_user(request, f"{len(order_ids)} orders are being deleted in background, see the task results for progress", messages.WARNING)
+        return None
+
+    def delete_queryset(self, request: HttpRequest, queryset: QuerySet[Order]) -> None:
+        OrderService.delete(list(queryset.order_by("pk").values_list("pk", flat=True)), request.user)
@@ -0,0 +1,81 @@
+from typing import Any
+
+import django_filters
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework import filters
+from rest_framework.request import Request
+from rest_framework.views import APIView
+
+from apps.books.const import Language
+from apps.books.models import Book
+from apps.books.models.book import BookQuerySet
+
+
+class BookSearchFilter(filters.SearchFilter):
+    """
+    Ranked full-text search over `Book.search_vector` on PostgreSQL.
+    Falls back to default `icontains` search over `search_fields`
+    on databases without full-text search support, e.g. SQLite.
+    """
+
+    def filter_queryset(self, request: Request, queryset: BookQuerySet, view: APIView) -> Any:
+        if not queryset.supports_full_text_search:
+            return super().filter_queryset(request, queryset, view)
+
+        search_terms = self.get_search_terms(request)
+        if not search_terms:
+            return queryset
+
+        return queryset.search(" ".join(search_terms))
+
+
+class NumberInFilter(django_filters.BaseInFilter, django_filters.NumberFilter):
+    pass
+
+
+class BookFilter(django_filters.FilterSet):
+    AVAILABLE = "available"
+    RESERVED = "reserved"
+    FACETS = ["language", "availability"]
+
+    language = django_filters.MultipleChoiceFilter(choices=Language.choices, method="filter_facet")
+    availability = django_filters.ChoiceFilter(
+        choices=[
+            (AVAILABLE, _("Available")),
+            (RESERVED, _("Reserved")),
+        ],
+        method="filter_facet",
+    )
+    publisher = NumberInFilter(field_name="publisher", help_text=_("Comma separated publisher ids"))
+    author = NumberInFilter(field_name="author", help_text=_("Comma separated author ids"))
+    published_at = django_filters.RangeFilter()
+
+    class Meta:
+        model = Book
+        fields = ["language", "availability", "publisher", "author", "published_at"]
+
+    def filter_facet(self, queryset: BookQuerySet, name: str, value: Any) -> BookQuerySet:
+        return queryset.filter(self.get_facet_filter(name, value))
+
+    def get_facet_filter(self, name: str, value: Any) -> Q:
+        if not value:
+            return Q()
+        if name == "language":
+            return Q(language__in=value)
+        return Q(is_available=value == self.AVAILABLE)
+
+    def facet_counts(self) -> dict[str, Any]:
+        """
+        Facet counts for the queryset narrowed by every filter except the facet ones,
+        which are applied per facet inside the single aggregation query instead.
+        """
+        queryset = self.queryset
+        for name, value in self.form.cleaned_data.items():
+            if name not in self.FACETS:
+                queryset = self.filters[name].filter(queryset, value)
+
+        return queryset.facet_counts(
+            language_filter=self.get_facet_filter("language", self.form.cleaned_data.get("language")),
+            availability_filter=self.get_facet_filter("availability", self.form.cleaned_data.get("availability")),
+        )
@@ -0,0 +1,155 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from typing import Any, NamedTuple
+
+from django.db.models import F, Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.request import Request
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
+
+from apps.books.models import Book
+
+
+class BookCursor(NamedTuple):
+    modified_at: datetime | None
+    id: int
+    reverse: bool = False
+    # search relevance, see `BookQuerySet.search`
+    rank: float | None = None
+
+
+class BookCursorPagination(CursorPagination):
+    """
+    Keyset pagination following `Book.Meta.ordering` (modified_at DESC NULLS LAST)
+    with `id` as a tiebreaker. Every page is a single indexed range scan,
+    no `COUNT(*)` and no OFFSET, so deep pages cost the same as the first one.
+
+    Search results are paginated by relevance instead, keyed on (search_rank DESC, id DESC).
+
+    Only applied when `limit` or `cursor` query params are present,
+    which keeps the plain list response for existing clients.
+    """
+
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = "limit"
+    # read from the rows at page boundaries, see `get_cursor`
+    cursor_fields = ("modified_at", "id")
+
+    def paginate_queryset(self, queryset: QuerySet[Book, Any], request: Request, view: APIView | None = None) -> list[Any] | None:
+        if self.cursor_query_param not in request.query_params and self.page_size_query_param not in request.query_params:
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.cursor = self.decode_cursor(request)
+        self.ranked = "search_rank" in queryset.query.annotations
+
+        reverse = self.cursor.reverse if self.cursor else False
+        if self.ranked:
+            queryset = queryset.order_by(*self.get_ranked_ordering(reverse))
+            if self.cursor is not None:
+                queryset = queryset.filter(self.get_ranked_filter(self.cursor))
+        else:
+            queryset = queryset.order_by(*self.get_keyset_ordering(reverse))
+            if self.cursor is not None:
+                queryset = queryset.filter(self.get_keyset_filter(self.cursor))
+
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        if reverse:
+            self.page.reverse()
+
+        # a cursor always points past an existing row,
+        # so there is something to go back to in the opposite direction
+        if reverse:
+            self.has_next, self.has_previous = self.cursor is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+
+        return self.page
+
+    def get_keyset_ordering(self, reverse: bool) -> list[Any]:
+        if reverse:
+            return [F("modified_at").asc(nulls_first=True), F("id").asc()]
+        return [F("modified_at").desc(nulls_last=True), F("id").desc()]
+
+    def get_keyset_filter(self, cursor: BookCursor) -> Q:
+        if cursor.reverse:
+            if cursor.modified_at is None:
+                return Q(modified_at__isnull=False) | Q(modified_at__isnull=True, id__gt=cursor.id)
+            return Q(modified_at__gt=cursor.modified_at) | Q(modified_at=cursor.modified_at, id__gt=cursor.id)
+
+        if cursor.modified_at is None:
+            return Q(modified_at__isnull=True, id__lt=cursor.id)
+        return Q(modified_at__lt=cursor.modified_at) | Q(modified_at=cursor.modified_at, id__lt=cursor.id) | Q(modified_at__isnull=True)
+
+    def get_ranked_ordering(self, reverse: bool) -> list[Any]:
+        if reverse:
+            return [F("search_rank").asc(), F("id").asc()]
+        return [F("search_rank").desc(), F("id").desc()]
+
+    def get_ranked_filter(self, cursor: BookCursor) -> Q:
+        if cursor.rank is None:
+            raise NotFound(self.invalid_cursor_message)
+        if cursor.reverse:
+            return Q(search_rank__gt=cursor.rank) | Q(search_rank=cursor.rank, id__gt=cursor.id)
+        return Q(search_rank__lt=cursor.rank) | Q(search_rank=cursor.rank, id__lt=cursor.id)
+
+    def get_next_link(self) -> str | None:
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.get_cursor(self.page[-1]))
+
+    def get_previous_link(self) -> str | None:
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.get_cursor(self.page[0], reverse=True))
+
+    def get_cursor(self, book: Book | dict[str, Any], reverse: bool = False) -> BookCursor:
+        # pages of `.values()` projections hold dicts, see BookListProjection
+        if isinstance(book, dict):
+            rank = book["search_rank"] if self.ranked else None
+            return BookCursor(modified_at=book["modified_at"], id=book["id"], reverse=reverse, rank=rank)
+        return BookCursor(modified_at=book.modified_at, id=book.id, reverse=reverse, rank=book.search_rank if self.ranked else None)
+
+    def decode_cursor(self, request: Request) -> BookCursor | None:  # type: ignore[override]
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            tokens = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            modified_at = datetime.fromisoformat(tokens["m"]) if tokens["m"] is not None else None
+            rank = float(tokens["k"]) if tokens.get("k") is not None else None
+            return BookCursor(modified_at=modified_at, id=int(tokens["i"]), reverse=bool(tokens.get("r")), rank=rank)
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, cursor: BookCursor) -> str:  # type: ignore[override]
+        tokens: dict[str, Any] = {
+            "m": cursor.modified_at.isoformat() if cursor.modified_at else None,
+            "i": cursor.id,
+        }
+        if cursor.reverse:
+            tokens["r"] = 1
+        if cursor.rank is not None:
+            tokens["k"] = cursor.rank
+        encoded = urlsafe_b64encode(json.dumps(tokens, separators=(",", ":")).encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+
+class OverdueReservationCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the issued term index, the longest overdue reservations first.
+    """
+
+    ordering = ("term", "id")
+    page_size = 100
+    max_page_size = 500
+    page_size_query_param = "limit"
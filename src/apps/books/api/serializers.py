@@ -1,8 +1,15 @@
+from typing import Any, Iterable
+
+from django.core.files.storage import FileSystemStorage, InMemoryStorage
+from django.db.models import QuerySet
+from django.utils.encoding import filepath_to_uri
 from drf_spectacular.utils import inline_serializer
 from rest_framework import serializers
 
+from apps.books.member_state import MemberLibraryState
 from apps.books.models import Author, Book, Publisher, Reservation
 from apps.books.models.book import Order
+from apps.users.api.serializers import UserProfileSerializer
 from apps.users.models import User
 
 DetailInlineSerializer = inline_serializer(
@@ -14,10 +21,25 @@ DetailInlineSerializer = inline_serializer(
 
 
 class SerializerMixin(serializers.ModelSerializer):
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+
+        # sparse fieldsets, see SparseFieldsMixin
+        requested_fields = self.context.get("fields")
+        if requested_fields is not None:
+            for field in set(self.fields) - set(requested_fields):
+                self.fields.pop(field)
+
     @property
     def user(self) -> User:
         return self.context["request"].user
 
+    @property
+    def member_state(self) -> MemberLibraryState:
+        if "member_state" not in self.context:
+            self.context["member_state"] = MemberLibraryState.for_request(self.context["request"])
+        return self.context["member_state"]
+
 
 class AuthorSerializer(serializers.ModelSerializer):
     class Meta:
@@ -53,7 +75,7 @@ class BookListSerializer(SerializerMixin):
 
 
 class BooksReservedByMemberSerializer(BookListSerializer):
-    has_requested_extension = serializers.BooleanField()
+    has_requested_extension = serializers.SerializerMethodField()
     reservation_extendable = serializers.SerializerMethodField()
 
     class Meta(BookListSerializer.Meta):
@@ -64,29 +86,103 @@ class BooksReservedByMemberSerializer(BookListSerializer):
             "has_requested_extension",
         ]
 
+    def get_has_requested_extension(self, obj: Book) -> bool:
+        return self.member_state.has_requested_extension(obj.id)
+
     def get_reservation_extendable(self, obj: Book) -> bool:
-        return not obj.has_requested_extension and obj.reservation_extendable
+        return self.member_state.is_reservation_extendable(obj.id)
 
 
 class BookEnqueuedByMemberSerializer(BookListSerializer):
     # annotated
-    amount_in_queue = serializers.IntegerField()
+    queue_position = serializers.IntegerField()
 
     class Meta(BookListSerializer.Meta):
         fields = BookListSerializer.Meta.fields + [
             "amount_in_queue",
+            "queue_position",
         ]
 
 
+class MemberDashboardSerializer(serializers.Serializer):
+    profile = UserProfileSerializer()
+    reserved = BooksReservedByMemberSerializer(many=True)
+    issued = BooksReservedByMemberSerializer(many=True)
+    enqueued = BookEnqueuedByMemberSerializer(many=True)
+
+
+class BookListProjection:
+    """
+    Fast path for `BookListSerializer`, builds the same output from a `.values()` projection,
+    without model instances and per-row DRF field machinery.
+    """
+
+    serializer_class: type[BookListSerializer] = BookListSerializer
+    # modified_at is only used for pagination cursors
+    values = ["id", "title", "author__first_name", "author__last_name", "cover", "modified_at"]
+
+    def __init__(self, context: dict[str, Any]) -> None:
+        self.request = context.get("request")
+        self.storage = Book._meta.get_field("cover").storage
+        self.cover_url_prefix = self.get_cover_url_prefix()
+
+    def project(self, queryset: QuerySet[Book]) -> QuerySet[Book, dict[str, Any]]:
+        # search_rank is only used for pagination cursors of search results
+        if "search_rank" in queryset.query.annotations:
+            return queryset.values(*self.values, "search_rank")
+        return queryset.values(*self.values)
+
+    def to_representation(self, row: dict[str, Any]) -> dict[str, Any]:
+        return {
+            "id": row["id"],
+            "title": row["title"],
+            "author": {
+                "first_name": row["author__first_name"],
+                "last_name": row["author__last_name"],
+            },
+            "cover_image_url": self.get_cover_image_url(row["cover"]),
+        }
+
+    def get_cover_url_prefix(self) -> str | None:
+        """
+        Local storages build urls by joining file names to the base url,
+        so the absolute base url is resolved once instead of for every row.
+        """
+        if not isinstance(self.storage, (FileSystemStorage, InMemoryStorage)):
+            return None
+        base_url = self.storage.url("")
+        return self.request.build_absolute_uri(base_url) if self.request is not None else base_url
+
+    def get_cover_image_url(self, name: str) -> str | None:
+        # same as serializers.ImageField(use_url=True)
+        if not name:
+            return None
+        if self.cover_url_prefix is not None:
+            return self.cover_url_prefix + filepath_to_uri(name).lstrip("/")
+        url = self.storage.url(name)
+        return self.request.build_absolute_uri(url) if self.request is not None else url
+
+    def serialize(self, rows: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+        return [self.to_representation(row) for row in rows]
+
+
+class BookEnqueuedByMemberProjection(BookListProjection):
+    serializer_class = BookEnqueuedByMemberSerializer
+    values = BookListProjection.values + ["amount_in_queue", "queue_position"]
+
+    def to_representation(self, row: dict[str, Any]) -> dict[str, Any]:
+        data = super().to_representation(row)
+        data["amount_in_queue"] = row["amount_in_queue"]
+        data["queue_position"] = row["queue_position"]
+        return data
+
+
 class BookSerializer(SerializerMixin):
     author = AuthorSerializer()
     publisher = PublisherSerializer()
     language = serializers.CharField(source="get_language_display")
     cover_image_url = serializers.ImageField(source="cover", use_url=True)
 
-    # annotated
-    amount_in_queue = serializers.IntegerField()
-
     class Meta:
         model = Book
         fields = [
@@ -112,29 +208,46 @@ class BookMemberSerializer(BookSerializer):
     is_issued_to_member = serializers.SerializerMethodField("get_is_issued_to_member")
     is_reserved_by_member = serializers.SerializerMethodField("get_is_reserved_by_member")
     is_max_reservations_reached = serializers.SerializerMethodField("get_is_max_reservations_reached")
+    is_enqueued_by_member = serializers.SerializerMethodField("get_is_enqueued_by_member")
     is_max_enqueued_orders_reached = serializers.SerializerMethodField("get_is_max_enqueued_orders_reached")
 
     # annotated
-    amount_in_queue = serializers.IntegerField()
-    is_enqueued_by_member = serializers.BooleanField(default=False)
+    queue_position = serializers.IntegerField(allow_null=True)
 
     class Meta(BookSerializer.Meta):
         fields = BookSerializer.Meta.fields + [
             "is_issued_to_member",
             "is_reserved_by_member",
             "is_enqueued_by_member",
+            "queue_position",
             "is_max_reservations_reached",
             "is_max_enqueued_orders_reached",
         ]
 
     def get_is_max_reservations_reached(self, book: Book) -> bool:
-        return Reservation.objects.reserved_by_member(self.user).count() >= Reservation.MAX_RESERVATIONS_PER_MEMBER
+        return self.member_state.is_max_reservations_reached
 
     def get_is_max_enqueued_orders_reached(self, book: Book) -> bool:
         return book.amount_in_queue >= Order.MAX_QUEUED_ORDERS_ALLOWED
 
     def get_is_issued_to_member(self, book: Book) -> bool:
-        return book.is_issued_to_member(self.user)
+        return self.member_state.is_issued_to_member(book.id)
 
     def get_is_reserved_by_member(self, book: Book) -> bool:
-        return book.is_reserved_by_member(self.user)
+        return self.member_state.is_reserved_by_member(book.id)
+
+    def get_is_enqueued_by_member(self, book: Book) -> bool:
+        return self.member_state.is_enqueued_by_member(book.id)
+
+
+class OverdueReservationSerializer(serializers.ModelSerializer):
+    book_id = serializers.IntegerField(source="book.id", allow_null=True)
+    book_title = serializers.CharField(source="book.title", allow_null=True)
+    member = UserProfileSerializer()
+
+    # annotated
+    days_overdue = serializers.IntegerField()
+
+    class Meta:
+        model = Reservation
+        fields = ["id", "term", "days_overdue", "book_id", "book_title", "member"]
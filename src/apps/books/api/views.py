@@ -1,30 +1,48 @@
+from functools import cached_property
 from gettext import ngettext
+from typing import Any, Callable
 
-from django.db import transaction
+from django.conf import settings
 from django.db.models import QuerySet
-from django.shortcuts import get_object_or_404
+from django.http import HttpResponseBase
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
 from django.utils.translation import gettext_lazy as _
-from drf_spectacular.utils import OpenApiExample, OpenApiResponse, extend_schema, inline_serializer
-from rest_framework import filters, generics, serializers
+from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.utils import OpenApiExample, OpenApiParameter, OpenApiResponse, extend_schema, inline_serializer
+from rest_framework import generics, serializers
 from rest_framework import status as status_codes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
+from apps.books.api.filters import BookFilter, BookSearchFilter
+from apps.books.api.pagination import BookCursorPagination, OverdueReservationCursorPagination
 from apps.books.api.serializers import (
+    BookEnqueuedByMemberProjection,
     BookEnqueuedByMemberSerializer,
+    BookListProjection,
     BookListSerializer,
     BookMemberSerializer,
     BookSerializer,
     BooksReservedByMemberSerializer,
     DetailInlineSerializer,
+    MemberDashboardSerializer,
+    OverdueReservationSerializer,
 )
+from apps.books.cache import ResponseCache, get_catalogue_etag, get_catalogue_modified_at
 from apps.books.const import OrderStatus
+from apps.books.member_state import MemberLibraryState
 from apps.books.models import Book
 from apps.books.models import Order as BookOrder
 from apps.books.models.book import BookQuerySet, Order, Reservation, ReservationExtension
+from apps.books.services import OrderPlacementError, OrderService
+from apps.books.suggestions import BookSuggestions
 from apps.users.models import Member
-from core.tasks import send_extension_request_received_email, send_order_created_email
+from core.outbox import Outbox
+from core.permissions import IsLibrarian
+from core.tasks import send_extension_request_received_email
 
 
 class ViewSetMixin:
@@ -39,10 +57,185 @@ class ViewSetMixin:
         return self.request.query_params
 
 
-class BookListView(ViewSetMixin, generics.ListAPIView):
+class SparseFieldsMixin(ViewSetMixin):
+    """
+    Supports `?fields=id,title,author` to return only the requested fields.
+    Only the columns and joins the requested fields read are loaded, see `field_sources`.
+    """
+
+    FIELDS_PARAM = "fields"
+    # serializer field -> model fields it reads, relations are joined when needed
+    field_sources: dict[str, list[str]] = {
+        "id": ["id"],
+        "title": ["title"],
+        "author": ["author__first_name", "author__last_name"],
+        "publisher": ["publisher__name"],
+        "published_at": ["published_at"],
+        "language": ["language"],
+        "isbn": ["isbn"],
+        "pages": ["pages"],
+        "pages_description": ["pages_description"],
+        "cover_image_url": ["cover"],
+        "is_available": ["is_available"],
+        "amount_in_queue": ["amount_in_queue"],
+        "is_issued": ["reservation__status"],
+        "is_reserved": ["reservation__status"],
+        "reservation_id": ["reservation"],
+        "reservation_term": ["reservation__status", "reservation__term"],
+        "is_max_enqueued_orders_reached": ["amount_in_queue"],
+        # member specific fields read no columns, see MemberLibraryState
+    }
+
+    get_serializer_class: Callable[[], type[serializers.ModelSerializer]]
+
+    @cached_property
+    def requested_fields(self) -> list[str] | None:
+        fields = [field.strip() for field in self.query_params.get(self.FIELDS_PARAM, "").split(",") if field.strip()]
+        if not fields:
+            return None
+
+        unknown_fields = [field for field in fields if field not in self.get_serializer_class().Meta.fields]
+        if unknown_fields:
+            raise serializers.ValidationError({self.FIELDS_PARAM: _("Unknown fields: %s") % ", ".join(unknown_fields)})
+        return fields
+
+    def requires_field(self, *fields: str) -> bool:
+        return self.requested_fields is None or any(field in self.requested_fields for field in fields)
+
+    def only_requested_fields(self, queryset: BookQuerySet) -> BookQuerySet:
+        if self.requested_fields is None:
+            return queryset
+
+        # fields read by the paginator are always loaded, deferred ones would cost a query per page
+        paths = {"id", *getattr(getattr(self, "paginator", None), "cursor_fields", ())}
+        paths = paths.union(*(self.field_sources.get(field, []) for field in self.requested_fields))
+        relations = {path.rsplit("__", 1)[0] for path in paths if "__" in path}
+        # previously selected relations are dropped, since deferred relations can't be joined
+        queryset = queryset.select_related(None)
+        if relations:
+            queryset = queryset.select_related(*relations)
+        return queryset.only(*paths)
+
+    def get_serializer_context(self) -> dict[str, Any]:
+        context = super().get_serializer_context()  # type: ignore[misc]
+        context["fields"] = self.requested_fields
+        return context
+
+
+class MemberStateMixin(ViewSetMixin):
+    """
+    Shares the member's reservations and enqueued orders with serializers,
+    loaded once per request, see `MemberLibraryState`.
+    """
+
+    def get_serializer_context(self) -> dict[str, Any]:
+        context = super().get_serializer_context()  # type: ignore[misc]
+        if self.is_authenticated:
+            context["member_state"] = MemberLibraryState.for_request(self.request)
+        return context
+
+
+class ConditionalResponseMixin:
+    """
+    Answers conditional GET requests with 304 Not Modified before any querying or serializing,
+    validated against the catalogue version and modification time.
+    """
+
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> HttpResponseBase:
+        etag = get_catalogue_etag(request)
+        last_modified = get_catalogue_modified_at()
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)  # type: ignore[misc]
+
+        if response.status_code in (status_codes.HTTP_200_OK, status_codes.HTTP_304_NOT_MODIFIED):
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+            # always revalidate, member responses must not be shared
+            patch_cache_control(response, no_cache=True)
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True)
+            patch_vary_headers(response, ["Authorization"])
+        return response
+
+
+class CachedResponseMixin:
+    """
+    Serves cached responses to anonymous requests, see `ResponseCache`.
+    Responses for members depend on their orders and reservations, so are never cached.
+    """
+
+    cache_namespace: str
+
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)  # type: ignore[misc]
+
+        response_cache = ResponseCache(self.cache_namespace)
+        cache_key = response_cache.get_cache_key(request)
+        data = response_cache.get(cache_key)
+        if data is not None:
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        response = super().get(request, *args, **kwargs)  # type: ignore[misc]
+        if response.status_code == status_codes.HTTP_200_OK:
+            response_cache.set(cache_key, response.data)
+        response["X-Cache"] = "MISS"
+        return response
+
+
+class BookListView(MemberStateMixin, SparseFieldsMixin, ConditionalResponseMixin, CachedResponseMixin, generics.ListAPIView):
     permission_classes = [AllowAny]
-    filter_backends = [filters.SearchFilter]
+    cache_namespace = "books-list"
+    pagination_class = BookCursorPagination
+    filter_backends = [BookSearchFilter, DjangoFilterBackend]
+    filterset_class = BookFilter
     search_fields = ["title", "author__first_name", "author__last_name"]
+    projection_classes = {
+        BookListSerializer: BookListProjection,
+        BookEnqueuedByMemberSerializer: BookEnqueuedByMemberProjection,
+    }
+
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        projection = self.get_projection()
+        if projection is not None:
+            response = self.list_projection(projection)
+        else:
+            response = super().list(request, *args, **kwargs)
+
+        if self.show_facets():
+            if isinstance(response.data, list):
+                response.data = {"results": response.data}
+            response.data["facets"] = self.get_facets()
+
+        return response
+
+    def get_projection(self) -> BookListProjection | None:
+        if not settings.BOOKS_LIST_PROJECTION or self.requested_fields is not None:
+            return None
+
+        projection_class = self.projection_classes.get(self.get_serializer_class())
+        if projection_class is None:
+            return None
+        return projection_class(self.get_serializer_context())
+
+    def list_projection(self, projection: BookListProjection) -> Response:
+        rows = projection.project(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(projection.serialize(page))
+        return Response(projection.serialize(rows))
+
+    def show_facets(self) -> bool:
+        return self.query_params.get("facets") is not None
+
+    def get_facets(self) -> dict[str, Any]:
+        queryset = BookSearchFilter().filter_queryset(self.request, self.get_queryset(), self)
+        filterset = BookFilter(self.query_params, queryset=queryset, request=self.request)
+        filterset.is_valid()  # invalid filters already rejected while listing
+        return filterset.facet_counts()
 
     def show_reserved_by_member(self) -> bool:
         return self.is_authenticated and self.query_params.get("reserved_by_me") is not None
@@ -58,31 +251,166 @@ class BookListView(ViewSetMixin, generics.ListAPIView):
         return BookListSerializer
 
     def get_queryset(self) -> BookQuerySet:
-        queryset = Book.objects.with_author().with_reservation().with_amount_in_queue()
+        queryset = Book.objects.with_author().with_reservation()
         if self.query_params.get("available") is not None:
-            return queryset.available()
+            queryset = queryset.available()
         elif self.show_reserved_by_member():
-            return queryset.with_reservation_extensions().reserved_by_member(self.request.user)
+            queryset = queryset.reserved_by_member(self.request.user)
         elif self.show_enqueued_by_member():
-            return queryset.enqueued_by_member(self.request.user)
-        return queryset
-
+            queryset = queryset.enqueued_by_member(self.request.user)
+            if self.requires_field("queue_position"):
+                queryset = queryset.with_queue_position(self.request.user)
+        return self.only_requested_fields(queryset)
 
-class BookDetailView(ViewSetMixin, generics.RetrieveAPIView):
-    permission_classes = [AllowAny]
 
+class BookDetailMixin(MemberStateMixin, SparseFieldsMixin):
     def get_serializer_class(self) -> type[BookSerializer | BookMemberSerializer]:
         if self.is_authenticated:
             return BookMemberSerializer
         return BookSerializer
 
     def get_queryset(self) -> BookQuerySet:
-        queryset = Book.objects.with_author().with_publisher().with_amount_in_queue().with_reservation()
+        queryset = Book.objects.with_author().with_publisher().with_reservation()
+        if self.is_authenticated and self.requires_field("queue_position"):
+            queryset = queryset.with_queue_position(self.request.user)
+        return self.only_requested_fields(queryset)
 
-        if self.is_authenticated:
-            return queryset.with_reservation_member().with_enqueued_by_member(self.request.user)
 
-        return queryset
+class BookDetailView(BookDetailMixin, ConditionalResponseMixin, CachedResponseMixin, generics.RetrieveAPIView):
+    permission_classes = [AllowAny]
+    cache_namespace = "book-detail"
+
+
+class BookBatchView(BookDetailMixin, ConditionalResponseMixin, CachedResponseMixin, generics.ListAPIView):
+    """
+    Details of several books at once, e.g. `?ids=1,2,3`, in the order requested.
+    Books are fetched with a single query and member state is loaded once per batch.
+    """
+
+    permission_classes = [AllowAny]
+    cache_namespace = "books-batch"
+
+    IDS_PARAM = "ids"
+    MAX_BATCH_SIZE = 50
+
+    @extend_schema(
+        operation_id="books_batch",
+        parameters=[
+            OpenApiParameter(IDS_PARAM, str, required=True, description=f"Comma separated book ids, up to {MAX_BATCH_SIZE}"),
+        ],
+    )
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> HttpResponseBase:
+        return super().get(request, *args, **kwargs)
+
+    def get_ids(self) -> list[int]:
+        try:
+            ids = [int(id) for id in self.query_params.get(self.IDS_PARAM, "").split(",") if id.strip()]
+        except ValueError:
+            raise serializers.ValidationError({self.IDS_PARAM: _("Book ids must be integers")})
+
+        if not ids:
+            raise serializers.ValidationError({self.IDS_PARAM: _("At least one book id is required")})
+        if len(ids) > self.MAX_BATCH_SIZE:
+            raise serializers.ValidationError({self.IDS_PARAM: _("At most %d books can be requested at once") % self.MAX_BATCH_SIZE})
+        return list(dict.fromkeys(ids))
+
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        ids = self.get_ids()
+        positions = {id: position for position, id in enumerate(ids)}
+        books = sorted(self.get_queryset().filter(id__in=ids), key=lambda book: positions[book.id])
+        return Response(self.get_serializer(books, many=True).data)
+
+
+class MemberDashboardView(MemberStateMixin, generics.GenericAPIView):
+    """
+    Everything the member account pages show, in a single response:
+    profile, reserved and issued books and enqueued books with queue positions.
+    Costs a fixed number of queries, regardless of the amount of books.
+    """
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = MemberDashboardSerializer
+
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        reserved_books = list(Book.objects.with_author().with_reservation().reserved_by_member(request.user).order_by("-reservation__created_at"))
+
+        enqueued_books = Book.objects.with_author().enqueued_by_member(request.user).with_queue_position(request.user).order_by("queue_position")
+
+        serializer = self.get_serializer(
+            {
+                "profile": request.user,
+                "reserved": [book for book in reserved_books if book.is_reserved],
+                "issued": [book for book in reserved_books if book.is_issued],
+                "enqueued": enqueued_books,
+            }
+        )
+        return Response(serializer.data)
+
+
+class OverdueReservationListView(generics.ListAPIView):
+    """
+    Issued reservations past their term, sorted by days overdue, for librarians.
+    Every page is a range scan of the issued term index, so it stays cheap for large libraries.
+    """
+
+    permission_classes = [IsLibrarian]
+    serializer_class = OverdueReservationSerializer
+    pagination_class = OverdueReservationCursorPagination
+
+    def get_queryset(self) -> QuerySet[Reservation]:
+        return Reservation.objects.overdue().with_overdue().select_related("book", "member")
+
+
+class BookSuggestView(ViewSetMixin, generics.GenericAPIView):
+    permission_classes = [AllowAny]
+
+    MIN_QUERY_LENGTH = 2
+    DEFAULT_LIMIT = 5
+    MAX_LIMIT = 10
+
+    @extend_schema(
+        operation_id="books_suggest",
+        responses={
+            status_codes.HTTP_200_OK: inline_serializer(
+                "BookSuggestionsSerializer",
+                fields={
+                    "titles": inline_serializer(
+                        "BookTitleSuggestionSerializer",
+                        fields={
+                            "id": serializers.IntegerField(),
+                            "title": serializers.CharField(),
+                        },
+                        many=True,
+                    ),
+                    "authors": inline_serializer(
+                        "AuthorSuggestionSerializer",
+                        fields={
+                            "id": serializers.IntegerField(),
+                            "first_name": serializers.CharField(),
+                            "last_name": serializers.CharField(),
+                        },
+                        many=True,
+                    ),
+                },
+            ),
+        },
+    )
+    def get(self, request: Request) -> Response:
+        """
+        Lightweight typeahead suggestions for book titles and authors.
+        """
+        query = self.query_params.get(api_settings.SEARCH_PARAM, "").strip()
+        if len(query) < self.MIN_QUERY_LENGTH:
+            return Response({"titles": [], "authors": []})
+
+        return Response(BookSuggestions(limit=self.get_limit()).suggest(query))
+
+    def get_limit(self) -> int:
+        try:
+            limit = int(self.query_params.get("limit", self.DEFAULT_LIMIT))
+        except ValueError:
+            return self.DEFAULT_LIMIT
+        return max(1, min(limit, self.MAX_LIMIT))
 
 
 @extend_schema(
@@ -149,6 +477,10 @@ class BookOrderView(generics.GenericAPIView):
                     ),
                 ],
             ),
+            status_codes.HTTP_404_NOT_FOUND: OpenApiResponse(
+                response=DetailInlineSerializer,
+                description="Book not found",
+            ),
         },
     )
     def post(self, request: Request, book_id: int) -> Response:
@@ -157,20 +489,17 @@ class BookOrderView(generics.GenericAPIView):
         otherwise places an order to a book queue.
         """
 
-        if self._max_reservations_reached(request.user):
-            return Response(status=status_codes.HTTP_400_BAD_REQUEST, data={"detail": _("Maximum number of reservations reached")})
-
-        book = get_object_or_404(Book, pk=book_id)
-
-        if self._processable_order(book, request.user).exists():
-            return Response(status=status_codes.HTTP_400_BAD_REQUEST, data={"detail": _("Book is already ordered or your order is in queue")})
-
-        if self._max_enqueued_orders_reached(book):
-            return Response(status=status_codes.HTTP_400_BAD_REQUEST, data={"detail": _("Maximum number of orders in queue reached")})
+        try:
+            order = OrderService.place(book_id, request.user)
+        except Book.DoesNotExist:
+            return Response(status=status_codes.HTTP_404_NOT_FOUND, data={"detail": _("Book not found")})
+        except OrderPlacementError as e:
+            return Response(status=status_codes.HTTP_400_BAD_REQUEST, data={"detail": str(e)})
 
-        order, message = self._create_order(book, request.user)
         if order.status == OrderStatus.UNPROCESSED:
-            send_order_created_email.delay(order.id)
+            message = _("Book reserved")
+        else:
+            message = _("Book reservation request put in queue")
 
         return Response({"detail": message, "order_id": order.id, "book_id": book_id})
 
@@ -203,22 +532,6 @@ class BookOrderView(generics.GenericAPIView):
 
         return Response(status=status_codes.HTTP_204_NO_CONTENT)
 
-    def _create_order(self, book: Book, member: Member) -> tuple[BookOrder, str]:
-        order_status = OrderStatus.UNPROCESSED
-        if book.is_available:
-            order_status = OrderStatus.UNPROCESSED
-            message = _("Book reserved")
-        else:
-            order_status = OrderStatus.IN_QUEUE
-            message = _("Book reservation request put in queue")
-
-        with transaction.atomic():
-            if book.is_available:
-                book = Book.objects.select_for_update().get(pk=book.id)
-            order = BookOrder.objects.create(book=book, member=member, status=order_status)
-
-        return order, message
-
     def _processable_order(self, book: int | Book, member: Member) -> "QuerySet[BookOrder]":
         return BookOrder.objects.processable(book, member)
 
@@ -228,12 +541,6 @@ class BookOrderView(generics.GenericAPIView):
     def _cancellable_order(self, book_id: int | Book, member: Member) -> "QuerySet[BookOrder]":
         return self._processable_order(book_id, member) | self._processed_reserved(book_id, member)
 
-    def _max_reservations_reached(self, member: Member) -> bool:
-        return Reservation.objects.reserved_by_member(member).count() >= Reservation.MAX_RESERVATIONS_PER_MEMBER
-
-    def _max_enqueued_orders_reached(self, book: Book) -> bool:
-        return book.enqueued_orders.count() >= Order.MAX_QUEUED_ORDERS_ALLOWED
-
 
 @extend_schema(
     request=None,
@@ -283,7 +590,7 @@ class BookReservationExtendView(generics.GenericAPIView):
             return Response(status=status_codes.HTTP_400_BAD_REQUEST, data={"detail": _("Reservation cannot be extended")})
 
         extension = ReservationExtension.objects.create(reservation=reservation)
-        send_extension_request_received_email.delay(extension.id)
+        Outbox.enqueue(send_extension_request_received_email, extension.id)
 
         return Response(status=status_codes.HTTP_200_OK, data={"detail": _("Reservation extension requested")})
 
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class BooksConfig(AppConfig):
     name = "apps.books"
+
+    def ready(self) -> None:
+        from apps.books import signals  # noqa: F401
@@ -0,0 +1,114 @@
+import hashlib
+import time
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import quote_etag
+from rest_framework.request import Request
+
+CATALOGUE_VERSION_KEY = "books:catalogue:version"
+CATALOGUE_MODIFIED_AT_KEY = "books:catalogue:modified_at"
+RESPONSE_CACHE_PREFIX = "books:response"
+
+
+def get_catalogue_version() -> int:
+    version = cache.get(CATALOGUE_VERSION_KEY)
+    if version is None:
+        # seeded from the clock, so a cleared or evicted version never repeats
+        # and responses cached for an older catalogue are never served again
+        version = time.time_ns()
+        if not cache.add(CATALOGUE_VERSION_KEY, version, timeout=None):
+            version = cache.get(CATALOGUE_VERSION_KEY, version)
+    return version
+
+
+def get_catalogue_modified_at() -> int:
+    """
+    Timestamp of the last catalogue change, in seconds.
+    Assumed to be now when unknown, which only costs clients a full response.
+    """
+    modified_at = cache.get(CATALOGUE_MODIFIED_AT_KEY)
+    if modified_at is None:
+        modified_at = int(time.time())
+        if not cache.add(CATALOGUE_MODIFIED_AT_KEY, modified_at, timeout=None):
+            modified_at = cache.get(CATALOGUE_MODIFIED_AT_KEY, modified_at)
+    return modified_at
+
+
+def _bump_catalogue_version() -> None:
+    try:
+        cache.incr(CATALOGUE_VERSION_KEY)
+    except ValueError:
+        get_catalogue_version()
+    # Last-Modified has a resolution of seconds, so it moves forward even for changes within the same second,
+    # otherwise clients validating with If-Modified-Since only would keep what they got earlier in that second
+    cache.set(CATALOGUE_MODIFIED_AT_KEY, max(int(time.time()), cache.get(CATALOGUE_MODIFIED_AT_KEY, 0) + 1), timeout=None)
+
+
+def bump_catalogue_version() -> None:
+    """
+    Invalidates all cached catalogue responses.
+    Bumped right away and once more on commit, so responses cached
+    while the transaction is still in progress are not served afterwards.
+    """
+    _bump_catalogue_version()
+    transaction.on_commit(_bump_catalogue_version)
+
+
+def get_request_digest(request: Request) -> str:
+    query = sorted((key, value) for key, values in request.query_params.lists() for value in values)
+    url = f"{request.build_absolute_uri(request.path)}?{query}"
+    return hashlib.md5(url.encode(), usedforsecurity=False).hexdigest()
+
+
+def get_catalogue_etag(request: Request) -> str:
+    """
+    Validator for catalogue responses, changes with every catalogue change.
+    Responses for members also depend on their own orders and reservations,
+    which are part of the catalogue version, so the member id is enough to tell them apart.
+    """
+    tag = f"{get_catalogue_version()}:{request.user.pk}:{get_request_digest(request)}"
+    return quote_etag(hashlib.md5(tag.encode(), usedforsecurity=False).hexdigest())
+
+
+class ResponseCache:
+    """
+    Cache for serialized API responses, keyed by endpoint, query params and catalogue version.
+    The key should be taken before querying, so data read from an older catalogue
+    is never stored under a newer version. Hits and misses are counted, see `stats`.
+    """
+
+    HITS_KEY = f"{RESPONSE_CACHE_PREFIX}:hits"
+    MISSES_KEY = f"{RESPONSE_CACHE_PREFIX}:misses"
+
+    def __init__(self, namespace: str) -> None:
+        self.namespace = namespace
+
+    def get_cache_key(self, request: Request) -> str:
+        return f"{RESPONSE_CACHE_PREFIX}:{get_catalogue_version()}:{self.namespace}:{get_request_digest(request)}"
+
+    def get(self, key: str) -> Any | None:
+        data = cache.get(key)
+        self.count(self.HITS_KEY if data is not None else self.MISSES_KEY)
+        return data
+
+    def set(self, key: str, data: Any) -> None:
+        cache.set(key, data, timeout=settings.BOOKS_RESPONSE_CACHE_TTL)
+
+    @staticmethod
+    def count(key: str) -> None:
+        try:
+            cache.incr(key)
+        except ValueError:
+            if not cache.add(key, 1, timeout=None):
+                cache.incr(key)
+
+    @classmethod
+    def stats(cls) -> dict[str, int]:
+        counters = cache.get_many([cls.HITS_KEY, cls.MISSES_KEY])
+        return {
+            "hits": counters.get(cls.HITS_KEY, 0),
+            "misses": counters.get(cls.MISSES_KEY, 0),
+        }
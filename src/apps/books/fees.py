@@ -0,0 +1,76 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import islice
+from typing import Any, NamedTuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, QuerySet, Sum, Value
+from django.db.models.functions import Least
+from django.utils import timezone
+
+from apps.books.models import MemberFee, Reservation
+from core.utils.models import DaysSince
+
+
+class Tariff(NamedTuple):
+    grace_days: int
+    daily_rate: Decimal
+    # per reservation
+    cap: Decimal
+
+    @classmethod
+    def from_settings(cls) -> "Tariff":
+        return cls(settings.LATE_FEE_GRACE_DAYS, Decimal(settings.LATE_FEE_DAILY_RATE), Decimal(settings.LATE_FEE_CAP))
+
+    def fee(self, days_overdue: int) -> Decimal:
+        return min(max(days_overdue - self.grace_days, 0) * self.daily_rate, self.cap)
+
+
+class LateFeeService:
+    """
+    Recomputes late fees of all members at once.
+
+    Fees are summed up per member in the database by a single grouped query over the issued term index,
+    no reservations are loaded. Totals are streamed and upserted into `MemberFee` in batches,
+    fees of members with nothing overdue anymore are removed.
+    """
+
+    BATCH_SIZE = 1000
+    FEE_FIELD = DecimalField(max_digits=10, decimal_places=2)
+
+    @classmethod
+    def compute(cls, tariff: Tariff | None = None, today: date | None = None) -> int:
+        """
+        Returns the amount of members charged.
+        """
+        computed_at = timezone.now()
+        totals = cls.member_totals(tariff or Tariff.from_settings(), today or timezone.localdate()).iterator(chunk_size=cls.BATCH_SIZE)
+        charged = 0
+        with transaction.atomic():
+            while batch := list(islice(totals, cls.BATCH_SIZE)):
+                MemberFee.objects.bulk_create(
+                    [MemberFee(**total, computed_at=computed_at) for total in batch],
+                    update_conflicts=True,
+                    unique_fields=["member"],
+                    update_fields=["amount", "overdue_reservations", "computed_at"],
+                )
+                charged += len(batch)
+            MemberFee.objects.filter(computed_at__lt=computed_at).delete()
+        return charged
+
+    @classmethod
+    def member_totals(cls, tariff: Tariff, today: date) -> QuerySet[Reservation, dict[str, Any]]:
+        # overdue after the grace period, so every reservation is charged at least for a day
+        charged_from = today - timedelta(days=tariff.grace_days)
+        fee = Least(
+            ExpressionWrapper(DaysSince("term", charged_from) * Value(tariff.daily_rate), output_field=cls.FEE_FIELD),
+            Value(tariff.cap, output_field=cls.FEE_FIELD),
+        )
+        return (
+            Reservation.objects.overdue(charged_from)
+            .filter(member__isnull=False)
+            .order_by()
+            .values("member_id")
+            .annotate(amount=Sum(fee, output_field=cls.FEE_FIELD), overdue_reservations=Count("pk"))
+        )
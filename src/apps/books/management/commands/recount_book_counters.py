@@ -0,0 +1,30 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from apps.books.cache import bump_catalogue_version
+from apps.books.models import Book
+
+
+class Command(BaseCommand):
+    help = "Recomputes denormalized `amount_in_queue` and `is_available` book counters from orders and reservations"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only verify the counters, exit with an error if any of them are stale",
+        )
+
+    def handle(self, *args: Any, check: bool = False, **options: Any) -> None:
+        if check:
+            stale = list(Book.objects.with_stale_counters().order_by("pk").values_list("pk", flat=True))
+            if stale:
+                raise CommandError(f"Stale counters found for {len(stale)} book(s): {', '.join(map(str, stale))}")
+            self.stdout.write(self.style.SUCCESS("All book counters are up to date"))
+            return
+
+        fixed = Book.objects.recount_counters()
+        if fixed:
+            bump_catalogue_version()
+        self.stdout.write(self.style.SUCCESS(f"Fixed counters for {fixed} book(s)"))
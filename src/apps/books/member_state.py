@@ -0,0 +1,102 @@
+from datetime import date
+from functools import cached_property
+from typing import NamedTuple
+
+from django.db.models import Count, Exists, OuterRef
+from rest_framework.request import Request
+
+from apps.books.const import OrderStatus, ReservationExtensionStatus, ReservationStatus
+from apps.books.models import Order, Reservation, ReservationExtension
+from apps.users.models import Member
+
+
+class ReservationState(NamedTuple):
+    id: int
+    book_id: int | None
+    status: str
+    term: date | None
+    extensions_count: int
+    has_requested_extension: bool
+
+    @property
+    def is_issued(self) -> bool:
+        return self.status == ReservationStatus.ISSUED
+
+    @property
+    def is_reserved(self) -> bool:
+        return self.status == ReservationStatus.RESERVED
+
+    @property
+    def is_extendable(self) -> bool:
+        # same as Reservation.is_extendable
+        return self.is_issued and self.extensions_count < Reservation.MAX_EXTENSIONS_PER_MEMBER
+
+
+class MemberLibraryState:
+    """
+    Member's active reservations and enqueued orders, loaded at most once per request
+    with a query each, so member specific fields of any number of books are set lookups.
+    Use `for_request` to share it between serializers of the same request.
+    """
+
+    REQUEST_ATTR = "_member_library_state"
+
+    def __init__(self, member: Member) -> None:
+        self.member = member
+
+    @classmethod
+    def for_request(cls, request: Request) -> "MemberLibraryState":
+        state = getattr(request, cls.REQUEST_ATTR, None)
+        if state is None:
+            state = cls(request.user)
+            setattr(request, cls.REQUEST_ATTR, state)
+        return state
+
+    @cached_property
+    def reservations(self) -> list[ReservationState]:
+        queryset = (
+            Reservation.objects.reserved_by_member(self.member)
+            .annotate(
+                extensions_count=Count("extensions"),
+                has_requested_extension=Exists(
+                    ReservationExtension.objects.filter(reservation=OuterRef("pk"), status=ReservationExtensionStatus.REQUESTED),
+                ),
+            )
+            .order_by()
+            .values_list("id", "book", "status", "term", "extensions_count", "has_requested_extension")
+        )
+        return [ReservationState(*row) for row in queryset]
+
+    @cached_property
+    def reservations_by_book(self) -> dict[int, ReservationState]:
+        return {reservation.book_id: reservation for reservation in self.reservations if reservation.book_id is not None}
+
+    @cached_property
+    def enqueued_book_ids(self) -> set[int]:
+        return set(Order.objects.filter(member=self.member, status=OrderStatus.IN_QUEUE).values_list("book", flat=True))
+
+    @property
+    def is_max_reservations_reached(self) -> bool:
+        return len(self.reservations) >= Reservation.MAX_RESERVATIONS_PER_MEMBER
+
+    def get_reservation(self, book_id: int) -> ReservationState | None:
+        return self.reservations_by_book.get(book_id)
+
+    def is_issued_to_member(self, book_id: int) -> bool:
+        reservation = self.get_reservation(book_id)
+        return reservation is not None and reservation.is_issued
+
+    def is_reserved_by_member(self, book_id: int) -> bool:
+        reservation = self.get_reservation(book_id)
+        return reservation is not None and reservation.is_reserved
+
+    def is_enqueued_by_member(self, book_id: int) -> bool:
+        return book_id in self.enqueued_book_ids
+
+    def has_requested_extension(self, book_id: int) -> bool:
+        reservation = self.get_reservation(book_id)
+        return reservation is not None and reservation.has_requested_extension
+
+    def is_reservation_extendable(self, book_id: int) -> bool:
+        reservation = self.get_reservation(book_id)
+        return reservation is not None and not reservation.has_requested_extension and reservation.is_extendable
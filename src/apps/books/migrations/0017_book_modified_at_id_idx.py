@@ -0,0 +1,22 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:21
+
+from django.db import migrations, models
+
+from core.utils.migrations import AddPostgresIndex
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("books", "0016_alter_reservation_term_reservationextension"),
+    ]
+
+    operations = [
+        AddPostgresIndex(
+            model_name="book",
+            index=models.Index(
+                models.OrderBy(models.F("modified_at"), descending=True, nulls_last=True),
+                models.OrderBy(models.F("id"), descending=True),
+                name="book_modified_at_id_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:22
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Concat
+
+from core.utils.migrations import AddPostgresIndex
+
+
+def populate_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    Author = apps.get_model("books", "Author")
+    Book = apps.get_model("books", "Book")
+
+    author_name = Author.objects.filter(pk=OuterRef("author_id")).annotate(name=Concat("first_name", Value(" "), "last_name")).values("name")
+    Book.objects.update(
+        search_vector=(SearchVector("title", weight="A", config="simple") + SearchVector(Subquery(author_name), weight="B", config="simple")),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("books", "0017_book_modified_at_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="book",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+        AddPostgresIndex(
+            model_name="book",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["search_vector"], name="book_search_vector_idx"),
+        ),
+    ]
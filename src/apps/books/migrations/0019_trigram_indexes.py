@@ -0,0 +1,35 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:40
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+from core.utils.migrations import AddPostgresIndex
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("books", "0018_book_search_vector"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddPostgresIndex(
+            model_name="author",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper(django.db.models.functions.text.Concat("first_name", models.Value(" "), "last_name")),
+                    name="gin_trgm_ops",
+                ),
+                name="author_full_name_trgm_idx",
+            ),
+        ),
+        AddPostgresIndex(
+            model_name="book",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper("title"), name="gin_trgm_ops"),
+                name="book_title_trgm_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:31
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+IN_QUEUE = "Q"
+
+
+def populate_counters(apps, schema_editor):
+    Book = apps.get_model("books", "Book")
+    Order = apps.get_model("books", "Order")
+
+    in_queue = Order.objects.filter(book=OuterRef("pk"), status=IN_QUEUE).order_by().values("book").annotate(count=Count("pk")).values("count")
+    Book.objects.update(amount_in_queue=Coalesce(Subquery(in_queue), 0))
+    Book.objects.filter(reservation__isnull=False).update(is_available=False)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("books", "0019_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="book",
+            name="amount_in_queue",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="is_available",
+            field=models.BooleanField(db_index=True, default=True, editable=False),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("books", "0020_book_amount_in_queue_book_is_available"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(fields=["book", "status", "created_at"], name="order_book_status_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(fields=["member", "status"], name="order_member_status_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(fields=["member", "status"], name="reservation_member_status_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(condition=models.Q(("status", "I")), fields=["term"], name="reservation_issued_term_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="reservationextension",
+            index=models.Index(fields=["reservation", "status"], name="reservationext_status_idx"),
+        ),
+    ]
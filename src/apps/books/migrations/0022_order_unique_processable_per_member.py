@@ -0,0 +1,55 @@
+# Generated by Django 5.1.1 on 2026-10-18 14:09
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+PROCESSABLE_STATES = ["U", "Q"]  # OrderStatus.UNPROCESSED, OrderStatus.IN_QUEUE
+ACTIVE_RESERVATION_STATES = ["R", "I"]  # ReservationStatus.RESERVED, ReservationStatus.ISSUED
+
+
+def cancel_duplicate_processable_orders(apps, schema_editor):
+    """
+    Keeps a single processable order per member and book: the one holding the book reservation,
+    otherwise the oldest. The others are cancelled along with their orphaned reservations.
+    """
+    Book = apps.get_model("books", "Book")
+    Order = apps.get_model("books", "Order")
+    Reservation = apps.get_model("books", "Reservation")
+
+    processable = Order.objects.filter(status__in=PROCESSABLE_STATES, book__isnull=False, member__isnull=False)
+    duplicates = processable.order_by().values("book", "member").annotate(count=Count("pk")).filter(count__gt=1)
+
+    cancelled_orders = []
+    for duplicate in duplicates:
+        orders = list(processable.filter(book=duplicate["book"], member=duplicate["member"]).select_related("book").order_by("created_at", "pk"))
+        orders.sort(key=lambda order: order.reservation_id is None or order.reservation_id != order.book.reservation_id)
+        cancelled_orders.extend(orders[1:])
+
+    if not cancelled_orders:
+        return
+
+    orphaned_reservations = [order.reservation_id for order in cancelled_orders if order.reservation_id and order.reservation_id != order.book.reservation_id]
+    Reservation.objects.filter(pk__in=orphaned_reservations, status__in=ACTIVE_RESERVATION_STATES).update(status="X")  # ReservationStatus.CANCELLED
+    Order.objects.filter(pk__in=[order.pk for order in cancelled_orders]).update(status="MC")  # OrderStatus.MEMBER_CANCELLED
+
+    enqueued_count = Order.objects.filter(book=OuterRef("pk"), status="Q").order_by().values("book").annotate(count=Count("pk")).values("count")
+    Book.objects.filter(pk__in={order.book_id for order in cancelled_orders}).update(amount_in_queue=Coalesce(Subquery(enqueued_count), 0))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("books", "0021_order_reservation_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(cancel_duplicate_processable_orders, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="order",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("status__in", ["U", "Q"])),
+                fields=("book", "member"),
+                name="order_unique_processable_per_member",
+            ),
+        ),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 5.1.1 on 2026-10-18 16:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("books", "0022_order_unique_processable_per_member"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(condition=models.Q(("status", "R")), fields=["created_at"], name="reservation_pickup_idx"),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.1 on 2026-10-18 17:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("books", "0023_reservation_pickup_idx"),
+        ("users", "0004_user_password_reset_token_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MemberFee",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=10, verbose_name="Amount")),
+                ("overdue_reservations", models.PositiveIntegerField(verbose_name="Overdue reservations")),
+                ("computed_at", models.DateTimeField(db_index=True, verbose_name="Computed at")),
+                ("member", models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name="fee", to="users.member")),
+            ],
+            options={
+                "ordering": ["-amount"],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.1 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("books", "0024_memberfee"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="order",
+            name="order_book_status_created_idx",
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(condition=models.Q(("status", "Q")), fields=["book", "created_at"], name="order_book_queue_idx"),
+        ),
+    ]
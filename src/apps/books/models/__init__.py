@@ -1,10 +1,12 @@
 from apps.books.models.author import Author
 from apps.books.models.book import Book, Order, Reservation, ReservationExtension
+from apps.books.models.fee import MemberFee
 from apps.books.models.publisher import Publisher
 
 __all__ = [
     "Author",
     "Book",
+    "MemberFee",
     "Order",
     "Reservation",
     "ReservationExtension",
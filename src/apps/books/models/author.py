@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import TYPE_CHECKING, Any
 
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator
@@ -7,6 +8,9 @@ from django.utils.translation import gettext_lazy as _
 
 from core.utils.models import TimestampedModel
 
+if TYPE_CHECKING:
+    from apps.books.models.book import BookQuerySet
+
 max_year_validator = MaxValueValidator(
     datetime.today().year,
     message="Year of birth cannot be greater than current year",
@@ -14,6 +18,8 @@ max_year_validator = MaxValueValidator(
 
 
 class Author(TimestampedModel):
+    books: "BookQuerySet"
+
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
     year_of_birth = models.PositiveSmallIntegerField(
@@ -35,6 +41,8 @@ class Author(TimestampedModel):
                 name="unique_author_name",
             )
         ]
+        # PostgreSQL only indexes, see migrations using AddPostgresIndex:
+        # - author_full_name_trgm_idx, trigram index matching UPPER() used by icontains lookups, see BookSuggestions
 
     def clean(self) -> None:
         if all([self.year_of_birth, self.year_of_death]):
@@ -43,3 +51,11 @@ class Author(TimestampedModel):
 
     def __str__(self) -> str:
         return f"{self.first_name} {self.last_name}"
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+
+        update_fields = kwargs.get("update_fields")
+        if not adding and (update_fields is None or {"first_name", "last_name"}.intersection(update_fields)):
+            self.books.update_search_vector()
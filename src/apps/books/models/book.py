@@ -1,18 +1,22 @@
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 from typing import Any, Optional
 
-from django.db import models
-from django.db.models import Count, Exists, F, OuterRef, Prefetch, Q, QuerySet
-from django.db.models.expressions import Case, Value, When
-from django.db.models.fields import BooleanField
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, SearchVectorField
+from django.db import connections, models, transaction
+from django.db.models import Count, Exists, F, OuterRef, Prefetch, Q, QuerySet, Subquery
+from django.db.models.expressions import Case, ExpressionWrapper, Value, When, Window
+from django.db.models.fields import BooleanField, FloatField
+from django.db.models.functions import Cast, Coalesce, Concat, RowNumber
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from simple_history.models import HistoricalRecords
 
 from apps.books.const import Language, OrderStatus, ReservationExtensionStatus, ReservationStatus
+from apps.books.models.author import Author
 from apps.users.models import Member, User
-from core.tasks import send_order_created_email, send_reservation_confirmed_email, send_reservation_extension_approved_email
-from core.utils.models import TimestampedModel
+from core.outbox import Outbox
+from core.tasks import send_reservation_confirmed_email, send_reservation_extension_approved_email
+from core.utils.models import DaysSince, TimestampedModel
 
 
 class ReservationQuerySet(models.QuerySet):
@@ -44,6 +48,46 @@ class ReservationQuerySet(models.QuerySet):
             ],
         )
 
+    def issued_due_on(self, term: date) -> "ReservationQuerySet":
+        return self.filter(term=term, status=ReservationStatus.ISSUED)
+
+    def uncollected(self, reserved_before: datetime) -> "ReservationQuerySet":
+        """
+        Reservations never picked up, which were made before `reserved_before`.
+        """
+        return self.filter(status=ReservationStatus.RESERVED, created_at__lt=reserved_before)
+
+    def overdue(self, today: date | None = None) -> "ReservationQuerySet":
+        """
+        Issued reservations past their term, a range scan of `reservation_issued_term_idx`.
+        Ordering by `term` sorts them by days overdue, starting with the latest ones.
+        """
+        return self.filter(self._overdue_q(today))
+
+    def with_overdue(self, today: date | None = None) -> "ReservationQuerySet":
+        """
+        Annotates `days_overdue`, computed in the database, so reservations can be filtered and sorted by it.
+        """
+        today = today or timezone.localdate()
+        return self.annotate(days_overdue=Case(When(self._overdue_q(today), then=DaysSince("term", today)), default=Value(0)))
+
+    @staticmethod
+    def _overdue_q(today: date | None = None) -> Q:
+        return Q(status=ReservationStatus.ISSUED, term__lt=today or timezone.localdate())
+
+    def transitionable(self, status: str) -> "ReservationQuerySet":
+        from apps.books.transitions import reservation_transitions
+
+        return reservation_transitions.transitionable(self, status)
+
+    def transition(self, status: str, **fields: Any) -> list["Reservation"]:
+        """
+        Changes status of all reservations at once, see `StateMachine.apply`.
+        """
+        from apps.books.transitions import reservation_transitions
+
+        return reservation_transitions.apply(self, status, **fields)
+
 
 class Reservation(TimestampedModel):
     book: "Book"
@@ -54,6 +98,7 @@ class Reservation(TimestampedModel):
     # annotated
     requested_extensions: "ReservationExtensionQuerySet"
     has_requested_extension: bool
+    days_overdue: int
 
     RESERVATION_TERM = timedelta(days=14)
     MAX_EXTENSIONS_PER_MEMBER = 2
@@ -76,14 +121,36 @@ class Reservation(TimestampedModel):
     term = models.DateField(_("Due date"), default=None, blank=True, null=True, help_text=_("Reservation term"))
 
     def save(self, *args: Any, **kwargs: Any) -> None:
-        if self.status == ReservationStatus.ISSUED and self.term is None:
-            self.term = Reservation.get_default_term()
-        elif self.status in self.DONE_STATES and hasattr(self, "book"):
-            self.book.process_next_order()
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            if self.status == ReservationStatus.ISSUED and self.term is None:
+                self.term = Reservation.get_default_term()
+            super().save(*args, **kwargs)
+
+            if self.status in self.DONE_STATES and hasattr(self, "book"):
+                self.release_book()
+
+    def release_book(self) -> None:
+        """
+        Unlinks the book and promotes its next enqueued order, see `QueuePromotionService`.
+        """
+        from apps.books.services import QueuePromotionService
+
+        book = self.book
+        # also drops the cached `self.book`
+        book.reservation = None  # type: ignore[assignment]
+        QueuePromotionService.promote([book.pk])
+        book.refresh_from_db(fields=["reservation", "is_available", "amount_in_queue", "modified_at"])
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # active reservations of a member, see `ReservationQuerySet.reserved_by_member`
+            models.Index(fields=["member", "status"], name="reservation_member_status_idx"),
+            # due issued reservations, see `ReservationQuerySet.issued_due_on`
+            models.Index(fields=["term"], condition=Q(status=ReservationStatus.ISSUED), name="reservation_issued_term_idx"),
+            # reservations waiting for pickup, see `ReservationQuerySet.uncollected`
+            models.Index(fields=["created_at"], condition=Q(status=ReservationStatus.RESERVED), name="reservation_pickup_idx"),
+        ]
 
     def extend(self) -> None:
         self.term += self.RESERVATION_TERM
@@ -115,18 +182,34 @@ class Reservation(TimestampedModel):
 
     @property
     def overdue_days(self) -> int:
-        return abs((self.term - timezone.now()).days) if self.term else 0
+        """
+        Days overdue of a single reservation, use `ReservationQuerySet.with_overdue` for filtering and sorting.
+        """
+        if not self.is_issued or self.term is None:
+            return 0
+        return max((timezone.localdate() - self.term).days, 0)
 
     @property
     def is_overdue(self) -> bool:
-        return self.is_issued and self.overdue_days > 0
+        return self.overdue_days > 0
 
     def __str__(self) -> str:
         return f"{self.pk} - {self.member} - {self.get_status_display()}"
 
 
 class ReservationExtensionQuerySet(models.QuerySet):
-    pass
+    def transitionable(self, status: str) -> "ReservationExtensionQuerySet":
+        from apps.books.transitions import extension_transitions
+
+        return extension_transitions.transitionable(self, status)
+
+    def transition(self, status: str, **fields: Any) -> list["ReservationExtension"]:
+        """
+        Changes status of all extensions at once, see `StateMachine.apply`.
+        """
+        from apps.books.transitions import extension_transitions
+
+        return extension_transitions.apply(self, status, **fields)
 
 
 class ReservationExtension(TimestampedModel):
@@ -152,6 +235,10 @@ class ReservationExtension(TimestampedModel):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # extensions of a reservation by status, see `ReservationQuerySet.with_extensions`
+            models.Index(fields=["reservation", "status"], name="reservationext_status_idx"),
+        ]
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
@@ -163,7 +250,7 @@ class ReservationExtension(TimestampedModel):
     def save(self, *args: Any, **kwargs: Any) -> None:
         if self.status_changed_to(ReservationExtensionStatus.APPROVED):
             self.reservation.extend()
-            send_reservation_extension_approved_email.delay(self.reservation.pk)
+            Outbox.enqueue(send_reservation_extension_approved_email, self.reservation.pk)
         super().save(*args, **kwargs)
 
         # in case of repetitive instance reuse,
@@ -195,42 +282,116 @@ class BookQuerySet(models.QuerySet):
     def with_publisher(self) -> "BookQuerySet":
         return self.select_related("publisher")
 
-    def with_amount_in_queue(self) -> "BookQuerySet":
-        return self.annotate(amount_in_queue=Count("orders", filter=Q(orders__status=OrderStatus.IN_QUEUE)))
+    def available(self) -> "BookQuerySet":
+        return self.filter(is_available=True)
 
-    def with_enqueued_by_member(self, member: Member) -> "BookQuerySet":
-        subquery = self.filter(orders__member=member, orders__status=OrderStatus.IN_QUEUE).values("id")
+    def reserved_by_member(self, member: Member) -> "BookQuerySet":
+        return self.with_reservation_member().filter(reservation__member=member)
 
-        return self.annotate(
-            is_enqueued_by_member=Case(When(id__in=subquery, then=Value(True)), default=Value(False), output_field=BooleanField()),
+    def enqueued_by_member(self, member: Member) -> "BookQuerySet":
+        return self.filter(orders__member=member, orders__status=OrderStatus.IN_QUEUE)
+
+    def with_queue_position(self, member: Member) -> "BookQuerySet":
+        """
+        Member's place in the queue of each book, or None if not enqueued.
+        """
+        position = Order.objects.filter(book=OuterRef("pk")).with_queue_position(member).order_by().values("queue_position")
+        return self.annotate(queue_position=Subquery(position))
+
+    def with_stuck_queue(self) -> "BookQuerySet":
+        """
+        Books still holding a done reservation, or free books with enqueued orders,
+        see `QueuePromotionService`.
+        """
+        enqueued = Order.objects.filter(book=OuterRef("pk"), status=OrderStatus.IN_QUEUE)
+        return self.filter(Q(reservation__status__in=Reservation.DONE_STATES) | (Q(reservation__isnull=True) & Exists(enqueued)))
+
+    def facet_counts(self, language_filter: Q = Q(), availability_filter: Q = Q()) -> dict[str, Any]:
+        """
+        Counts books per language and availability with a single conditional aggregation query.
+        Each facet is counted with the other facet filter applied, but not its own,
+        so the counts for alternative values of a selected facet stay visible.
+        """
+        language_counts = {code: Count("pk", filter=Q(language=code) & availability_filter) for code in Language.values}
+        counts = self.order_by().aggregate(
+            total=Count("pk", filter=language_filter & availability_filter),
+            available=Count("pk", filter=Q(is_available=True) & language_filter),
+            reserved=Count("pk", filter=Q(is_available=False) & language_filter),
+            **{f"language_{code}": count for code, count in language_counts.items()},
         )
 
-    def with_reservation_extensions(self) -> "BookQuerySet":
-        return self.prefetch_related("reservation__extensions").annotate(
-            has_requested_extension=Exists(
-                ReservationExtension.objects.filter(
-                    reservation=OuterRef("reservation__pk"),
-                    status=ReservationExtensionStatus.REQUESTED,
-                ),
-            )
+        return {
+            "total": counts["total"],
+            "language": {code: counts[f"language_{code}"] for code in language_counts},
+            "availability": {
+                "available": counts["available"],
+                "reserved": counts["reserved"],
+            },
+        }
+
+    @property
+    def supports_full_text_search(self) -> bool:
+        return connections[self.db].vendor == "postgresql"
+
+    def search(self, text: str) -> "BookQuerySet":
+        """
+        Full-text search over the stored search vector, ranked by relevance.
+        PostgreSQL only, see `supports_full_text_search`.
+        """
+        query = SearchQuery(text, config=Book.SEARCH_CONFIG, search_type="websearch")
+        # double precision, so ranks round trip exactly through pagination cursors
+        search_rank = Cast(SearchRank(F("search_vector"), query), FloatField())
+        return self.filter(search_vector=query).annotate(search_rank=search_rank).order_by(F("search_rank").desc(), *Book._meta.ordering)
+
+    def update_search_vector(self) -> int:
+        """
+        Recomputes the search vector with a single UPDATE statement,
+        title is weighted above author name.
+        """
+        if not self.supports_full_text_search:
+            return 0
+
+        author_name = Author.objects.filter(pk=OuterRef("author_id")).annotate(name=Concat("first_name", Value(" "), "last_name")).values("name")
+        return self.update(
+            search_vector=(
+                SearchVector("title", weight="A", config=Book.SEARCH_CONFIG) + SearchVector(Subquery(author_name), weight="B", config=Book.SEARCH_CONFIG)
+            ),
         )
 
-    def available(self) -> "BookQuerySet":
-        return self.filter(reservation__isnull=True)
+    def with_actual_counters(self) -> "BookQuerySet":
+        """
+        Annotates counters computed from orders and reservations,
+        to compare against the stored `amount_in_queue` and `is_available`.
+        """
+        in_queue = Order.objects.filter(book=OuterRef("pk"), status=OrderStatus.IN_QUEUE).order_by().values("book").annotate(count=Count("pk")).values("count")
+        return self.annotate(
+            actual_amount_in_queue=Coalesce(Subquery(in_queue), 0),
+            actual_is_available=ExpressionWrapper(Q(reservation__isnull=True), output_field=BooleanField()),
+        )
 
-    def reserved_by_member(self, member: Member) -> "BookQuerySet":
-        return self.with_reservation_member().filter(reservation__member=member)
+    def with_stale_counters(self) -> "BookQuerySet":
+        return self.with_actual_counters().exclude(amount_in_queue=F("actual_amount_in_queue"), is_available=F("actual_is_available"))
 
-    def enqueued_by_member(self, member: Member) -> "BookQuerySet":
-        return self.filter(orders__member=member, orders__status=OrderStatus.IN_QUEUE)
+    def recount_counters(self) -> int:
+        """
+        Overwrites stale stored counters with the actual ones,
+        returns the number of fixed books.
+        """
+        return self.with_stale_counters().update(amount_in_queue=F("actual_amount_in_queue"), is_available=F("actual_is_available"))
 
 
 class Book(TimestampedModel):
     orders: "QuerySet[Order]"
     objects: BookQuerySet = BookQuerySet.as_manager()
 
+    # catalogue is multilingual, so no language specific stemming
+    SEARCH_CONFIG = "simple"
+    SEARCH_VECTOR_FIELDS = {"title", "author"}
+    # only changed incrementally with F() expressions, see `update_amount_in_queue`
+    COUNTER_FIELDS = {"amount_in_queue"}
+
     # annotated
-    has_requested_extension: bool
+    queue_position: int | None
 
     title = models.CharField(max_length=200, unique=True)
     author = models.ForeignKey("Author", related_name="books", on_delete=models.CASCADE)
@@ -252,16 +413,38 @@ class Book(TimestampedModel):
         blank=True,
         help_text=_("The cover image of book"),
     )
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+    # denormalized, maintained by `Order.save` and `Book.save`
+    amount_in_queue = models.PositiveIntegerField(default=0, editable=False)
+    is_available = models.BooleanField(default=True, editable=False, db_index=True)
 
     class Meta:
         ordering = [F("modified_at").desc(nulls_last=True)]
+        # PostgreSQL only indexes, see migrations using AddPostgresIndex:
+        # - book_modified_at_id_idx, keyset pagination of catalogue, see BookCursorPagination
+        # - book_search_vector_idx, GIN index for full-text search
+        # - book_title_trgm_idx, trigram index matching UPPER() used by icontains lookups, see BookSuggestions
 
     def __str__(self) -> str:
         return f"{self.title}"
 
     def save(self, *args: Any, **kwargs: Any) -> None:
+        self.is_available = not self.has_reservation
         self.create_order_for_reservation()
-        return super().save(*args, **kwargs)
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "reservation" in update_fields:
+            kwargs["update_fields"] = update_fields = {*update_fields, "is_available"}
+        elif update_fields is None and not self._state.adding:
+            # never overwrite counters with possibly stale in-memory values
+            kwargs["update_fields"] = update_fields = [
+                field.name for field in self._meta.concrete_fields if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+
+        super().save(*args, **kwargs)
+
+        if update_fields is None or self.SEARCH_VECTOR_FIELDS.intersection(update_fields):
+            Book.objects.filter(pk=self.pk).update_search_vector()
 
     def create_order_for_reservation(self) -> None:
         """
@@ -276,39 +459,34 @@ class Book(TimestampedModel):
                 status=OrderStatus.PROCESSED,
             )
 
-    def process_next_order(self) -> None:
-        self.reservation = None  # type: ignore[assignment]
-        self.save(update_fields=["reservation"])
-
-        if not self.has_enqueued_orders:
-            return
-
-        next_order: Order = self.enqueued_orders.first()
-        next_order.status = OrderStatus.UNPROCESSED
-        next_order.save()
-        send_order_created_email.delay(next_order.id)
+    def update_amount_in_queue(self, delta: int) -> None:
+        Book.objects.filter(pk=self.pk).update(amount_in_queue=F("amount_in_queue") + delta)
+        self.amount_in_queue += delta
 
     def is_issued_to_member(self, member: Member) -> bool:
         if not self.is_issued:
             return False
 
-        return self.reservation.member == member
+        return self.reservation.member_id == member.pk
 
     def is_reserved_by_member(self, member: Member) -> bool:
         if not self.is_reserved:
             return False
 
-        return self.reservation.member == member
+        return self.reservation.member_id == member.pk
 
     def is_booked_by_member(self, member: Member) -> bool:
         if not self.is_booked:
             return False
 
-        return self.reservation.member == member
+        return self.reservation.member_id == member.pk
 
     @property
-    def is_available(self) -> bool:
-        return self.reservation is None
+    def has_reservation(self) -> bool:
+        # reservation may be assigned before being saved, so its id is not set yet
+        if self._meta.get_field("reservation").is_cached(self):
+            return self.reservation is not None
+        return self.reservation_id is not None
 
     @property
     def is_reserved(self) -> bool:
@@ -332,7 +510,7 @@ class Book(TimestampedModel):
 
     @property
     def enqueued_orders(self) -> "OrderQuerySet":
-        return self.orders.filter(status=OrderStatus.IN_QUEUE).order_by("created_at")
+        return self.orders.filter(status=OrderStatus.IN_QUEUE).order_by("created_at", "pk")
 
     @property
     def has_enqueued_orders(self) -> bool:
@@ -352,16 +530,51 @@ class OrderQuerySet(models.QuerySet):
         return self.filter(
             book=book,
             member=member,
-            status__in=[
-                OrderStatus.UNPROCESSED,
-                OrderStatus.IN_QUEUE,
-            ],
+            status__in=Order.PROCESSABLE_STATES,
         )
 
+    def enqueued_by_member(self, member: Member) -> "OrderQuerySet":
+        return self.filter(member=member, status=OrderStatus.IN_QUEUE)
+
+    def transitionable(self, status: str) -> "OrderQuerySet":
+        from apps.books.transitions import order_transitions
+
+        return order_transitions.transitionable(self, status)
+
+    def transition(self, status: str, **fields: Any) -> list["Order"]:
+        """
+        Changes status of all orders at once, writing their history, see `StateMachine.apply`.
+        """
+        from apps.books.transitions import order_transitions
+
+        return order_transitions.apply(self, status, **fields)
+
+    def with_queue_position(self, member: Member | None = None) -> "OrderQuerySet":
+        """
+        Enqueued orders with their 1-based place in the book queue, same order as `Book.enqueued_orders`.
+        Plain filters are applied before window functions and would renumber the queue,
+        so orders of a member are picked with `member`, after numbering whole book queues.
+        """
+        queryset = self.filter(status=OrderStatus.IN_QUEUE).annotate(
+            queue_position=Window(RowNumber(), partition_by=F("book"), order_by=[F("created_at").asc(), F("pk").asc()]),
+        )
+        if member is not None:
+            queryset = queryset.alias(
+                member_queue_position=Case(When(member=member, then=F("queue_position"))),
+            ).filter(member_queue_position__isnull=False)
+        return queryset
+
 
 class Order(TimestampedModel):
+    # annotated
+    queue_position: int
+
     # NOTE: API Only restriction. Admins can still enqueue ulimited amount of orders to members
     MAX_QUEUED_ORDERS_ALLOWED = 3
+    PROCESSABLE_STATES = [
+        OrderStatus.UNPROCESSED,
+        OrderStatus.IN_QUEUE,
+    ]
     objects: OrderQuerySet = OrderQuerySet.as_manager()
 
     member = models.ForeignKey(Member, related_name="orders", on_delete=models.SET_NULL, null=True)
@@ -401,6 +614,20 @@ class Order(TimestampedModel):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # book queues, see `Book.enqueued_orders` and `OrderQuerySet.with_queue_position`
+            models.Index(fields=["book", "created_at"], condition=Q(status=OrderStatus.IN_QUEUE), name="order_book_queue_idx"),
+            # enqueued orders of a member, see `OrderQuerySet.enqueued_by_member`
+            models.Index(fields=["member", "status"], name="order_member_status_idx"),
+        ]
+        constraints = [
+            # a member can't order the same book again until the order is processed
+            models.UniqueConstraint(
+                fields=["book", "member"],
+                condition=Q(status__in=[OrderStatus.UNPROCESSED, OrderStatus.IN_QUEUE]),
+                name="order_unique_processable_per_member",
+            ),
+        ]
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
@@ -410,20 +637,39 @@ class Order(TimestampedModel):
         return self._status_initial != self.status and self.status == status
 
     def save(self, *args: Any, **kwargs: Any) -> None:
-        if self.book.is_available:
-            self.create_reservation()
-        elif self.status_changed_to(OrderStatus.MEMBER_CANCELLED):
-            self.cancel_reservation()
-        elif self.status_changed_to(OrderStatus.REFUSED):
-            self.refuse_reservation()
-        elif self.status_changed_to(OrderStatus.PROCESSED):
-            self.notify_member_of_reservation()
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            if self.book.is_available:
+                self.create_reservation()
+            elif self.status_changed_to(OrderStatus.MEMBER_CANCELLED):
+                self.cancel_reservation()
+            elif self.status_changed_to(OrderStatus.REFUSED):
+                self.refuse_reservation()
+            elif self.status_changed_to(OrderStatus.PROCESSED):
+                self.notify_member_of_reservation()
+            queue_delta = self.get_queue_delta()
+            super().save(*args, **kwargs)
+
+            if queue_delta:
+                self.book.update_amount_in_queue(queue_delta)
 
         # in case of repetitive instance reuse,
         # makes sure to update the initial status after each save
         self._status_initial = self.status
 
+    def get_queue_delta(self) -> int:
+        """
+        Change of the book queue length caused by saving this order.
+        Compared against the stored status, since reservation changes above
+        may have already promoted this very order out of the queue.
+        """
+        if OrderStatus.IN_QUEUE not in (self.status, self._status_initial):
+            return 0
+
+        stored_status = None
+        if not self._state.adding:
+            stored_status = Order.objects.select_for_update().filter(pk=self.pk).values_list("status", flat=True).first()
+        return int(self.status == OrderStatus.IN_QUEUE) - int(stored_status == OrderStatus.IN_QUEUE)
+
     def cancel(self) -> None:
         self.status = OrderStatus.MEMBER_CANCELLED
         self.save()
@@ -447,7 +693,7 @@ class Order(TimestampedModel):
             self.reservation.delete()
 
     def notify_member_of_reservation(self) -> None:
-        send_reservation_confirmed_email.delay(self.id, self.reservation.id)
+        Outbox.enqueue(send_reservation_confirmed_email, self.id, self.reservation.id)
 
     def __str__(self) -> str:
         return f"{self.pk} - {self.get_status_display()}"
@@ -0,0 +1,21 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from apps.users.models import Member
+
+
+class MemberFee(models.Model):
+    """
+    Late fees a member owes for reservations currently overdue, recomputed by `LateFeeService`.
+    """
+
+    member = models.OneToOneField(Member, on_delete=models.CASCADE, related_name="fee")
+    amount = models.DecimalField(_("Amount"), max_digits=10, decimal_places=2)
+    overdue_reservations = models.PositiveIntegerField(_("Overdue reservations"))
+    computed_at = models.DateTimeField(_("Computed at"), db_index=True)
+
+    class Meta:
+        ordering = ["-amount"]
+
+    def __str__(self) -> str:
+        return f"{self.member} - {self.amount}"
@@ -0,0 +1,31 @@
+from typing import Any
+
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from apps.books.cache import bump_catalogue_version
+from apps.books.const import OrderStatus
+from apps.books.models import Author, Book, Order, Publisher, Reservation, ReservationExtension
+
+
+@receiver(post_delete, sender=Order)
+def decrease_amount_in_queue(sender: type[Order], instance: Order, **kwargs: Any) -> None:
+    if instance.status == OrderStatus.IN_QUEUE and instance.book_id is not None:
+        Book.objects.filter(pk=instance.book_id).update(amount_in_queue=F("amount_in_queue") - 1)
+
+
+@receiver(pre_delete, sender=Reservation)
+def release_reserved_book(sender: type[Reservation], instance: Reservation, **kwargs: Any) -> None:
+    # book.reservation is nulled by on_delete=SET_NULL, which bypasses Book.save
+    Book.objects.filter(reservation=instance).update(is_available=True)
+
+
+@receiver([post_save, post_delete], sender=Book)
+@receiver([post_save, post_delete], sender=Author)
+@receiver([post_save, post_delete], sender=Publisher)
+@receiver([post_save, post_delete], sender=Reservation)
+@receiver([post_save, post_delete], sender=Order)
+@receiver([post_save, post_delete], sender=ReservationExtension)
+def invalidate_catalogue_responses(sender: type[Book | Author | Publisher | Reservation | Order | ReservationExtension], **kwargs: Any) -> None:
+    bump_catalogue_version()
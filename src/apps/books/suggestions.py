@@ -0,0 +1,165 @@
+import hashlib
+from bisect import bisect_left
+from typing import Any, Callable, Iterable, Iterator
+
+from django.conf import settings
+from django.contrib.postgres.expressions import ArraySubquery
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import BooleanField, F, Func, QuerySet, Value
+from django.db.models.functions import Concat, Greatest
+
+from apps.books.cache import get_catalogue_version
+from apps.books.models import Author, Book
+
+SUGGEST_CACHE_PREFIX = "books:suggest"
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+class PrefixIndex:
+    """
+    In-process prefix index, used as a fallback on databases without pg_trgm.
+
+    It's a flattened trie: every entry is stored under each of its word boundaries
+    in a sorted array, so any prefix of any word (or of several consecutive words)
+    is found with a binary search and a short scan of adjacent keys.
+    """
+
+    def __init__(self) -> None:
+        self._keys: list[str] = []
+        self._values: list[Any] = []
+
+    @classmethod
+    def build(cls, entries: Iterable[tuple[Any, str]]) -> "PrefixIndex":
+        index = cls()
+        pairs = sorted((key, value) for value, text in entries for key in cls.word_suffixes(normalize(text)))
+        index._keys = [key for key, _ in pairs]
+        index._values = [value for _, value in pairs]
+        return index
+
+    @staticmethod
+    def word_suffixes(text: str) -> Iterator[str]:
+        words = text.split(" ")
+        for position in range(len(words)):
+            yield " ".join(words[position:])
+
+    def search(self, prefix: str, limit: int) -> list[Any]:
+        prefix = normalize(prefix)
+        found: dict[Any, None] = {}  # ordered set
+        position = bisect_left(self._keys, prefix)
+        while position < len(self._keys) and len(found) < limit and self._keys[position].startswith(prefix):
+            found.setdefault(self._values[position])
+            position += 1
+        return list(found)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class BookSuggestions:
+    """
+    Typeahead suggestions for book titles and authors.
+
+    Uses trigram indexes on PostgreSQL and an in-process prefix index elsewhere.
+    Results are cached per normalized prefix for `BOOKS_SUGGEST_CACHE_TTL` seconds.
+
+    On PostgreSQL only the first `MAX_CANDIDATES` matches are ranked by similarity, so short prefixes
+    matching a large part of the catalogue cost the same as specific ones. Ranking is exact once
+    the typed prefix narrows matches below the limit.
+    """
+
+    MAX_CANDIDATES = 500
+
+    # prefix indexes by name, along with the catalogue version they were built for
+    _prefix_indexes: dict[str, tuple[int, PrefixIndex]] = {}
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+
+    @property
+    def supports_trigram_search(self) -> bool:
+        return connections[Book.objects.db].vendor == "postgresql"
+
+    def get_cache_key(self, query: str) -> str:
+        digest = hashlib.md5(query.encode(), usedforsecurity=False).hexdigest()
+        return f"{SUGGEST_CACHE_PREFIX}:{self.limit}:{digest}"
+
+    def suggest(self, query: str) -> dict[str, list[dict[str, Any]]]:
+        query = normalize(query)
+        cache_key = self.get_cache_key(query)
+
+        suggestions = cache.get(cache_key)
+        if suggestions is None:
+            if self.supports_trigram_search:
+                suggestions = {"titles": self.trigram_titles(query), "authors": self.trigram_authors(query)}
+            else:
+                suggestions = {"titles": self.prefix_titles(query), "authors": self.prefix_authors(query)}
+            cache.set(cache_key, suggestions, timeout=settings.BOOKS_SUGGEST_CACHE_TTL)
+
+        return suggestions
+
+    def title_candidates(self, query: str) -> QuerySet[Book]:
+        # matches `book_title_trgm_idx`
+        return Book.objects.filter(title__icontains=query)
+
+    def author_candidates(self, query: str) -> QuerySet[Author]:
+        # matches `author_full_name_trgm_idx`
+        return Author.objects.annotate(full_name=Concat("first_name", Value(" "), "last_name")).filter(full_name__icontains=query)
+
+    def trigram_titles(self, query: str) -> list[dict[str, Any]]:
+        return list(
+            Book.objects.filter(self.any_of(self.title_candidates(query)))
+            .annotate(similarity=TrigramWordSimilarity(query, "title"))
+            .order_by("-similarity", "title")
+            .values("id", "title")[: self.limit]
+        )
+
+    def trigram_authors(self, query: str) -> list[dict[str, Any]]:
+        return list(
+            Author.objects.filter(self.any_of(self.author_candidates(query)))
+            .annotate(similarity=Greatest(TrigramWordSimilarity(query, "first_name"), TrigramWordSimilarity(query, "last_name")))
+            .order_by("-similarity", "last_name", "first_name")
+            .values("id", "first_name", "last_name")[: self.limit]
+        )
+
+    def any_of(self, candidates: QuerySet) -> Func:
+        """
+        `= ANY(ARRAY(...))` of the first `MAX_CANDIDATES` pks, the array is computed once
+        and the ranked rows are then fetched by primary key.
+        """
+        return Func(
+            F("pk"),
+            ArraySubquery(candidates.order_by().values("pk")[: self.MAX_CANDIDATES]),
+            template="%(expressions)s)",
+            arg_joiner=" = ANY(",
+            output_field=BooleanField(),
+        )
+
+    def get_prefix_index(self, name: str, build: Callable[[], PrefixIndex]) -> PrefixIndex:
+        """
+        Prefix indexes are kept in process and rebuilt once the shared catalogue version changes,
+        so changes made by other processes, e.g. Celery workers, are seen too.
+        """
+        version = get_catalogue_version()
+        built = self._prefix_indexes.get(name)
+        if built is None or built[0] != version:
+            built = self._prefix_indexes[name] = (version, build())
+        return built[1]
+
+    def prefix_titles(self, query: str) -> list[dict[str, Any]]:
+        index = self.get_prefix_index("titles", lambda: PrefixIndex.build(((id, title), title) for id, title in Book.objects.values_list("id", "title")))
+        return [{"id": id, "title": title} for id, title in index.search(query, self.limit)]
+
+    def prefix_authors(self, query: str) -> list[dict[str, Any]]:
+        index = self.get_prefix_index(
+            "authors",
+            lambda: PrefixIndex.build(
+                ((id, first_name, last_name), f"{first_name} {last_name}")
+                for id, first_name, last_name in Author.objects.values_list("id", "first_name", "last_name")
+            ),
+        )
+        return [{"id": id, "first_name": first_name, "last_name": last_name} for id, first_name, last_name in index.search(query, self.limit)]
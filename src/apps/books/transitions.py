@@ -0,0 +1,196 @@
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from django.db import models, transaction
+from django.db.models import F, QuerySet, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.books.cache import bump_catalogue_version
+from apps.books.const import OrderStatus, ReservationExtensionStatus, ReservationStatus
+from apps.books.models import Book, Order, Reservation
+from apps.books.models.book import ReservationExtension
+from apps.books.services import QueuePromotionService
+from core.outbox import Outbox
+from core.tasks import send_reservation_confirmed_email, send_reservation_extension_approved_email
+
+Guard = Callable[[Any], bool]
+Updates = Callable[[], dict[str, Any]]
+Effect = Callable[[list[Any]], None]
+
+
+class TransitionError(Exception):
+    """
+    Some of the rows can't be moved to the requested status.
+    """
+
+
+class StateMachine:
+    """
+    Allowed status transitions of a model, applied to whole querysets at once.
+
+    Rows are locked and checked against the transition table and guards, then updated with a single UPDATE,
+    history is written in bulk for historical models and effects of the transition are run once for all rows.
+    Saving a single instance keeps running its side effects in `save`.
+    """
+
+    def __init__(self, model: type[models.Model], transitions: dict[str, Iterable[str]]) -> None:
+        self.model = model
+        self.transitions = {source: set(targets) for source, targets in transitions.items()}
+        self.guards: dict[str, list[Guard]] = defaultdict(list)
+        self.updates: dict[str, list[Updates]] = defaultdict(list)
+        self.effects: dict[str, list[Effect]] = defaultdict(list)
+
+    def guard(self, *statuses: str) -> Callable[[Guard], Guard]:
+        """
+        Registers a check of a single row, which has to pass for the row to move to any of `statuses`.
+        """
+
+        def register(guard: Guard) -> Guard:
+            for status in statuses:
+                self.guards[status].append(guard)
+            return guard
+
+        return register
+
+    def update(self, *statuses: str) -> Callable[[Updates], Updates]:
+        """
+        Registers extra field updates, applied by the same UPDATE as the status.
+        """
+
+        def register(updates: Updates) -> Updates:
+            for status in statuses:
+                self.updates[status].append(updates)
+            return updates
+
+        return register
+
+    def effect(self, *statuses: str) -> Callable[[Effect], Effect]:
+        """
+        Registers a side effect, run with all rows moved to any of `statuses`.
+        """
+
+        def register(effect: Effect) -> Effect:
+            for status in statuses:
+                self.effects[status].append(effect)
+            return effect
+
+        return register
+
+    def sources(self, status: str) -> list[str]:
+        return [source for source, targets in self.transitions.items() if status in targets]
+
+    def can_transition(self, instance: Any, status: str) -> bool:
+        return status in self.transitions.get(instance.status, ()) and all(guard(instance) for guard in self.guards[status])
+
+    def transitionable(self, queryset: QuerySet, status: str) -> QuerySet:
+        """
+        Rows in a status allowed to move to `status`, guards are not checked.
+        """
+        return queryset.filter(status__in=self.sources(status))
+
+    def apply(self, queryset: QuerySet, status: str, history_change_reason: str | None = None, **fields: Any) -> list[Any]:
+        """
+        Moves all rows to `status`, also setting `fields`. Raises `TransitionError` without changing anything
+        if any of the rows can't be moved. Returns the changed rows.
+        """
+        with transaction.atomic():
+            rows = list(queryset.select_related(None).select_for_update(of=("self",)))
+            invalid = [row.pk for row in rows if not self.can_transition(row, status)]
+            if invalid:
+                raise TransitionError(f"{self.model._meta.verbose_name} {', '.join(map(str, invalid))} can't be changed to {status}")
+            if not rows:
+                return rows
+
+            fields["modified_at"] = timezone.now()
+            updates = {name: value for updates in self.updates[status] for name, value in updates().items()}
+            self.model._default_manager.filter(pk__in=[row.pk for row in rows]).update(status=status, **fields, **updates)
+            for row in rows:
+                row.status = row._status_initial = status
+                for name, value in fields.items():
+                    setattr(row, name, value)
+
+            if hasattr(self.model, "history"):
+                self.model.history.bulk_history_create(rows, update=True, default_change_reason=history_change_reason)
+            for effect in self.effects[status]:
+                effect(rows)
+            # bulk updates send no signals, cached catalogue responses are invalidated here instead
+            bump_catalogue_version()
+        return rows
+
+
+reservation_transitions = StateMachine(
+    Reservation,
+    {
+        ReservationStatus.RESERVED: [ReservationStatus.ISSUED, ReservationStatus.CANCELLED, ReservationStatus.REFUSED],
+        ReservationStatus.ISSUED: [ReservationStatus.COMPLETED, ReservationStatus.CANCELLED, ReservationStatus.REFUSED],
+    },
+)
+
+
+@reservation_transitions.update(ReservationStatus.ISSUED)
+def start_reservation_terms() -> dict[str, Any]:
+    return {"term": Coalesce(F("term"), Value(Reservation.get_default_term()))}
+
+
+@reservation_transitions.effect(*Reservation.DONE_STATES)
+def release_reserved_books(reservations: list[Reservation]) -> None:
+    QueuePromotionService.promote(Book.objects.filter(reservation__in=[reservation.pk for reservation in reservations]).values_list("pk", flat=True))
+
+
+order_transitions = StateMachine(
+    Order,
+    {
+        # enqueued orders are moved on by `QueuePromotionService`
+        OrderStatus.UNPROCESSED: [OrderStatus.PROCESSED, OrderStatus.REFUSED, OrderStatus.MEMBER_CANCELLED],
+        OrderStatus.IN_QUEUE: [OrderStatus.REFUSED, OrderStatus.MEMBER_CANCELLED],
+    },
+)
+
+
+@order_transitions.guard(OrderStatus.PROCESSED)
+def is_reserved(order: Order) -> bool:
+    return order.reservation_id is not None
+
+
+@order_transitions.effect(OrderStatus.PROCESSED)
+def notify_members_of_reservations(orders: list[Order]) -> None:
+    Outbox.enqueue_many(send_reservation_confirmed_email, [(order.id, order.reservation_id) for order in orders])
+
+
+@order_transitions.effect(OrderStatus.REFUSED)
+def refuse_reservations(orders: list[Order]) -> None:
+    close_order_reservations(orders, ReservationStatus.REFUSED)
+
+
+@order_transitions.effect(OrderStatus.MEMBER_CANCELLED)
+def cancel_reservations(orders: list[Order]) -> None:
+    close_order_reservations(orders, ReservationStatus.CANCELLED)
+
+
+def close_order_reservations(orders: list[Order], status: str) -> None:
+    reservations = Reservation.objects.filter(pk__in=[order.reservation_id for order in orders if order.reservation_id])
+    reservation_transitions.apply(reservation_transitions.transitionable(reservations, status), status)
+
+    # closed orders leave their queues
+    Book.objects.filter(pk__in={order.book_id for order in orders if order.book_id}).recount_counters()
+
+
+extension_transitions = StateMachine(
+    ReservationExtension,
+    {
+        ReservationExtensionStatus.REQUESTED: [
+            ReservationExtensionStatus.APPROVED,
+            ReservationExtensionStatus.REFUSED,
+            ReservationExtensionStatus.CANCELLED,
+        ],
+    },
+)
+
+
+@extension_transitions.effect(ReservationExtensionStatus.APPROVED)
+def extend_reservations(extensions: list[ReservationExtension]) -> None:
+    reservation_ids = {extension.reservation_id for extension in extensions}
+    Reservation.objects.filter(pk__in=reservation_ids).update(term=F("term") + Reservation.RESERVATION_TERM, modified_at=timezone.now())
+    Outbox.enqueue_many(send_reservation_extension_approved_email, [(reservation_id,) for reservation_id in sorted(reservation_ids)])
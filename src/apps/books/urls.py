@@ -1,9 +1,20 @@
 from django.urls import path
 
-from apps.books.api.views import BookDetailView, BookListView, BookOrderView, BookReservationExtendView
+from apps.books.api.views import (
+    BookBatchView,
+    BookDetailView,
+    BookListView,
+    BookOrderView,
+    BookReservationExtendView,
+    BookSuggestView,
+    OverdueReservationListView,
+)
 
 urlpatterns = [
     path("", BookListView.as_view(), name="books-list"),
+    path("suggest/", BookSuggestView.as_view(), name="books-suggest"),
+    path("batch/", BookBatchView.as_view(), name="books-batch"),
+    path("reservations/overdue/", OverdueReservationListView.as_view(), name="reservations-overdue"),
     path("<int:pk>/", BookDetailView.as_view(), name="book-detail"),
     path("<int:book_id>/order/", BookOrderView.as_view(), name="book-order"),
     path("<int:book_id>/extend/", BookReservationExtendView.as_view(), name="book-reservation-extend"),
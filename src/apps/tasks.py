@@ -1,20 +1,25 @@
+from datetime import timedelta
 from urllib.parse import urljoin
 
-from celery import shared_task
+from celery import Task, shared_task
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 
-from apps.books.const import ReservationStatus
-from apps.books.models import Reservation
+from apps.books.const import OrderStatus, ReservationStatus
+from apps.books.fees import LateFeeService
+from apps.books.models import Book, Order, Reservation
+from apps.books.services import OrderService, QueuePromotionService
+from apps.users.models import User
 from core.conf.environ import env
+from core.outbox import Outbox
 from core.utils.mailer import Mailer, Message
 
 
 @shared_task(name="books/reservation_term_reminder")
 def send_reservation_term_reminder(due_in_days: int = 2) -> dict[str, int]:
-    now = timezone.now()
-    reservations: list[Reservation] = Reservation.objects.select_related("book", "member").filter(
-        term=now + timezone.timedelta(days=due_in_days), status=ReservationStatus.ISSUED
-    )
+    term = timezone.localdate() + timezone.timedelta(days=due_in_days)
+    reservations: list[Reservation] = Reservation.objects.select_related("book", "member").issued_due_on(term)
     messages = []
     reservations_url = urljoin(env("PRODUCTION_URL"), "account/reservations/")
     for reservation in reservations:
@@ -37,3 +42,97 @@ def send_reservation_term_reminder(due_in_days: int = 2) -> dict[str, int]:
         "sent": emails_sent,
         "messages_amount": len(messages),
     }
+
+
+@shared_task(name="books/promote_stuck_queues")
+def promote_stuck_queues(batch_size: int = 500) -> dict[str, int]:
+    """
+    Repairs queues left behind by reservations finished without promoting the next order,
+    e.g. through queryset updates. Each batch is promoted in its own transaction.
+    """
+    book_ids = list(Book.objects.with_stuck_queue().order_by("pk").values_list("pk", flat=True))
+    promoted = 0
+    for start in range(0, len(book_ids), batch_size):
+        promoted += len(QueuePromotionService.promote(book_ids[start : start + batch_size]))
+    return {
+        "books": len(book_ids),
+        "promoted": promoted,
+    }
+
+
+@shared_task(name="books/delete_orders", bind=True)
+def delete_orders(self: Task, order_ids: list[int], user_id: int | None = None) -> dict[str, int]:
+    """
+    Deletes large admin selections of orders in batches, progress is reported as task state.
+    """
+    user = User.objects.filter(pk=user_id).first()
+    deleted = 0
+    for batch_deleted in OrderService.delete_in_batches(order_ids, user):
+        deleted += batch_deleted
+        self.update_state(state="PROGRESS", meta={"deleted": deleted, "total": len(order_ids)})
+    return {
+        "deleted": deleted,
+        "total": len(order_ids),
+    }
+
+
+@shared_task(name="books/compute_late_fees")
+def compute_late_fees() -> dict[str, int]:
+    return {
+        "charged": LateFeeService.compute(),
+    }
+
+
+EXPIRED_CHANGE_REASON = "Reservation not collected"
+
+
+@shared_task(name="books/expire_uncollected_reservations")
+def expire_uncollected_reservations(batch_size: int = 500) -> dict[str, int]:
+    """
+    Cancels reservations not picked up within `RESERVATION_PICKUP_DAYS` along with their unprocessed orders
+    and promotes the next enqueued orders of their books.
+    Reservations are walked in keyset pages by pk, each page in its own transaction.
+    Rows locked by a concurrent run are skipped and left for it.
+    """
+    uncollected = Reservation.objects.uncollected(timezone.now() - timedelta(days=settings.RESERVATION_PICKUP_DAYS)).order_by("pk")
+    last_pk = 0
+    expired = 0
+    while True:
+        with transaction.atomic():
+            page = list(uncollected.filter(pk__gt=last_pk).select_for_update(skip_locked=True).values_list("pk", flat=True)[:batch_size])
+            if not page:
+                break
+            last_pk = page[-1]
+            reservations = Reservation.objects.filter(pk__in=page).transition(ReservationStatus.CANCELLED)
+            # closed orders no longer count as processable, so members can order the books again
+            Order.objects.filter(reservation__in=page).transitionable(OrderStatus.MEMBER_CANCELLED).transition(
+                OrderStatus.MEMBER_CANCELLED, change_reason=EXPIRED_CHANGE_REASON, history_change_reason=EXPIRED_CHANGE_REASON
+            )
+            Outbox.enqueue(send_reservation_expired_emails, sorted(reservation.pk for reservation in reservations))
+        expired += len(reservations)
+    return {
+        "expired": expired,
+    }
+
+
+@shared_task(name="books/send_reservation_expired_emails")
+def send_reservation_expired_emails(reservation_ids: list[int]) -> dict[str, int]:
+    orders = Order.objects.select_related("book", "member").filter(reservation__in=reservation_ids)
+    reservations_url = urljoin(env("PRODUCTION_URL"), "account/reservations/")
+    messages = [
+        Message(
+            template_data={
+                "member_name": order.member.name,
+                "book_title": order.book.title,
+                "pickup_days": settings.RESERVATION_PICKUP_DAYS,
+                "reservations_url": reservations_url,
+            },
+            template_name="MemberReservationExpired",
+        )
+        for order in orders
+    ]
+    emails_sent = Mailer.send_bulk_templated_email(messages, template="MemberReservationExpired") if messages else 0
+    return {
+        "sent": emails_sent,
+        "messages_amount": len(messages),
+    }
@@ -10,6 +10,7 @@ from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, Toke
 from rest_framework_simplejwt.tokens import AccessToken
 
 from apps.users.models import Member, User
+from core.outbox import Outbox
 from core.tasks import send_member_registration_request_received, send_registration_notification_to_member
 
 
@@ -127,8 +128,8 @@ class MemberRegistrationRequestSerializer(serializers.ModelSerializer):
             last_name=validated_data.get("last_name", ""),
             password=validated_data["password"],
         )
-        send_member_registration_request_received.delay(member.id)
-        send_registration_notification_to_member.delay(member.id)
+        Outbox.enqueue(send_member_registration_request_received, member.id)
+        Outbox.enqueue(send_registration_notification_to_member, member.id)
         return member
 
 
@@ -21,6 +21,7 @@ from apps.users.api.serializers import (
     UserProfileSerializer,
 )
 from apps.users.models import InvalidPasswordResetTokenError, Member
+from core.outbox import Outbox
 from core.tasks import send_password_reset_link_to_member
 from core.throttling import AnonRateThrottle, PasswordResetConfirmRateThrottle, PasswordResetRateThrottle
 
@@ -128,7 +129,7 @@ class MemberPasswordReset(generics.GenericAPIView):
         try:
             member = Member.objects.get(email=serializer.validated_data["email"])
             member.set_password_reset_token()
-            send_password_reset_link_to_member.delay(member.id)
+            Outbox.enqueue(send_password_reset_link_to_member, member.id)
             return Response(status=HTTP_204_NO_CONTENT)
         except Member.DoesNotExist:
             pass
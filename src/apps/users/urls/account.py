@@ -0,0 +1,7 @@
+from django.urls import path
+
+from apps.books.api.views import MemberDashboardView
+
+urlpatterns = [
+    path("dashboard/", MemberDashboardView.as_view(), name="member_dashboard"),
+]
@@ -7,6 +7,18 @@ THROTTLING_ANON_RATE = env.str("THROTTLING_ANON_RATE", default="15/minute")
 THROTTLING_PASSWORD_RESET_RATE = env.str("THROTTLING_PASSWORD_RESET_RATE", default="5/hour")
 THROTTLING_PASSWORD_RESET_CONFIRM_RATE = env.str("THROTTLING_PASSWORD_RESET_CONFIRM_RATE", default="5/hour")
 
+BOOKS_SUGGEST_CACHE_TTL = env.int("BOOKS_SUGGEST_CACHE_TTL", default=60)
+# responses are invalidated by catalogue version, TTL only bounds the cache size
+BOOKS_RESPONSE_CACHE_TTL = env.int("BOOKS_RESPONSE_CACHE_TTL", default=60 * 60)
+# serializes book lists straight from `.values()`, see BookListProjection
+BOOKS_LIST_PROJECTION = env.bool("BOOKS_LIST_PROJECTION", default=False)
+# uncollected reservations are cancelled after this many days, see `expire_uncollected_reservations`
+RESERVATION_PICKUP_DAYS = env.int("RESERVATION_PICKUP_DAYS", default=7)
+# late fee tariff, see `LateFeeService`, cap is per reservation
+LATE_FEE_GRACE_DAYS = env.int("LATE_FEE_GRACE_DAYS", default=3)
+LATE_FEE_DAILY_RATE = env.str("LATE_FEE_DAILY_RATE", default="0.20")
+LATE_FEE_CAP = env.str("LATE_FEE_CAP", default="10.00")
+
 REST_FRAMEWORK = {
     "SEARCH_PARAM": "q",
     "DEFAULT_FILTER_BACKENDS": [
@@ -0,0 +1,8 @@
+from core.conf.environ import env
+
+# e.g. redis://redis:6379/1, local memory cache by default.
+# Local memory is per process, so anything but a single process without Celery workers
+# needs a shared cache: catalogue versions bumped elsewhere would never reach the cached responses.
+CACHES = {
+    "default": env.cache("CACHE_URL", default="locmemcache://"),
+}
@@ -0,0 +1,18 @@
+from django.db import models
+
+
+class OutboxMessage(models.Model):
+    """
+    Celery task call stored along with the changes it's about, see `core.outbox.Outbox`.
+    """
+
+    task_name = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["pk"]
+
+    def __str__(self) -> str:
+        return f"{self.pk} - {self.task_name}"
@@ -0,0 +1,103 @@
+import threading
+import weakref
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Any
+
+from celery import Task
+from django.db import connection, transaction
+from sentry_sdk.api import capture_exception
+
+from core.celery import celery
+from core.models import OutboxMessage
+
+# a single thread keeps the dispatch order and a single database connection
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="outbox")
+# connections are per thread, so is the dispatch scheduled on commit of their transaction
+_scheduled = threading.local()
+
+
+class Outbox:
+    """
+    Transactional outbox for Celery tasks.
+
+    Task calls are stored in the current transaction, so nothing is sent for rolled back changes,
+    and are sent to the broker in batches after commit, off the request thread.
+    Messages left behind, e.g. during a broker outage, are sent by the `core/dispatch_outbox` task.
+    """
+
+    BATCH_SIZE = 100
+
+    @classmethod
+    def enqueue(cls, task: Task, *args: Any, **kwargs: Any) -> None:
+        cls._store([OutboxMessage(task_name=task.name, args=list(args), kwargs=kwargs)])
+
+    @classmethod
+    def enqueue_many(cls, task: Task, calls_args: Iterable[Sequence[Any]]) -> None:
+        cls._store([OutboxMessage(task_name=task.name, args=list(args)) for args in calls_args])
+
+    @classmethod
+    def _store(cls, messages: list[OutboxMessage]) -> None:
+        if not messages:
+            return
+
+        OutboxMessage.objects.bulk_create(messages)
+        # once per transaction
+        scheduled = getattr(_scheduled, "dispatch", None)
+        if scheduled is None or scheduled() is None:
+            dispatch = _ScheduledDispatch()
+            _scheduled.dispatch = weakref.ref(dispatch)
+            transaction.on_commit(dispatch)
+
+    @classmethod
+    def schedule_dispatch(cls) -> None:
+        if celery.conf.task_always_eager:
+            # tasks are run in place, there's no broker to wait for
+            cls.dispatch()
+        else:
+            _executor.submit(cls._dispatch_in_background)
+
+    @classmethod
+    def _dispatch_in_background(cls) -> None:
+        try:
+            cls.dispatch()
+        except Exception as e:
+            capture_exception(e)
+        finally:
+            connection.close()
+
+    @classmethod
+    def dispatch(cls, batch_size: int = BATCH_SIZE) -> int:
+        """
+        Sends stored messages to the broker in batches, each over a single broker connection.
+        Messages are deleted in the same transaction they are locked and sent in,
+        so a failing batch is sent again later.
+        """
+        dispatched = 0
+        while True:
+            with transaction.atomic():
+                messages = list(OutboxMessage.objects.select_for_update(skip_locked=True)[:batch_size])
+                if messages:
+                    producer_context = nullcontext() if celery.conf.task_always_eager else celery.producer_or_acquire()
+                    with producer_context as producer:
+                        for message in messages:
+                            celery.tasks[message.task_name].apply_async(message.args, message.kwargs, producer=producer)
+                    OutboxMessage.objects.filter(pk__in=[message.pk for message in messages]).delete()
+
+            dispatched += len(messages)
+            if len(messages) < batch_size:
+                return dispatched
+
+
+class _ScheduledDispatch:
+    """
+    On commit callback scheduling the dispatch.
+
+    Pending on commit callbacks hold the only reference to it, so once the transaction or savepoint
+    it was scheduled in is rolled back, it's discarded along with the messages and the next message is scheduled again.
+    """
+
+    def __call__(self) -> None:
+        _scheduled.dispatch = None
+        Outbox.schedule_dispatch()
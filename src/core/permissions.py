@@ -6,3 +6,8 @@ from rest_framework.views import View
 class IsSuperUser(BasePermission):
     def has_permission(self, request: Request, view: View) -> bool:
         return bool(request.user and request.user.is_superuser)
+
+
+class IsLibrarian(BasePermission):
+    def has_permission(self, request: Request, view: View) -> bool:
+        return bool(request.user and (request.user.is_superuser or getattr(request.user, "is_librarian", False)))
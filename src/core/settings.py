@@ -14,6 +14,7 @@ include(
     "conf/auth.py",
     "conf/common.py",
     "conf/database.py",
+    "conf/cache.py",
     "conf/security.py",
     "conf/i18n.py",
     "conf/installed_apps.py",
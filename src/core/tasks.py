@@ -11,11 +11,17 @@ from sentry_sdk.api import capture_exception
 
 from apps.users.models import Member
 from core.conf.environ import env
+from core.outbox import Outbox
 from core.utils.mailer import Mailer, Message
 
 SingletonOrTask = Singleton if not env.bool("CELERY_ALWAYS_EAGER", default=False) else BaseTask
 
 
+@shared_task(name="core/dispatch_outbox", ignore_result=True)
+def dispatch_outbox() -> dict[str, int]:
+    return {"dispatched": Outbox.dispatch()}
+
+
 @shared_task(
     name="core/ping_production_website",
     ignore_result=True,
@@ -1,4 +1,5 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.db.models.query import QuerySet
 from django.http import HttpRequest
 from simple_history.admin import SimpleHistoryAdmin
 
@@ -18,6 +19,17 @@ class AppAdminMixin:
             *self.global_exclude,
         )
 
+    def message_bulk_result(self, request: HttpRequest, queryset: QuerySet, changed: int, verb: str) -> None:
+        """
+        Reports the outcome of a bulk action, rows the action doesn't apply to are skipped.
+        """
+        skipped = queryset.count() - changed
+        messages.add_message(
+            request,
+            messages.WARNING if skipped else messages.SUCCESS,
+            f"{changed} {queryset.model._meta.verbose_name}(s) {verb}, {skipped} skipped",
+        )
+
 
 class HistoricalModelAdmin(AppAdminMixin, SimpleHistoryAdmin):
     pass
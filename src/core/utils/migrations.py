@@ -0,0 +1,25 @@
+from django.db import migrations
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import ProjectState
+
+
+class AddPostgresIndex(migrations.AddIndex):
+    """
+    Adds index only on PostgreSQL, since some index features
+    (NULLS ordering, GIN, operator classes) are not supported by SQLite,
+    which is still used for local development.
+
+    The index is kept out of the migration state (and so out of model Meta),
+    otherwise SQLite would try to recreate it whenever a table is remade.
+    """
+
+    def state_forwards(self, app_label: str, state: ProjectState) -> None:
+        pass
+
+    def database_forwards(self, app_label: str, schema_editor: BaseDatabaseSchemaEditor, from_state: ProjectState, to_state: ProjectState) -> None:
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label: str, schema_editor: BaseDatabaseSchemaEditor, from_state: ProjectState, to_state: ProjectState) -> None:
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
@@ -1,6 +1,9 @@
+from datetime import date
 from typing import Any
 
 from django.db import models
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.models.sql.compiler import SQLCompiler
 from django.utils import timezone
 
 
@@ -25,3 +28,19 @@ class TimestampedModel(models.Model):
         if self.pk:
             self.modified_at = timezone.now()
         return super(TimestampedModel, self).save(*args, **kwargs)
+
+
+class DaysSince(models.Func):
+    """
+    Whole days passed from a date expression to `day`, negative for later dates.
+    """
+
+    arg_joiner = " - "
+    template = "(%(expressions)s)"
+    output_field = models.IntegerField()
+
+    def __init__(self, expression: Any, day: date) -> None:
+        super().__init__(models.Value(day, output_field=models.DateField()), expression)
+
+    def as_sqlite(self, compiler: SQLCompiler, connection: BaseDatabaseWrapper, **extra_context: Any) -> tuple[str, list[Any]]:
+        return self.as_sql(compiler, connection, template="CAST(JULIANDAY(%(expressions)s) AS INTEGER)", arg_joiner=") - JULIANDAY(", **extra_context)
@@ -1,11 +1,15 @@
 import pytest
+from django.contrib.messages import get_messages
 from django.urls import reverse
 from mixer.backend.django import mixer
 from rest_framework.status import HTTP_302_FOUND
 
-from apps.books.const import OrderStatus
+from apps.books.admin import OrderAdmin
+from apps.books.admin.deleted_order import HistoricalOrder
+from apps.books.const import OrderStatus, ReservationStatus
 from apps.books.models import Order
 from apps.books.models.book import Book, Reservation
+from apps.users.models import Member
 
 pytestmark = pytest.mark.django_db
 
@@ -44,7 +48,20 @@ def test_order_delete_model_deletes_associated_reservation(as_admin, book_order)
     assert not Reservation.objects.filter(id=reservation_id).exists()
 
 
-def test_order_delete_queryset_deletes_associated_reservations(as_admin, member):
+def test_order_delete_model_promotes_queued_order(as_admin, admin_user, book_order):
+    queued_order = mixer.blend(Order, book=book_order.book, member=mixer.blend(Member), status=OrderStatus.IN_QUEUE)
+
+    response = as_admin.post(reverse("admin:books_order_delete", args=[book_order.id]), {"post": "yes"})
+
+    assert response.status_code == HTTP_302_FOUND
+    queued_order.refresh_from_db()
+    assert queued_order.status == OrderStatus.UNPROCESSED
+    assert Book.objects.get(pk=book_order.book.pk).reservation == queued_order.reservation
+    assert not Book.objects.with_stale_counters().exists()
+    assert HistoricalOrder.objects.get(history_type="-").history_user == admin_user
+
+
+def test_order_delete_queryset_deletes_associated_reservations(as_admin, admin_user, member):
     books = mixer.cycle(3).blend(Book)
     for book in books:
         mixer.blend(Order, book=book, member=member)
@@ -67,3 +84,82 @@ def test_order_delete_queryset_deletes_associated_reservations(as_admin, member)
     assert response.status_code == HTTP_302_FOUND  # Expects a redirect after successful deletion
     assert not Order.objects.filter(id__in=[order.id for order in orders]).exists()
     assert not Reservation.objects.filter(id__in=reservation_ids).exists()
+    assert all(book.is_available for book in Book.objects.filter(pk__in=[book.pk for book in books]))
+    deleted_history = HistoricalOrder.objects.filter(history_type="-")
+    assert sorted(deleted_history.values_list("id", flat=True)) == sorted(order.id for order in orders)
+    assert {history.history_user for history in deleted_history} == {admin_user}
+
+
+def test_order_delete_queryset_promotes_queued_orders(as_admin, book_order):
+    queued_order = mixer.blend(Order, book=book_order.book, member=mixer.blend(Member), status=OrderStatus.IN_QUEUE)
+
+    response = run_order_action(as_admin, "delete_selected", [book_order], post="yes")
+
+    assert response.status_code == HTTP_302_FOUND
+    queued_order.refresh_from_db()
+    assert queued_order.status == OrderStatus.UNPROCESSED
+    assert Book.objects.get(pk=book_order.book.pk).reservation == queued_order.reservation
+    assert not Book.objects.with_stale_counters().exists()
+
+
+def test_order_delete_queryset_in_background(as_admin, admin_user, member, outbox, monkeypatch):
+    monkeypatch.setattr(OrderAdmin, "BACKGROUND_DELETE_THRESHOLD", 1)
+    orders = [mixer.blend(Order, book=book, member=member) for book in mixer.cycle(2).blend(Book)]
+
+    as_admin.cookies.pop("messages", None)  # the client is shared across tests
+
+    response = run_order_action(as_admin, "delete_selected", orders, post="yes")
+
+    assert response.status_code == HTTP_302_FOUND
+    assert Order.objects.count() == 2
+    assert outbox() == [("books/delete_orders", [sorted(order.id for order in orders), admin_user.pk])]
+    assert [str(message) for message in get_messages(response.wsgi_request)] == ["2 orders are being deleted in background, see the task results for progress"]
+
+
+def run_order_action(client, action: str, orders: list[Order], change_reason: str = "", **data):
+    return client.post(
+        reverse("admin:books_order_changelist"),
+        {
+            "action": action,
+            "index": 0,
+            "change_reason": change_reason,
+            "_selected_action": [order.id for order in orders],
+            **data,
+        },
+    )
+
+
+def test_order_process_selected(as_admin, admin_user, member, outbox):
+    orders = [mixer.blend(Order, book=book, member=member) for book in mixer.cycle(3).blend(Book)]
+    queued_order = mixer.blend(Order, book=orders[0].book, status=OrderStatus.IN_QUEUE)
+
+    response = run_order_action(as_admin, "process_selected", [*orders, queued_order], "Picked up in the morning")
+
+    assert response.status_code == HTTP_302_FOUND
+    for order in orders:
+        order.refresh_from_db()
+        assert order.status == OrderStatus.PROCESSED
+        assert order.last_modified_by == admin_user
+        history = order.history.first()
+        assert history.status == OrderStatus.PROCESSED
+        assert history.history_user == admin_user
+        assert history.history_change_reason == "Picked up in the morning"
+    assert Order.objects.get(pk=queued_order.pk).status == OrderStatus.IN_QUEUE
+    assert sorted(outbox()) == [("books/send_reservation_confirmed_email", [order.id, order.reservation_id]) for order in orders]
+
+
+def test_order_refuse_selected(as_admin, admin_user, book_order):
+    queued_orders = mixer.cycle(2).blend(Order, book=book_order.book, member=mixer.sequence(*mixer.cycle(2).blend(Member)), status=OrderStatus.IN_QUEUE)
+
+    response = run_order_action(as_admin, "refuse_selected", [book_order, queued_orders[1]])
+
+    assert response.status_code == HTTP_302_FOUND
+    book_order.refresh_from_db()
+    assert book_order.status == OrderStatus.REFUSED
+    assert book_order.reservation.status == ReservationStatus.REFUSED
+    assert book_order.history.first().history_user == admin_user
+    # the book is passed over to the remaining order in queue
+    book = Book.objects.get(pk=book_order.book.pk)
+    assert book.reservation == Order.objects.get(pk=queued_orders[0].pk).reservation
+    assert book.amount_in_queue == 0
+    assert not Book.objects.with_stale_counters().exists()
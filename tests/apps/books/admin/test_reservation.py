@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.messages import get_messages
+from django.urls import reverse
+from django.utils import timezone
+from mixer.backend.django import mixer
+from rest_framework.status import HTTP_200_OK, HTTP_302_FOUND
+
+from apps.books.const import OrderStatus, ReservationStatus
+from apps.books.models import Book, Order, Reservation
+from apps.users.models import Member
+
+pytestmark = pytest.mark.django_db
+
+
+def run_reservation_action(client, action: str, reservations: list[Reservation]):
+    return client.post(
+        reverse("admin:books_reservation_changelist"),
+        {
+            "action": action,
+            "index": 0,
+            "_selected_action": [reservation.id for reservation in reservations],
+        },
+    )
+
+
+@pytest.fixture
+def reserved_books() -> list[Book]:
+    books = mixer.cycle(3).blend(Book)
+    for book in books:
+        mixer.blend(Order, book=book, member=mixer.blend(Member))
+        book.refresh_from_db()
+    return books
+
+
+def test_reservation_issue_selected(as_admin, reserved_books):
+    completed = mixer.blend(Reservation, status=ReservationStatus.COMPLETED)
+
+    response = run_reservation_action(as_admin, "issue_selected", [book.reservation for book in reserved_books] + [completed])
+
+    assert response.status_code == HTTP_302_FOUND
+    for book in reserved_books:
+        book.reservation.refresh_from_db()
+        assert book.reservation.is_issued
+        assert book.reservation.term == Reservation.get_default_term()
+    completed.refresh_from_db()
+    assert completed.is_completed
+    assert completed.term is None
+    assert str(list(get_messages(response.wsgi_request))[-1]) == "3 reservation(s) issued, 1 skipped"
+
+
+def test_reservation_complete_selected(as_admin, reserved_books, outbox):
+    queued_orders = [mixer.blend(Order, book=book, member=mixer.blend(Member), status=OrderStatus.IN_QUEUE) for book in reserved_books[:2]]
+    reservations = [book.reservation for book in reserved_books]
+    Reservation.objects.update(status=ReservationStatus.ISSUED)
+
+    response = run_reservation_action(as_admin, "complete_selected", reservations)
+
+    assert response.status_code == HTTP_302_FOUND
+    assert not Reservation.objects.filter(pk__in=[reservation.pk for reservation in reservations]).exclude(status=ReservationStatus.COMPLETED).exists()
+    for book, order in zip(reserved_books, queued_orders):
+        book.refresh_from_db()
+        assert book.reservation == Order.objects.get(pk=order.pk).reservation
+    assert Book.objects.get(pk=reserved_books[2].pk).is_available
+    assert sorted(outbox()) == [("books/send_order_created_email", [order.id]) for order in queued_orders]
+    assert not Book.objects.with_stale_counters().exists()
+
+
+def test_reservation_overdue_filter(as_admin):
+    today = timezone.localdate()
+    overdue = mixer.blend(Reservation, status=ReservationStatus.ISSUED, term=today - timedelta(days=3))
+    issued = mixer.blend(Reservation, status=ReservationStatus.ISSUED, term=today)
+    reserved = mixer.blend(Reservation)
+
+    response = as_admin.get(reverse("admin:books_reservation_changelist"), {"overdue": "yes", "o": "6"})
+
+    assert response.status_code == HTTP_200_OK
+    assert list(response.context["cl"].queryset) == [overdue]
+    assert response.context["cl"].queryset.get().days_overdue == 3
+
+    response = as_admin.get(reverse("admin:books_reservation_changelist"), {"overdue": "no"})
+
+    assert set(response.context["cl"].queryset) == {issued, reserved}
@@ -1,20 +1,14 @@
-from unittest.mock import call
-
 import pytest
 from django.db.utils import IntegrityError
 from mixer.backend.django import mixer
 
 from apps.books.const import Language, OrderStatus, ReservationStatus
 from apps.books.models import Author, Book, Order, Publisher, Reservation
+from apps.users.models import Member
 
 pytestmark = pytest.mark.django_db
 
 
-@pytest.fixture
-def mock_send_order_created_email(mocker):
-    return mocker.patch("apps.books.models.book.send_order_created_email")
-
-
 def test_book_str_method():
     book = mixer.blend(Book, title="Test Title")
     assert str(book) == "Test Title"
@@ -134,8 +128,8 @@ def test_not_booked_by_default(book, member):
 
 def test_book_queued_orders(create_book_order, book):
     create_book_order()
-    order_queued_1 = create_book_order(status=OrderStatus.IN_QUEUE)
-    order_queued_2 = create_book_order(status=OrderStatus.IN_QUEUE)
+    order_queued_1 = create_book_order(member=mixer.blend(Member), status=OrderStatus.IN_QUEUE)
+    order_queued_2 = create_book_order(member=mixer.blend(Member), status=OrderStatus.IN_QUEUE)
 
     queued_orders = book.enqueued_orders
 
@@ -155,37 +149,31 @@ def test_book_no_queued_orders(create_book_order, book):
     assert not book.has_enqueued_orders
 
 
-def test_process_orders_in_queue(create_book_order, book, mock_send_order_created_email):
+def test_process_orders_in_queue(create_book_order, book, outbox):
     order = create_book_order()
-    order_queued_1 = create_book_order(status=OrderStatus.IN_QUEUE)
-    order_queued_2 = create_book_order(status=OrderStatus.IN_QUEUE)
+    order_queued_1 = create_book_order(member=mixer.blend(Member), status=OrderStatus.IN_QUEUE)
+    order_queued_2 = create_book_order(member=mixer.blend(Member), status=OrderStatus.IN_QUEUE)
 
     assert book.enqueued_orders.count() == 2
     assert book.reservation == order.reservation
 
-    next_order_1 = book.enqueued_orders.first()
-    book.process_next_order()
-    next_order_1.refresh_from_db()
-    assert next_order_1.id == order_queued_1.id
-    assert book.reservation == next_order_1.reservation
-
-    next_order_2 = book.enqueued_orders.first()
-    book.process_next_order()
-    next_order_2.refresh_from_db()
-    assert next_order_2.id == order_queued_2.id
-    assert book.reservation == next_order_2.reservation
+    for next_order in [order_queued_1, order_queued_2]:
+        book.reservation.status = ReservationStatus.COMPLETED
+        book.reservation.save()
+        next_order.refresh_from_db()
+        assert next_order.status == OrderStatus.UNPROCESSED
+        assert book.reservation == next_order.reservation
 
     assert book.enqueued_orders.count() == 0
-    assert all(o.status == OrderStatus.UNPROCESSED for o in book.orders.all())
+    assert all(o.status == OrderStatus.UNPROCESSED for o in book.orders.exclude(pk=order.pk))
 
     # nothing to do
-    book.process_next_order()
-    assert book.enqueued_orders.count() == 0
+    book.reservation.status = ReservationStatus.COMPLETED
+    book.reservation.save()
+    book.refresh_from_db()
+    assert book.is_available
 
-    mock_send_order_created_email.delay.has_calls(
-        call(next_order_1.id),
-        call(next_order_2.id),
-    )
+    assert outbox() == [("books/send_order_created_email", [order_queued_1.id]), ("books/send_order_created_email", [order_queued_2.id])]
 
 
 def test_book_is_reserved_aka_booked(create_book_order, book, member):
@@ -218,3 +206,59 @@ def test_book_is_booked_by_another_member(book, another_member, member):
     assert book.is_booked_by_member(another_member)
     assert book.reservation_id
     assert not book.reservation_term
+
+
+def test_book_counters_follow_orders(create_book_order, book):
+    order = create_book_order()
+    book.refresh_from_db()
+    assert not book.is_available
+    assert book.amount_in_queue == 0
+
+    order_queued_1 = create_book_order(member=mixer.blend(Member), status=OrderStatus.IN_QUEUE)
+    create_book_order(member=mixer.blend(Member), status=OrderStatus.IN_QUEUE)
+    book.refresh_from_db()
+    assert book.amount_in_queue == 2
+
+    order.reservation.status = ReservationStatus.COMPLETED
+    order.reservation.save()
+    book.refresh_from_db()
+    assert book.amount_in_queue == 1
+    assert not book.is_available
+
+    order_queued_1.refresh_from_db()
+    order_queued_1.cancel()
+    book.refresh_from_db()
+    assert book.amount_in_queue == 0
+    assert not book.is_available
+
+    book.reservation.status = ReservationStatus.COMPLETED
+    book.reservation.save()
+    book.refresh_from_db()
+    assert book.amount_in_queue == 0
+    assert book.is_available
+    assert not Book.objects.with_stale_counters().exists()
+
+
+def test_book_counters_on_delete(create_book_order, book):
+    order = create_book_order()
+    queued_order = create_book_order(member=mixer.blend(Member), status=OrderStatus.IN_QUEUE)
+
+    queued_order.delete()
+    order.delete_reservation()
+    book.refresh_from_db()
+
+    assert book.amount_in_queue == 0
+    assert book.is_available
+    assert not Book.objects.with_stale_counters().exists()
+
+
+def test_book_full_save_keeps_amount_in_queue(create_book_order, book):
+    stale_book = Book.objects.get(pk=book.pk)
+    create_book_order(status=OrderStatus.IN_QUEUE)
+
+    stale_book.title = "New title"
+    stale_book.save()
+    stale_book.refresh_from_db()
+
+    assert stale_book.title == "New title"
+    assert stale_book.amount_in_queue == 1
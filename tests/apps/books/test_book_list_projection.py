@@ -0,0 +1,46 @@
+import json
+
+import pytest
+from mixer.backend.django import mixer
+from rest_framework.test import APIRequestFactory
+
+from apps.books.api.serializers import BookEnqueuedByMemberProjection, BookListProjection
+from apps.books.const import OrderStatus
+from apps.books.models import Book, Order
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def books(member) -> list[Book]:
+    books = mixer.cycle(3).blend(Book, cover=mixer.sequence("books/covers/cover{0}.jpg"))
+    books.append(mixer.blend(Book, cover=""))
+    for book in books:
+        mixer.blend(Order, book=book, status=OrderStatus.UNPROCESSED)
+        mixer.blend(Order, book=book, member=member, status=OrderStatus.IN_QUEUE)
+    return books
+
+
+@pytest.mark.parametrize("projection_class", [BookListProjection, BookEnqueuedByMemberProjection])
+@pytest.mark.parametrize("with_request", [True, False])
+def test_projection_matches_serializer(books, member, projection_class, with_request):
+    context = {"request": APIRequestFactory().get("/api/v1/books/")} if with_request else {}
+    queryset = Book.objects.with_author().with_queue_position(member).order_by("id")
+
+    expected = projection_class.serializer_class(queryset, many=True, context=context).data
+    projection = projection_class(context)
+    data = projection.serialize(projection.project(queryset))
+
+    assert json.dumps(data) == json.dumps(expected)
+    assert any(book["cover_image_url"] is None for book in data)
+
+
+def test_projection_matches_serializer_for_remote_storage(books, mocker):
+    context = {"request": APIRequestFactory().get("/api/v1/books/")}
+    queryset = Book.objects.with_author().order_by("id")
+    mocker.patch.object(BookListProjection, "get_cover_url_prefix", return_value=None)
+
+    expected = BookListProjection.serializer_class(queryset, many=True, context=context).data
+    projection = BookListProjection(context)
+
+    assert json.dumps(projection.serialize(projection.project(queryset))) == json.dumps(expected)
@@ -67,3 +67,17 @@ class TestBookQuerySet:
             assert book in member1_queryset
         for book in member2_books:
             assert book not in member1_queryset
+
+    def test_recount_counters(self):
+        book = mixer.blend(Book)
+        stale_book = mixer.blend(Book)
+        Book.objects.filter(pk=stale_book.pk).update(amount_in_queue=3, is_available=False)
+
+        assert list(Book.objects.with_stale_counters()) == [stale_book]
+        assert Book.objects.recount_counters() == 1
+
+        stale_book.refresh_from_db()
+        assert stale_book.amount_in_queue == 0
+        assert stale_book.is_available
+        assert not Book.objects.with_stale_counters().exists()
+        assert book.amount_in_queue == 0
@@ -0,0 +1,85 @@
+import pytest
+from django.db import connection
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from apps.books.models import Author, Book
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(connection.vendor != "postgresql", reason="Full-text search requires PostgreSQL"),
+]
+
+
+@pytest.fixture
+def author():
+    return mixer.blend(Author, first_name="Rainis", last_name="Pliekšāns")
+
+
+def test_search_vector_populated_on_create(author):
+    book = mixer.blend(Book, title="Uguns un nakts", author=author)
+
+    assert Book.objects.search("nakts").get() == book
+    assert Book.objects.search("Rainis").get() == book
+
+
+def test_search_vector_updated_on_title_change(author):
+    book = mixer.blend(Book, title="Uguns un nakts", author=author)
+
+    book.title = "Zelta zirgs"
+    book.save()
+
+    assert not Book.objects.search("nakts").exists()
+    assert Book.objects.search("zirgs").get() == book
+
+
+def test_search_vector_not_updated_on_unrelated_fields_change(author, django_assert_num_queries):
+    book = mixer.blend(Book, title="Uguns un nakts", author=author)
+
+    with django_assert_num_queries(1):
+        book.save(update_fields=["pages"])
+
+
+def test_search_vector_updated_on_author_change(author):
+    books = mixer.cycle(2).blend(Book, author=author)
+
+    author.first_name = "Jānis"
+    author.save()
+
+    assert set(Book.objects.search("Jānis")) == set(books)
+    assert not Book.objects.search("Rainis").exists()
+
+
+def test_title_match_ranked_above_author_match():
+    by_author = mixer.blend(Book, title="Mērnieku laiki", author=mixer.blend(Author, first_name="Kaudzīte"))
+    by_title = mixer.blend(Book, title="Kaudzīte", author=mixer.blend(Author, first_name="Matīss"))
+
+    assert list(Book.objects.search("Kaudzīte")) == [by_title, by_author]
+
+
+def test_books_list_view_uses_full_text_search(client, author):
+    book = mixer.blend(Book, title="Uguns un nakts", author=author)
+    mixer.blend(Book, title="Zelta zirgs")
+
+    response = client.get(reverse("books-list"), {"q": "pliekšāns nakts"})
+
+    assert [item["id"] for item in response.data] == [book.id]
+
+
+@pytest.mark.parametrize("projection", [False, True])
+def test_books_list_view_paginates_search_by_rank(client, settings, projection):
+    settings.BOOKS_LIST_PROJECTION = projection
+    by_title = mixer.cycle(3).blend(Book, title=mixer.sequence("Kaudzīte {0}"), author=mixer.blend(Author, first_name="Matīss"))
+    by_author = mixer.cycle(3).blend(Book, title=mixer.sequence("Mērnieku laiki {0}"), author=mixer.blend(Author, first_name="Kaudzīte"))
+    # recently modified books would come first in catalogue order
+    for book in by_author:
+        book.save()
+
+    first_page = client.get(reverse("books-list"), {"q": "Kaudzīte", "limit": 4}).data
+    second_page = client.get(first_page["next"]).data
+    previous_page = client.get(second_page["previous"]).data
+
+    ids = [item["id"] for item in first_page["results"] + second_page["results"]]
+    assert ids == [book.id for book in reversed(by_title)] + [book.id for book in reversed(by_author)]
+    assert second_page["next"] is None
+    assert previous_page["results"] == first_page["results"]
@@ -0,0 +1,71 @@
+import pytest
+from django.core.cache import cache
+from mixer.backend.django import mixer
+
+from apps.books.cache import CATALOGUE_VERSION_KEY, ResponseCache, bump_catalogue_version, get_catalogue_modified_at, get_catalogue_version
+from apps.books.models import Author, Book, Order, Publisher
+
+pytestmark = pytest.mark.django_db
+
+
+def test_catalogue_version_is_stable():
+    assert get_catalogue_version() == get_catalogue_version()
+
+
+def test_catalogue_version_bumped():
+    version = get_catalogue_version()
+
+    bump_catalogue_version()
+
+    assert get_catalogue_version() > version
+
+
+def test_catalogue_version_not_repeated_after_cache_cleared():
+    version = get_catalogue_version()
+    bump_catalogue_version()
+
+    cache.delete(CATALOGUE_VERSION_KEY)
+
+    assert get_catalogue_version() > version + 1
+
+
+@pytest.mark.freeze_time("2024-07-01 12:00:00")
+def test_catalogue_modified_at_moves_forward_within_a_second():
+    modified_at = get_catalogue_modified_at()
+
+    bump_catalogue_version()
+
+    assert get_catalogue_modified_at() > modified_at
+
+
+def test_catalogue_version_bumped_on_commit(django_capture_on_commit_callbacks):
+    version = get_catalogue_version()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        bump_catalogue_version()
+
+    assert get_catalogue_version() == version + 2
+
+
+@pytest.mark.parametrize("model", [Book, Author, Publisher, Order])
+def test_catalogue_version_bumped_on_save_and_delete(model):
+    instance = mixer.blend(model)
+    version = get_catalogue_version()
+
+    instance.save()
+    assert get_catalogue_version() > version
+
+    version = get_catalogue_version()
+    instance.delete()
+    assert get_catalogue_version() > version
+
+
+def test_response_cache_counts_hits_and_misses():
+    response_cache = ResponseCache("test")
+
+    assert response_cache.get("test-key") is None
+    response_cache.set("test-key", {"id": 1})
+    assert response_cache.get("test-key") == {"id": 1}
+    assert response_cache.get("test-key") == {"id": 1}
+
+    assert ResponseCache.stats() == {"hits": 2, "misses": 1}
@@ -0,0 +1,108 @@
+import threading
+from datetime import timedelta
+
+import pytest
+from django.db import connection, transaction
+from django.utils import timezone
+from mixer.backend.django import mixer
+
+from apps.books.const import OrderStatus, ReservationStatus
+from apps.books.models import Book, Order, Reservation
+from apps.books.services import OrderService
+from apps.tasks import expire_uncollected_reservations, send_reservation_expired_emails
+from apps.users.models import Member
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def _pickup_days(settings):
+    settings.RESERVATION_PICKUP_DAYS = 3
+
+
+def create_reserved_books(amount: int, reserved_days_ago: int) -> list[Book]:
+    books = mixer.cycle(amount).blend(Book)
+    for book in books:
+        mixer.blend(Order, book=book, member=mixer.blend(Member))
+    Reservation.objects.filter(book__in=books).update(created_at=timezone.now() - timedelta(days=reserved_days_ago))
+    return books
+
+
+def test_expire_uncollected_reservations(outbox):
+    expired_books = create_reserved_books(3, reserved_days_ago=4)
+    fresh_books = create_reserved_books(1, reserved_days_ago=2)
+    expired_reservations = list(Reservation.objects.filter(book__in=expired_books).order_by("pk"))
+    queued_order = mixer.blend(Order, book=expired_books[0], member=mixer.blend(Member), status=OrderStatus.IN_QUEUE)
+    issued = mixer.blend(Reservation, status=ReservationStatus.ISSUED)
+    Reservation.objects.filter(pk=issued.pk).update(created_at=timezone.now() - timedelta(days=30))
+
+    assert expire_uncollected_reservations(batch_size=2) == {"expired": 3}
+
+    assert not Reservation.objects.filter(pk__in=[reservation.pk for reservation in expired_reservations]).exclude(status=ReservationStatus.CANCELLED).exists()
+    assert Reservation.objects.get(pk=issued.pk).is_issued
+    assert Book.objects.get(pk=fresh_books[0].pk).reservation.is_reserved
+    queued_order.refresh_from_db()
+    assert queued_order.status == OrderStatus.UNPROCESSED
+    assert Book.objects.get(pk=expired_books[0].pk).reservation == queued_order.reservation
+    assert all(book.is_available for book in Book.objects.filter(pk__in=[book.pk for book in expired_books[1:]]))
+    expired_orders = Order.objects.filter(reservation__in=expired_reservations)
+    assert {(order.status, order.change_reason) for order in expired_orders} == {(OrderStatus.MEMBER_CANCELLED, "Reservation not collected")}
+    assert [message for message in outbox() if message[0] == "books/send_reservation_expired_emails"] == [
+        ("books/send_reservation_expired_emails", [[reservation.pk for reservation in expired_reservations[:2]]]),
+        ("books/send_reservation_expired_emails", [[expired_reservations[2].pk]]),
+    ]
+    assert expire_uncollected_reservations() == {"expired": 0}
+
+
+def test_member_can_order_again_after_expiry():
+    book, queued_book = create_reserved_books(2, reserved_days_ago=4)
+    member, queued_book_member = (Order.objects.get(book=book).member, Order.objects.get(book=queued_book).member)
+    mixer.blend(Order, book=queued_book, member=mixer.blend(Member), status=OrderStatus.IN_QUEUE)
+
+    expire_uncollected_reservations()
+
+    assert OrderService.place(book.pk, member).status == OrderStatus.UNPROCESSED
+    # the book went to the next member in queue
+    assert OrderService.place(queued_book.pk, queued_book_member).status == OrderStatus.IN_QUEUE
+
+
+def test_send_reservation_expired_emails(mocker):
+    send_bulk_templated_email = mocker.patch("apps.tasks.Mailer.send_bulk_templated_email", side_effect=lambda messages, template: len(messages))
+    books = create_reserved_books(2, reserved_days_ago=4)
+    reservation_ids = list(Reservation.objects.filter(book__in=books).values_list("pk", flat=True))
+    expire_uncollected_reservations()
+
+    assert send_reservation_expired_emails(reservation_ids) == {"sent": 2, "messages_amount": 2}
+
+    messages = send_bulk_templated_email.call_args.args[0]
+    assert {message.template_data["book_title"] for message in messages} == {book.title for book in books}
+    assert send_bulk_templated_email.call_args.kwargs == {"template": "MemberReservationExpired"}
+
+
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="Row locks require PostgreSQL")
+@pytest.mark.django_db(transaction=True)
+def test_expiry_skips_locked_reservations():
+    books = create_reserved_books(2, reserved_days_ago=4)
+    locked, unlocked = Reservation.objects.filter(book__in=books).order_by("pk")
+    is_locked, release = threading.Event(), threading.Event()
+
+    def hold_lock() -> None:
+        try:
+            with transaction.atomic():
+                Reservation.objects.select_for_update().get(pk=locked.pk)
+                is_locked.set()
+                release.wait(timeout=10)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=hold_lock)
+    thread.start()
+    is_locked.wait(timeout=10)
+    try:
+        assert expire_uncollected_reservations() == {"expired": 1}
+    finally:
+        release.set()
+        thread.join()
+
+    assert Reservation.objects.get(pk=locked.pk).is_reserved
+    assert Reservation.objects.get(pk=unlocked.pk).status == ReservationStatus.CANCELLED
@@ -0,0 +1,62 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+from mixer.backend.django import mixer
+
+from apps.books.const import ReservationStatus
+from apps.books.fees import LateFeeService, Tariff
+from apps.books.models import MemberFee, Reservation
+from apps.tasks import compute_late_fees
+from apps.users.models import Member
+
+pytestmark = pytest.mark.django_db
+
+today = date(2024, 7, 31)
+tariff = Tariff(grace_days=2, daily_rate=Decimal("0.25"), cap=Decimal("5.00"))
+
+
+def create_reservation(member: Member, days_overdue: int, status: str = ReservationStatus.ISSUED) -> Reservation:
+    return mixer.blend(Reservation, member=member, status=status, term=today - timedelta(days=days_overdue))
+
+
+@pytest.mark.parametrize(("days_overdue", "fee"), [(0, "0"), (2, "0"), (3, "0.25"), (10, "2.00"), (100, "5.00")])
+def test_tariff_fee(days_overdue, fee):
+    assert tariff.fee(days_overdue) == Decimal(fee)
+
+
+def test_compute_member_fees(member, another_member):
+    overdue_days = [3, 10, 100, 2]
+    for days in overdue_days:
+        create_reservation(member, days)
+    create_reservation(member, 50, status=ReservationStatus.COMPLETED)
+    create_reservation(another_member, 1)
+    create_reservation(mixer.blend(Member), 7)
+
+    assert LateFeeService.compute(tariff, today) == 2
+
+    fee = MemberFee.objects.get(member=member)
+    assert fee.amount == sum(tariff.fee(days) for days in overdue_days) == Decimal("7.25")
+    assert fee.overdue_reservations == 3
+    assert not MemberFee.objects.filter(member=another_member).exists()
+
+
+def test_compute_updates_ledger(member, another_member):
+    reservation = create_reservation(member, 4)
+    create_reservation(another_member, 4)
+    LateFeeService.compute(tariff, today)
+
+    Reservation.objects.filter(pk=reservation.pk).update(status=ReservationStatus.COMPLETED)
+    assert LateFeeService.compute(tariff, today + timedelta(days=1)) == 1
+
+    assert list(MemberFee.objects.values_list("member", "amount")) == [(another_member.pk, Decimal("0.75"))]
+
+
+def test_compute_late_fees_task(member, settings):
+    settings.LATE_FEE_GRACE_DAYS = 0
+    settings.LATE_FEE_DAILY_RATE = "1.50"
+    mixer.blend(Reservation, member=member, status=ReservationStatus.ISSUED, term=timezone.localdate() - timedelta(days=2))
+
+    assert compute_late_fees() == {"charged": 1}
+    assert MemberFee.objects.get(member=member).amount == Decimal("3.00")
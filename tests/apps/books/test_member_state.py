@@ -0,0 +1,55 @@
+import pytest
+from mixer.backend.django import mixer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.books.const import OrderStatus, ReservationStatus
+from apps.books.member_state import MemberLibraryState
+from apps.books.models import Book, Order, Reservation
+
+pytestmark = pytest.mark.django_db
+
+
+def test_loaded_with_two_queries(member, member_reservation, reservation_extension, django_assert_num_queries):
+    enqueued_book = mixer.blend(Book)
+    mixer.blend(Order, book=enqueued_book, status=OrderStatus.PROCESSED)
+    mixer.blend(Order, book=enqueued_book, member=member, status=OrderStatus.IN_QUEUE)
+    state = MemberLibraryState(member)
+
+    with django_assert_num_queries(2):
+        assert state.is_issued_to_member(member_reservation.book.id)
+        assert not state.is_reserved_by_member(member_reservation.book.id)
+        assert state.has_requested_extension(member_reservation.book.id)
+        assert not state.is_reservation_extendable(member_reservation.book.id)
+        assert state.is_enqueued_by_member(enqueued_book.id)
+        assert not state.is_enqueued_by_member(member_reservation.book.id)
+        assert not state.is_max_reservations_reached
+
+
+def test_extendable_reservation(member, member_reservation):
+    state = MemberLibraryState(member)
+
+    assert state.is_reservation_extendable(member_reservation.book.id)
+    assert state.get_reservation(member_reservation.book.id).extensions_count == 0
+
+
+def test_ignores_done_and_other_members_reservations(member, another_member):
+    for status, reservation_member in [(ReservationStatus.COMPLETED, member), (ReservationStatus.RESERVED, another_member)]:
+        book = mixer.blend(Book)
+        book.reservation = mixer.blend(Reservation, status=status, member=reservation_member)
+        book.save()
+
+    assert MemberLibraryState(member).reservations == []
+
+
+def test_max_reservations_reached(member):
+    mixer.cycle(Reservation.MAX_RESERVATIONS_PER_MEMBER).blend(Reservation, member=member, status=ReservationStatus.RESERVED)
+
+    assert MemberLibraryState(member).is_max_reservations_reached
+
+
+def test_cached_on_request(member):
+    request = Request(APIRequestFactory().get("/"))
+    request.user = member
+
+    assert MemberLibraryState.for_request(request) is MemberLibraryState.for_request(request)
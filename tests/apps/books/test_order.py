@@ -1,4 +1,5 @@
 import pytest
+from django.db import IntegrityError, transaction
 from mixer.backend.django import mixer
 
 from apps.books.const import OrderStatus, ReservationStatus
@@ -7,11 +8,6 @@ from apps.books.models import Book, Order, Reservation
 pytestmark = pytest.mark.django_db
 
 
-@pytest.fixture
-def mock_send_reservation_confirmed_email(mocker):
-    return mocker.patch("apps.books.models.book.send_reservation_confirmed_email")
-
-
 def test_order_str_method():
     order = mixer.blend(Order)
 
@@ -45,17 +41,25 @@ def test_reservation_created_on_save():
 def test_orders_processable(create_book_order, book, member, another_member):
     create_book_order(status=OrderStatus.PROCESSED)
     create_book_order(status=OrderStatus.IN_QUEUE)
-    create_book_order(status=OrderStatus.UNPROCESSED)
     create_book_order(status=OrderStatus.MEMBER_CANCELLED)
     create_book_order(status=OrderStatus.REFUSED)
 
     create_book_order(member=another_member, status=OrderStatus.MEMBER_CANCELLED)
     create_book_order(member=another_member, status=OrderStatus.REFUSED)
 
-    assert Order.objects.processable(book.id, member.id).count() == 2
+    assert Order.objects.processable(book.id, member.id).count() == 1
     assert Order.objects.processable(book.id, another_member.id).count() == 0
 
 
+def test_single_processable_order_per_member_and_book(create_book_order, another_member):
+    create_book_order(status=OrderStatus.PROCESSED)
+    create_book_order(status=OrderStatus.IN_QUEUE)
+    create_book_order(member=another_member, status=OrderStatus.IN_QUEUE)
+
+    with pytest.raises(IntegrityError), transaction.atomic():
+        create_book_order(status=OrderStatus.UNPROCESSED)
+
+
 def test_cancel_order(create_book_order):
     order = create_book_order(status=OrderStatus.IN_QUEUE)
 
@@ -75,10 +79,10 @@ def test_reservation_deleted_through_order(create_book_order):
     assert Reservation.objects.reserved_by_member(order.member_id).count() == 0
 
 
-def test_reservation_confirmation(create_book_order, mock_send_reservation_confirmed_email):
+def test_reservation_confirmation(create_book_order, outbox):
     order = create_book_order(status=OrderStatus.UNPROCESSED)
 
-    mock_send_reservation_confirmed_email.delay.assert_not_called()
+    assert outbox() == []
 
     order.status = OrderStatus.PROCESSED
     order.save()
@@ -86,7 +90,7 @@ def test_reservation_confirmation(create_book_order, mock_send_reservation_confi
     # ensure status change not triggered
     order.save()
 
-    mock_send_reservation_confirmed_email.delay.assert_called_once_with(order.pk, order.reservation.pk)
+    assert outbox() == [("books/send_reservation_confirmed_email", [order.pk, order.reservation.pk])]
 
 
 def test_refused_order_refuses_reservation(book_order):
@@ -96,3 +100,17 @@ def test_refused_order_refuses_reservation(book_order):
     book_order.save()
 
     assert book_order.reservation.status == ReservationStatus.REFUSED
+
+
+def test_orders_queue_position(create_book_order, book, member, another_member):
+    create_book_order(status=OrderStatus.PROCESSED)
+    first = create_book_order(member=another_member, status=OrderStatus.IN_QUEUE)
+    second = create_book_order(status=OrderStatus.IN_QUEUE)
+    other_book_order = create_book_order(book=mixer.blend(Book), status=OrderStatus.IN_QUEUE)
+
+    positions = dict(Order.objects.with_queue_position().values_list("pk", "queue_position"))
+    member_positions = dict(Order.objects.with_queue_position(member).values_list("pk", "queue_position"))
+
+    assert positions == {first.pk: 1, second.pk: 2, other_book_order.pk: 1}
+    assert member_positions == {second.pk: 2, other_book_order.pk: 1}
+    assert list(book.enqueued_orders) == [first, second]
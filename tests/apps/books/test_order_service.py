@@ -0,0 +1,153 @@
+import inspect
+import threading
+
+import pytest
+from django.db import connection
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import mixer
+
+from apps.books.const import OrderStatus
+from apps.books.models import Book, Order, Reservation
+from apps.books.models.book import ReservationExtension
+from apps.books.services import OrderPlacementError, OrderService
+from apps.tasks import delete_orders
+from apps.users.models import Member
+
+pytestmark = pytest.mark.django_db
+
+
+def test_place_reserves_available_book(book, member, outbox):
+    order = OrderService.place(book.id, member)
+
+    book.refresh_from_db()
+    assert order.status == OrderStatus.UNPROCESSED
+    assert book.reservation == order.reservation
+    assert not book.is_available
+    assert outbox() == [("books/send_order_created_email", [order.id])]
+
+
+def test_place_enqueues_reserved_book(book_order, another_member, outbox):
+    order = OrderService.place(book_order.book.id, another_member)
+
+    assert order.status == OrderStatus.IN_QUEUE
+    assert Book.objects.get(pk=book_order.book.id).amount_in_queue == 1
+    assert outbox() == []
+
+
+def test_place_unknown_book(member):
+    with pytest.raises(Book.DoesNotExist):
+        OrderService.place(0, member)
+
+
+@pytest.mark.parametrize(
+    "setup, message",
+    [
+        (lambda book, member: mixer.cycle(Reservation.MAX_RESERVATIONS_PER_MEMBER).blend(Order, member=member), "Maximum number of reservations reached"),
+        (lambda book, member: mixer.blend(Order, book=book, member=member), "Book is already ordered or your order is in queue"),
+        (
+            lambda book, member: mixer.cycle(Order.MAX_QUEUED_ORDERS_ALLOWED + 1).blend(Order, book=book, status=OrderStatus.IN_QUEUE),
+            "Maximum number of orders in queue reached",
+        ),
+    ],
+)
+def test_place_not_allowed(book, member, setup, message):
+    setup(book, member)
+    orders_count = Order.objects.count()
+
+    with pytest.raises(OrderPlacementError, match=message):
+        OrderService.place(book.id, member)
+
+    assert Order.objects.count() == orders_count
+
+
+def test_place_in_full_queue_already_enqueued(book, member):
+    mixer.cycle(Order.MAX_QUEUED_ORDERS_ALLOWED - 1).blend(Order, book=book, status=OrderStatus.IN_QUEUE)
+    mixer.blend(Order, book=book, member=member, status=OrderStatus.IN_QUEUE)
+
+    with pytest.raises(OrderPlacementError, match="Book is already ordered or your order is in queue"):
+        OrderService.place(book.id, member)
+
+    assert Order.objects.filter(book=book).count() == Order.MAX_QUEUED_ORDERS_ALLOWED
+
+
+def test_place_checks_in_single_query_after_locks(book_order, another_member, django_assert_num_queries):
+    # member lock, book lock, limits, order and its history inserts, queue counter, 2 savepoints and their releases
+    with django_assert_num_queries(10):
+        OrderService.place(book_order.book.id, another_member)
+
+
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="Row locks require PostgreSQL")
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_placements_never_reserve_twice():
+    book = mixer.blend(Book)
+    members = mixer.cycle(Order.MAX_QUEUED_ORDERS_ALLOWED + 2).blend(Member)
+    # every member also double clicks
+    placements = members + members
+    barrier = threading.Barrier(len(placements))
+    errors: list[str] = []
+
+    def place(member: Member) -> None:
+        try:
+            barrier.wait()
+            OrderService.place(book.id, member)
+        except OrderPlacementError as e:
+            errors.append(str(e))
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=place, args=(member,)) for member in placements]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    book.refresh_from_db()
+    assert Reservation.objects.filter(book=book).count() == 1
+    assert Order.objects.filter(book=book, status=OrderStatus.UNPROCESSED).count() == 1
+    assert book.amount_in_queue == Order.MAX_QUEUED_ORDERS_ALLOWED == Order.objects.filter(book=book, status=OrderStatus.IN_QUEUE).count()
+    # repeated orders hit the full queue or the constraint, depending on which placement comes first
+    assert set(errors) <= {"Book is already ordered or your order is in queue", "Maximum number of orders in queue reached"}
+    assert len(errors) == len(placements) - Order.objects.filter(book=book).count()
+    assert Order.objects.filter(book=book).values("member").distinct().count() == Order.objects.filter(book=book).count()
+
+
+@pytest.mark.parametrize("action", [OrderService.process, OrderService.refuse])
+def test_bulk_actions_with_fixed_queries(action, admin_user):
+    def count_queries(amount: int) -> int:
+        orders = [mixer.blend(Order, book=book, member=mixer.blend(Member)) for book in mixer.cycle(amount).blend(Book)]
+        for order in orders:
+            mixer.blend(Order, book=order.book, member=mixer.blend(Member), status=OrderStatus.IN_QUEUE)
+        with CaptureQueriesContext(connection) as context:
+            assert len(action(Order.objects.filter(pk__in=[order.pk for order in orders]), admin_user)) == amount
+        return len(context.captured_queries)
+
+    assert count_queries(1) == count_queries(10)
+    assert not Book.objects.with_stale_counters().exists()
+
+
+def test_delete_in_batches(admin_user):
+    orders = [mixer.blend(Order, book=book, member=mixer.blend(Member)) for book in mixer.cycle(8).blend(Book)]
+    mixer.blend(ReservationExtension, reservation=orders[0].reservation)
+
+    def count_queries(orders: list[Order], batch_size: int) -> int:
+        with CaptureQueriesContext(connection) as context:
+            assert sum(OrderService.delete_in_batches([order.pk for order in orders], admin_user, batch_size=batch_size)) == len(orders)
+        return len(context.captured_queries)
+
+    # same queries for each batch
+    assert count_queries(orders[:4], batch_size=4) * 2 == count_queries(orders[4:], batch_size=2)
+    assert not Order.objects.exists()
+    assert not Reservation.objects.exists()
+    assert not ReservationExtension.objects.exists()
+    assert Order.history.filter(history_type="-", history_user=admin_user).count() == len(orders)
+
+
+def test_delete_orders_task(admin_user, book_order):
+    assert delete_orders.delay([book_order.pk, 0], admin_user.pk).get() == {"deleted": 1, "total": 2}
+    assert not Order.objects.exists()
+
+
+def test_raw_delete_is_available():
+    # `OrderService._raw_delete` relies on this private Django API
+    assert list(inspect.signature(QuerySet._raw_delete).parameters) == ["self", "using"]
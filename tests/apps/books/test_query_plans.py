@@ -0,0 +1,122 @@
+import pytest
+from django.db import connection
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from apps.books.const import OrderStatus, ReservationExtensionStatus, ReservationStatus
+from apps.books.models import Book, Order, Reservation
+from apps.books.models.book import ReservationExtension
+from apps.books.suggestions import BookSuggestions
+from apps.users.models import Member
+
+pytestmark = pytest.mark.django_db
+
+HISTORY_ROWS = 1000
+MEMBERS = BOOKS = 50
+
+
+@pytest.fixture(autouse=True)
+def _realistic_history(book, member):
+    if connection.vendor != "postgresql":
+        return
+
+    # tiny tables make all plans cost alike, so the plan would depend on statistics left by autoanalyze
+    # after earlier tests, closed history spread over many members and books and short queues
+    # give the planner the row counts it sees in production
+    members = [member, *Member.objects.bulk_create(Member(username=f"history{i}", email=f"history{i}@example.com", is_member=True) for i in range(1, MEMBERS))]
+    books = [
+        book,
+        *Book.objects.bulk_create(
+            Book(
+                title=f"History {i}",
+                isbn=f"{i:013}",
+                author=book.author,
+                publisher=book.publisher,
+                language=book.language,
+                published_at=book.published_at,
+                pages=book.pages,
+            )
+            for i in range(1, BOOKS)
+        ),
+    ]
+    reservations = Reservation.objects.bulk_create(Reservation(member=members[i % MEMBERS], status=ReservationStatus.COMPLETED) for i in range(HISTORY_ROWS))
+    Order.objects.bulk_create(
+        Order(member=reservation.member, book=books[i // MEMBERS % BOOKS], status=OrderStatus.PROCESSED, reservation=reservation)
+        for i, reservation in enumerate(reservations)
+    )
+    Order.objects.bulk_create(
+        [
+            *(Order(member=members[i], book=book, status=OrderStatus.IN_QUEUE) for i in range(1, Order.MAX_QUEUED_ORDERS_ALLOWED + 1)),
+            *(Order(member=members[i], book=books[i], status=OrderStatus.UNPROCESSED) for i in range(1, MEMBERS)),
+        ]
+    )
+    ReservationExtension.objects.bulk_create(
+        ReservationExtension(reservation=reservation, status=ReservationExtensionStatus.APPROVED) for reservation in reservations
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {Order._meta.db_table}, {Reservation._meta.db_table}, {ReservationExtension._meta.db_table}")
+
+
+@pytest.fixture
+def _without_seqscan():
+    # a handful of books and authors fit a single page, where a sequential scan is always cheapest
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+
+
+def assert_uses_index(queryset: QuerySet, index_name: str) -> None:
+    plan = queryset.explain()
+    assert index_name in plan, plan
+
+
+def test_book_enqueued_orders(book):
+    assert_uses_index(book.enqueued_orders, "order_book_queue_idx")
+
+
+def test_orders_queue_position(book):
+    assert_uses_index(Order.objects.filter(book=book).with_queue_position(), "order_book_queue_idx")
+
+
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="SQLite does not match partial indexes to IN lookups")
+def test_orders_processable(book, member):
+    # the existence check of `OrderService.place` matches the condition of the unique constraint
+    assert_uses_index(Order.objects.processable(book, member).order_by(), "order_unique_processable_per_member")
+
+
+def test_orders_enqueued_by_member(member):
+    assert_uses_index(Order.objects.enqueued_by_member(member).order_by(), "order_member_status_idx")
+
+
+def test_reservations_reserved_by_member(member):
+    # counted in `OrderService.place`, so unordered and the created_at index is no candidate
+    assert_uses_index(Reservation.objects.reserved_by_member(member).order_by(), "reservation_member_status_idx")
+
+
+def test_reservations_issued_due_on():
+    # a handful of rows per day, the reminders are sent regardless of order
+    assert_uses_index(Reservation.objects.issued_due_on(timezone.localdate()).order_by(), "reservation_issued_term_idx")
+
+
+def test_reservations_overdue():
+    assert_uses_index(Reservation.objects.overdue().order_by("term", "id"), "reservation_issued_term_idx")
+
+
+def test_reservations_uncollected():
+    assert_uses_index(Reservation.objects.uncollected(timezone.now()), "reservation_pickup_idx")
+
+
+def test_reservations_with_extensions(book, member):
+    # as looked up by the book extension endpoint
+    assert_uses_index(Reservation.objects.with_extensions().filter(book=book, member=member), "reservationext_status_idx")
+
+
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="Trigram indexes require PostgreSQL")
+@pytest.mark.usefixtures("_without_seqscan")
+def test_suggestion_title_candidates():
+    assert_uses_index(BookSuggestions(limit=5).title_candidates("lord").order_by(), "book_title_trgm_idx")
+
+
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="Trigram indexes require PostgreSQL")
+@pytest.mark.usefixtures("_without_seqscan")
+def test_suggestion_author_candidates():
+    assert_uses_index(BookSuggestions(limit=5).author_candidates("conr").order_by(), "author_full_name_trgm_idx")
@@ -0,0 +1,92 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import mixer
+
+from apps.books.const import OrderStatus, ReservationStatus
+from apps.books.models import Book, Order, Reservation
+from apps.books.services import QueuePromotionService
+from apps.tasks import promote_stuck_queues
+from apps.users.models import Member
+
+pytestmark = pytest.mark.django_db
+
+
+def create_books_with_queues(amount: int, queue_length: int = 2) -> list[Book]:
+    books = mixer.cycle(amount).blend(Book)
+    for book in books:
+        mixer.blend(Order, book=book, member=mixer.blend(Member))
+        for member in mixer.cycle(queue_length).blend(Member):
+            mixer.blend(Order, book=book, member=member, status=OrderStatus.IN_QUEUE)
+    return books
+
+
+def complete_reservations(books: list[Book]) -> None:
+    # finished in bulk, bypassing `Reservation.save`
+    Reservation.objects.filter(book__in=books).update(status=ReservationStatus.COMPLETED)
+
+
+def test_promote_first_enqueued_order(outbox):
+    book = create_books_with_queues(1)[0]
+    first, second = book.enqueued_orders
+    complete_reservations([book])
+
+    assert QueuePromotionService.promote([book.pk]) == [first]
+
+    book.refresh_from_db()
+    first.refresh_from_db()
+    assert first.status == OrderStatus.UNPROCESSED
+    assert first.reservation.member == first.member
+    assert first.reservation.status == ReservationStatus.RESERVED
+    assert book.reservation == first.reservation
+    assert not book.is_available
+    assert list(book.enqueued_orders) == [second]
+    assert first.history.first().status == OrderStatus.UNPROCESSED
+    assert not Book.objects.with_stale_counters().exists()
+    assert outbox() == [("books/send_order_created_email", [first.id])]
+
+
+def test_promote_is_idempotent(book_order):
+    queued_order = mixer.blend(Order, book=book_order.book, member=mixer.blend(Member), status=OrderStatus.IN_QUEUE)
+
+    # book is still reserved
+    assert QueuePromotionService.promote([book_order.book.pk]) == []
+
+    complete_reservations([book_order.book])
+    assert QueuePromotionService.promote([book_order.book.pk]) == [queued_order]
+    assert QueuePromotionService.promote([book_order.book.pk]) == []
+    assert Reservation.objects.filter(status=ReservationStatus.RESERVED).get() == Book.objects.get(pk=book_order.book.pk).reservation
+
+
+def test_promote_releases_book_without_queue(book_order):
+    complete_reservations([book_order.book])
+
+    assert QueuePromotionService.promote([book_order.book.pk]) == []
+
+    book_order.book.refresh_from_db()
+    assert book_order.book.is_available
+    assert book_order.book.reservation is None
+
+
+def test_promote_many_books_with_fixed_queries():
+    def count_queries(amount: int) -> int:
+        books = create_books_with_queues(amount)
+        complete_reservations(books)
+        with CaptureQueriesContext(connection) as context:
+            assert len(QueuePromotionService.promote([book.pk for book in books])) == amount
+        return len(context.captured_queries)
+
+    assert count_queries(1) == count_queries(20)
+    assert not Book.objects.with_stale_counters().exists()
+
+
+def test_promote_stuck_queues():
+    books = create_books_with_queues(3)
+    complete_reservations(books[:2])
+    available_book = mixer.blend(Book)
+
+    assert set(Book.objects.with_stuck_queue()) == set(books[:2])
+    assert promote_stuck_queues(batch_size=1) == {"books": 2, "promoted": 2}
+    assert not Book.objects.with_stuck_queue().exists()
+    assert promote_stuck_queues() == {"books": 0, "promoted": 0}
+    assert Book.objects.get(pk=available_book.pk).is_available
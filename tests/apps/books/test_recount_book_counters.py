@@ -0,0 +1,34 @@
+import pytest
+from django.core.management import CommandError, call_command
+from mixer.backend.django import mixer
+
+from apps.books.models import Book
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def stale_book() -> Book:
+    book = mixer.blend(Book)
+    Book.objects.filter(pk=book.pk).update(amount_in_queue=2)
+    return book
+
+
+def test_check_passes(book, capsys):
+    call_command("recount_book_counters", "--check")
+
+    assert "All book counters are up to date" in capsys.readouterr().out
+
+
+def test_check_fails_on_stale_counters(stale_book):
+    with pytest.raises(CommandError, match=f"Stale counters found for 1 book\\(s\\): {stale_book.pk}"):
+        call_command("recount_book_counters", "--check")
+
+
+def test_recount_fixes_stale_counters(stale_book, capsys):
+    call_command("recount_book_counters")
+
+    stale_book.refresh_from_db()
+    assert stale_book.amount_in_queue == 0
+    assert "Fixed counters for 1 book(s)" in capsys.readouterr().out
+    call_command("recount_book_counters", "--check")
@@ -10,11 +10,6 @@ reservation_term = date(2024, 7, 1)
 pytestmark = pytest.mark.django_db
 
 
-@pytest.fixture
-def mock_send_reservation_extension_approved_email(mocker):
-    return mocker.patch("apps.books.models.book.send_reservation_extension_approved_email")
-
-
 @pytest.fixture()
 def instance() -> ReservationExtension:
     return mixer.blend(
@@ -35,7 +30,7 @@ def test_defaults(instance):
     assert str(instance) == f"{instance.pk} - {instance.get_status_display()}"
 
 
-def test_approval(instance, mock_send_reservation_extension_approved_email):
+def test_approval(instance, outbox):
     reservation_term = instance.reservation.term
     instance.status = ReservationExtensionStatus.APPROVED
     instance.save()
@@ -43,7 +38,7 @@ def test_approval(instance, mock_send_reservation_extension_approved_email):
     assert instance.modified_at
     assert instance.reservation.term > reservation_term
     assert instance.reservation.extensions_available == instance.reservation.MAX_EXTENSIONS_PER_MEMBER - 1
-    mock_send_reservation_extension_approved_email.delay.assert_called_once_with(instance.reservation.id)
+    assert outbox() == [("books/send_reservation_extension_approved_email", [instance.reservation.id])]
 
 
 def test_extend_once_on_approval(instance):
@@ -1,3 +1,5 @@
+from datetime import date
+
 import pytest
 from mixer.backend.django import mixer
 
@@ -60,3 +62,18 @@ class TestReservationQuerySet:
         assert reservations[2] not in member_reservations  # COMPLETED
         assert reservations[3] not in member_reservations  # CANCELLED
         assert reservations[4] not in member_reservations  # REFUSED
+
+    @pytest.mark.freeze_time("2024-07-10")
+    def test_with_overdue(self):
+        late = mixer.blend(Reservation, status=ReservationStatus.ISSUED, term=date(2024, 7, 1))
+        later = mixer.blend(Reservation, status=ReservationStatus.ISSUED, term=date(2024, 6, 20))
+        due_today = mixer.blend(Reservation, status=ReservationStatus.ISSUED, term=date(2024, 7, 10))
+        completed = mixer.blend(Reservation, status=ReservationStatus.COMPLETED, term=date(2024, 6, 1))
+        reserved = mixer.blend(Reservation)
+
+        reservations = Reservation.objects.with_overdue()
+
+        assert {reservation: reservation.days_overdue for reservation in reservations} == {late: 9, later: 20, due_today: 0, completed: 0, reserved: 0}
+        assert list(reservations.overdue().order_by("term")) == [later, late]
+        assert list(reservations.filter(days_overdue__gt=10)) == [later]
+        assert [reservation.overdue_days for reservation in (late, later, due_today, completed, reserved)] == [9, 20, 0, 0, 0]
@@ -0,0 +1,91 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from mixer.backend.django import mixer
+
+from apps.books.cache import CATALOGUE_VERSION_KEY
+from apps.books.models import Author, Book
+from apps.books.suggestions import BookSuggestions, PrefixIndex
+
+
+class TestPrefixIndex:
+    @pytest.fixture
+    def index(self):
+        return PrefixIndex.build(
+            [
+                (1, "The Lord of the Rings"),
+                (2, "Lord Jim"),
+                (3, "Война и мир"),
+                (4, "Ring"),
+            ]
+        )
+
+    def test_matches_any_word_prefix(self, index):
+        assert index.search("lor", limit=10) == [2, 1]
+        assert index.search("rin", limit=10) == [4, 1]
+
+    def test_matches_consecutive_words(self, index):
+        assert index.search("lord of", limit=10) == [1]
+        assert index.search("the  LORD", limit=10) == [1]
+
+    def test_unicode_case_insensitive(self, index):
+        assert index.search("ВОЙ", limit=10) == [3]
+        assert index.search("и м", limit=10) == [3]
+
+    def test_no_duplicates_and_limit(self, index):
+        assert index.search("the", limit=10) == [1]
+        assert index.search("r", limit=1) == [4]
+
+    def test_no_match(self, index):
+        assert index.search("xyz", limit=10) == []
+
+
+@pytest.mark.django_db
+class TestBookSuggestions:
+    def test_suggests_titles_and_authors(self):
+        author = mixer.blend(Author, first_name="Joseph", last_name="Conrad")
+        book = mixer.blend(Book, title="Lord Jim", author=author)
+        mixer.blend(Book, title="Heart of Darkness", author=author)
+
+        assert BookSuggestions(limit=5).suggest("lord") == {
+            "titles": [{"id": book.id, "title": "Lord Jim"}],
+            "authors": [],
+        }
+        assert BookSuggestions(limit=5).suggest("conr") == {
+            "titles": [],
+            "authors": [{"id": author.id, "first_name": "Joseph", "last_name": "Conrad"}],
+        }
+
+    def test_cached_per_prefix(self, django_assert_num_queries):
+        mixer.blend(Book, title="Lord Jim")
+        suggestions = BookSuggestions(limit=5)
+        suggestions.suggest("lord")
+
+        with django_assert_num_queries(0):
+            assert suggestions.suggest("LORD ")["titles"][0]["title"] == "Lord Jim"
+
+    def test_prefix_index_invalidated_on_title_change(self):
+        book = mixer.blend(Book, title="Lord Jim")
+        assert BookSuggestions(limit=5).suggest("lord")["titles"]
+
+        book.title = "Nostromo"
+        book.save()
+
+        assert BookSuggestions(limit=5).suggest("nostr")["titles"] == [{"id": book.id, "title": "Nostromo"}]
+
+    def test_prefix_index_rebuilt_on_change_by_another_process(self):
+        book = mixer.blend(Book, title="Lord Jim")
+        assert BookSuggestions(limit=5).suggest("lord")["titles"]
+
+        # as a Celery worker would do, no signals are sent in this process
+        Book.objects.filter(pk=book.pk).update(title="Nostromo")
+        cache.incr(CATALOGUE_VERSION_KEY)
+
+        assert BookSuggestions(limit=5).suggest("nostr")["titles"] == [{"id": book.id, "title": "Nostromo"}]
+
+    @pytest.mark.skipif(connection.vendor != "postgresql", reason="Trigram search requires PostgreSQL")
+    def test_ranks_bounded_candidates(self, mocker):
+        mocker.patch.object(BookSuggestions, "MAX_CANDIDATES", 2)
+        mixer.cycle(3).blend(Book, title=mixer.sequence("Lord Jim {0}"))
+
+        assert len(BookSuggestions(limit=5).suggest("lord")["titles"]) == 2
@@ -0,0 +1,99 @@
+from datetime import date
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import mixer
+
+from apps.books.const import OrderStatus, ReservationExtensionStatus, ReservationStatus
+from apps.books.models import Book, Order, Reservation
+from apps.books.models.book import ReservationExtension
+from apps.books.transitions import TransitionError, order_transitions
+from apps.users.models import Member
+
+pytestmark = pytest.mark.django_db
+
+
+def create_reserved_books(amount: int) -> list[Book]:
+    books = mixer.cycle(amount).blend(Book)
+    for book in books:
+        mixer.blend(Order, book=book, member=mixer.blend(Member))
+        mixer.blend(Order, book=book, member=mixer.blend(Member), status=OrderStatus.IN_QUEUE)
+    return books
+
+
+def test_invalid_rows_block_whole_transition(book_order):
+    completed = mixer.blend(Reservation, status=ReservationStatus.COMPLETED)
+
+    with pytest.raises(TransitionError, match=str(completed.pk)):
+        Reservation.objects.filter(pk__in=[book_order.reservation.pk, completed.pk]).transition(ReservationStatus.ISSUED)
+
+    book_order.reservation.refresh_from_db()
+    assert book_order.reservation.is_reserved
+
+
+def test_transitionable(book_order):
+    mixer.blend(Reservation, status=ReservationStatus.COMPLETED)
+
+    assert list(Reservation.objects.transitionable(ReservationStatus.ISSUED)) == [book_order.reservation]
+    assert order_transitions.sources(OrderStatus.REFUSED) == [OrderStatus.UNPROCESSED, OrderStatus.IN_QUEUE]
+
+
+def test_issue_keeps_set_terms(book_order):
+    reservation_with_term = mixer.blend(Reservation, term=date(2024, 7, 1))
+
+    reservations = Reservation.objects.filter(pk__in=[book_order.reservation.pk, reservation_with_term.pk]).transition(ReservationStatus.ISSUED)
+
+    assert {reservation.status for reservation in reservations} == {ReservationStatus.ISSUED}
+    assert Reservation.objects.get(pk=book_order.reservation.pk).term == Reservation.get_default_term()
+    assert Reservation.objects.get(pk=reservation_with_term.pk).term == date(2024, 7, 1)
+
+
+def test_complete_promotes_queues_with_fixed_queries(outbox):
+    def count_queries(amount: int) -> int:
+        books = create_reserved_books(amount)
+        reservations = Reservation.objects.filter(book__in=books)
+        reservations.update(status=ReservationStatus.ISSUED)
+        with CaptureQueriesContext(connection) as context:
+            assert len(reservations.transition(ReservationStatus.COMPLETED)) == amount
+        return len(context.captured_queries)
+
+    assert count_queries(1) == count_queries(10)
+    assert not Order.objects.filter(status=OrderStatus.IN_QUEUE).exists()
+    assert len(outbox()) == 11
+    assert not Book.objects.with_stale_counters().exists()
+
+
+def test_order_guard(book_order):
+    queued_order = mixer.blend(Order, book=book_order.book, member=mixer.blend(Member), status=OrderStatus.IN_QUEUE)
+    unreserved_order = mixer.blend(Order, status=OrderStatus.UNPROCESSED)
+    Order.objects.filter(pk=unreserved_order.pk).update(reservation=None)
+
+    assert not order_transitions.can_transition(queued_order, OrderStatus.PROCESSED)
+    with pytest.raises(TransitionError):
+        Order.objects.filter(pk__in=[book_order.pk, unreserved_order.pk]).transition(OrderStatus.PROCESSED)
+
+
+def test_member_cancel_orders(admin_user):
+    books = create_reserved_books(2)
+    orders = Order.objects.filter(book__in=books)
+
+    cancelled = orders.transition(OrderStatus.MEMBER_CANCELLED, last_modified_by=admin_user, history_change_reason="Closed")
+
+    assert len(cancelled) == 4
+    assert not Reservation.objects.exclude(status=ReservationStatus.CANCELLED).exists()
+    assert all(book.is_available and book.amount_in_queue == 0 for book in Book.objects.all())
+    history = Order.history.filter(status=OrderStatus.MEMBER_CANCELLED)
+    assert history.count() == 4
+    assert {(record.history_user, record.history_change_reason) for record in history} == {(admin_user, "Closed")}
+
+
+def test_approve_extensions(reservation_extension, outbox):
+    reservation = reservation_extension.reservation
+    term = reservation.term
+
+    ReservationExtension.objects.all().transition(ReservationExtensionStatus.APPROVED)
+
+    reservation.refresh_from_db()
+    assert reservation.term == term + Reservation.RESERVATION_TERM
+    assert outbox() == [("books/send_reservation_extension_approved_email", [reservation.pk])]
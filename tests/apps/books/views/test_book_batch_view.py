@@ -0,0 +1,76 @@
+import pytest
+from django.urls import reverse
+from mixer.backend.django import mixer
+from rest_framework import status
+
+from apps.books.api.serializers import BookMemberSerializer, BookSerializer
+from apps.books.const import OrderStatus
+from apps.books.models import Book, Order
+
+pytestmark = pytest.mark.django_db
+
+url = reverse("books-batch")
+
+
+@pytest.fixture
+def books() -> list[Book]:
+    return mixer.cycle(3).blend(Book)
+
+
+def get_ids(books: list[Book]) -> str:
+    return ",".join(str(book.id) for book in books)
+
+
+def test_returns_books_in_requested_order(client, books):
+    requested = [books[2], books[0], books[1]]
+
+    response = client.get(url, {"ids": get_ids(requested)})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [book["id"] for book in response.data] == [book.id for book in requested]
+    assert list(response.data[0]) == BookSerializer.Meta.fields
+
+
+def test_missing_and_duplicate_ids_skipped(client, books):
+    response = client.get(url, {"ids": f"{books[0].id},9999,{books[0].id}"})
+
+    assert [book["id"] for book in response.data] == [books[0].id]
+
+
+@pytest.mark.parametrize(
+    "ids, detail",
+    [
+        ("", "At least one book id is required"),
+        ("1,a", "Book ids must be integers"),
+        (",".join(map(str, range(51))), "At most 50 books can be requested at once"),
+    ],
+)
+def test_invalid_ids(client, ids, detail):
+    response = client.get(url, {"ids": ids})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"ids": detail}
+
+
+def test_member_state_computed_once_per_batch(as_member, member, django_assert_num_queries):
+    books = mixer.cycle(10).blend(Book)
+    mixer.blend(Order, book=books[0], member=member, status=OrderStatus.PROCESSED)
+    mixer.blend(Order, book=books[1], status=OrderStatus.PROCESSED)
+    mixer.blend(Order, book=books[1], member=member, status=OrderStatus.IN_QUEUE)
+
+    # authenticated user, books, reservations and enqueued orders of member
+    with django_assert_num_queries(4):
+        response = as_member.get(url, {"ids": get_ids(books)})
+
+    assert list(response.data[0]) == BookMemberSerializer.Meta.fields
+    assert response.data[0]["is_reserved_by_member"]
+    assert not response.data[1]["is_reserved_by_member"]
+    assert response.data[1]["is_enqueued_by_member"]
+    assert response.data[1]["amount_in_queue"] == 1
+    assert not any(book["is_max_reservations_reached"] for book in response.data)
+
+
+def test_sparse_fields(client, books):
+    response = client.get(url, {"ids": get_ids(books), "fields": "id"})
+
+    assert response.json() == [{"id": book.id} for book in books]
@@ -1,9 +1,18 @@
+import os
+import subprocess
+import sys
+
 import pytest
+from django.conf import settings as django_settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from mixer.backend.django import mixer
 from rest_framework import status
+from rest_framework.test import APIClient
 
 from apps.books.api.serializers import BookSerializer
+from apps.books.cache import ResponseCache
 from apps.books.const import OrderStatus, ReservationStatus
 from apps.books.models import Book, Reservation
 from apps.books.models.book import Order
@@ -121,6 +130,7 @@ def test_is_enqueued_by_member(as_member, book, member):
     response = as_member.get(url)
 
     assert response.data["is_enqueued_by_member"]
+    assert response.data["queue_position"] == 1
 
 
 def test_not_is_enqueued_by_member(as_member, book):
@@ -129,6 +139,7 @@ def test_not_is_enqueued_by_member(as_member, book):
     response = as_member.get(url)
 
     assert not response.data["is_enqueued_by_member"]
+    assert response.data["queue_position"] is None
 
 
 def test_max_reservations_reached_not_reached_yet(as_member, book, member):
@@ -147,3 +158,152 @@ def test_max_reservations_reached(as_member, book, member):
     response = as_member.get(url)
 
     assert response.data["is_max_reservations_reached"]
+
+
+def test_anonymous_response_cached(client, book, django_assert_num_queries):
+    url = reverse("book-detail", kwargs={"pk": book.id})
+
+    response = client.get(url)
+    assert response["X-Cache"] == "MISS"
+
+    with django_assert_num_queries(0):
+        cached_response = client.get(url)
+
+    assert cached_response["X-Cache"] == "HIT"
+    assert cached_response.json() == response.json()
+
+
+def test_cached_response_invalidated_on_reservation(client, book, create_book_order):
+    url = reverse("book-detail", kwargs={"pk": book.id})
+    client.get(url)
+
+    create_book_order()
+    response = client.get(url)
+
+    assert response["X-Cache"] == "MISS"
+    assert not response.data["is_available"]
+
+
+def test_modified_after_reservation_issued(as_member, book, member):
+    order = mixer.blend(Order, book=book, member=member, status=OrderStatus.PROCESSED)
+    url = reverse("book-detail", kwargs={"pk": book.id})
+    response = as_member.get(url)
+
+    Reservation.objects.filter(pk=order.reservation_id).transition(ReservationStatus.ISSUED)
+    modified = as_member.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    assert modified.status_code == status.HTTP_200_OK
+    assert modified["ETag"] != response["ETag"]
+    assert modified.data["is_issued_to_member"]
+
+
+def test_cached_response_invalidated_on_transition(client, book_order):
+    url = reverse("book-detail", kwargs={"pk": book_order.book.id})
+    client.get(url)
+
+    Order.objects.filter(pk=book_order.pk).transition(OrderStatus.PROCESSED)
+    response = client.get(url)
+
+    assert response["X-Cache"] == "MISS"
+
+
+def test_not_found_not_cached(client):
+    url = reverse("book-detail", kwargs={"pk": 9999})
+
+    client.get(url)
+    client.get(url)
+
+    assert ResponseCache.stats() == {"hits": 0, "misses": 2}
+
+
+def test_not_modified_when_etag_matches(client, book, django_assert_num_queries):
+    url = reverse("book-detail", kwargs={"pk": book.id})
+    response = client.get(url)
+
+    with django_assert_num_queries(0):
+        not_modified = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+    assert not_modified["ETag"] == response["ETag"]
+    assert not not_modified.content
+
+
+def test_not_modified_since_last_catalogue_change(client, book):
+    url = reverse("book-detail", kwargs={"pk": book.id})
+    response = client.get(url)
+
+    not_modified = client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+
+    assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+def test_modified_after_reservation(client, book, create_book_order):
+    url = reverse("book-detail", kwargs={"pk": book.id})
+    response = client.get(url)
+
+    create_book_order()
+    modified = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    assert modified.status_code == status.HTTP_200_OK
+    assert modified["ETag"] != response["ETag"]
+    assert not modified.data["is_available"]
+
+
+def test_member_etag_differs(as_member, book):
+    url = reverse("book-detail", kwargs={"pk": book.id})
+    response = APIClient().get(url)
+
+    member_response = as_member.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    assert member_response.status_code == status.HTTP_200_OK
+    assert member_response["ETag"] != response["ETag"]
+    assert "private" in member_response["Cache-Control"]
+    assert as_member.get(url, HTTP_IF_NONE_MATCH=member_response["ETag"]).status_code == status.HTTP_304_NOT_MODIFIED
+
+
+def test_only_requested_fields_returned(client, book):
+    url = reverse("book-detail", kwargs={"pk": book.id})
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, {"fields": "id,title,is_available"})
+
+    assert response.json() == {"id": book.id, "title": book.title, "is_available": True}
+    assert len(queries) == 1
+    assert "JOIN" not in queries.captured_queries[0]["sql"]
+
+
+def test_member_only_requested_fields_returned(as_member, book, member, create_book_order):
+    create_book_order(status=OrderStatus.PROCESSED)
+    url = reverse("book-detail", kwargs={"pk": book.id})
+
+    with CaptureQueriesContext(connection) as queries:
+        response = as_member.get(url, {"fields": "publisher,is_reserved_by_member"})
+
+    assert response.json() == {"publisher": {"name": book.publisher.name}, "is_reserved_by_member": True}
+    assert "books_order" not in queries.captured_queries[-1]["sql"]
+
+
+def test_unknown_fields_rejected(client, book):
+    url = reverse("book-detail", kwargs={"pk": book.id})
+
+    response = client.get(url, {"fields": "title,is_reserved_by_member"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_modified_by_another_process(client, book, settings, tmp_path):
+    # a cache shared between processes, as Redis is outside of tests
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": str(tmp_path)}}
+    url = reverse("book-detail", kwargs={"pk": book.id})
+    response = client.get(url)
+
+    # as run on commit of a Celery task, the database of the test isn't visible to other processes
+    subprocess.run(
+        [sys.executable, "-c", "import django; django.setup(); from apps.books.cache import _bump_catalogue_version; _bump_catalogue_version()"],
+        env={**os.environ, "CACHE_URL": f"filecache://{tmp_path}", "DJANGO_SETTINGS_MODULE": "core.settings"},
+        cwd=django_settings.BASE_DIR.parent,
+        check=True,
+    )
+
+    assert client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code == status.HTTP_200_OK
+    assert client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]).status_code == status.HTTP_200_OK
@@ -1,12 +1,15 @@
 import pytest
 from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from mixer.backend.django import mixer
 from rest_framework import status
 
 from apps.books.api.serializers import BookEnqueuedByMemberSerializer, BookListSerializer, BooksReservedByMemberSerializer
-from apps.books.const import OrderStatus, ReservationStatus
-from apps.books.models import Author, Book
+from apps.books.const import Language, OrderStatus, ReservationStatus
+from apps.books.models import Author, Book, Publisher
 from apps.books.models.book import Order, Reservation, ReservationExtension
 from apps.users.models import Member
 
@@ -204,6 +207,386 @@ class TestBooksReservedByMemberView:
         enqueued_book = response.data[0]
         assert enqueued_book["id"] == book.id
         assert enqueued_book["amount_in_queue"] == 2
+        assert enqueued_book["queue_position"] == 2
 
         assert set(enqueued_book) == set(self.expected_enqueued_fields)
         assert set(reserved_book) == set(self.expected_reserved_fields)
+
+    def test_queue_positions_in_single_query(self, as_member, member, another_member, django_assert_num_queries):
+        for book in mixer.cycle(3).blend(Book):
+            mixer.blend(Order, book=book, status=OrderStatus.PROCESSED)
+            mixer.blend(Order, book=book, member=another_member, status=OrderStatus.IN_QUEUE)
+            mixer.blend(Order, book=book, member=member, status=OrderStatus.IN_QUEUE)
+
+        # authenticated user, books with queue positions
+        with django_assert_num_queries(2):
+            response = as_member.get(self.url, {"enqueued_by_me": ""})
+
+        assert [book["queue_position"] for book in response.data] == [2, 2, 2]
+
+
+class TestBookListPagination:
+    url = reverse("books-list")
+
+    @pytest.fixture
+    def books(self):
+        books = mixer.cycle(5).blend(Book)
+        # mix of modified and never modified books, nulls go last
+        for book in books[:2]:
+            book.save()
+        return list(Book.objects.order_by(F("modified_at").desc(nulls_last=True), "-id"))
+
+    def _walk(self, client, url, params=None, direction="next"):
+        pages = []
+        while url:
+            response = client.get(url, params)
+            assert response.status_code == status.HTTP_200_OK
+            pages.append([book["id"] for book in response.data["results"]])
+            url, params = response.data[direction], None
+        return pages
+
+    def test_not_paginated_without_limit_or_cursor(self, client, books):
+        response = client.get(self.url)
+
+        assert isinstance(response.data, list)
+        assert len(response.data) == len(books)
+
+    def test_paginated_with_limit(self, client, books):
+        response = client.get(self.url, {"limit": 2})
+
+        assert set(response.data) == {"next", "previous", "results"}
+        assert [book["id"] for book in response.data["results"]] == [book.id for book in books[:2]]
+        assert response.data["previous"] is None
+        assert response.data["next"]
+
+    def test_walks_all_pages_forward_and_back(self, client, books):
+        pages = self._walk(client, self.url, {"limit": 2})
+
+        assert pages == [[book.id for book in books[i : i + 2]] for i in range(0, len(books), 2)]
+
+        last_page_url = client.get(self.url, {"limit": 2}).data["next"]
+        last_page_url = client.get(last_page_url).data["next"]
+        previous_url = client.get(last_page_url).data["previous"]
+
+        assert self._walk(client, previous_url, direction="previous") == [
+            [book.id for book in books[2:4]],
+            [book.id for book in books[0:2]],
+        ]
+
+    def test_no_count_query(self, client, books, django_assert_num_queries):
+        with django_assert_num_queries(1) as captured:
+            client.get(self.url, {"limit": 2})
+
+        assert "COUNT(*)" not in captured.captured_queries[0]["sql"].upper()
+
+    def test_limit_capped(self, client, books):
+        response = client.get(self.url, {"limit": 10_000})
+
+        assert len(response.data["results"]) == len(books)
+
+    def test_invalid_cursor(self, client, books):
+        response = client.get(self.url, {"cursor": "not-a-cursor"})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_paginates_available_books(self, client, books):
+        reserved = books[0]
+        reserved.reservation = mixer.blend(Reservation)
+        reserved.save(update_fields=["reservation"])
+
+        pages = self._walk(client, self.url, {"limit": 3, "available": ""})
+
+        assert sum(pages, []) == [book.id for book in books[1:]]
+
+    def test_paginates_reserved_by_member(self, as_member, member, books):
+        for book in books[:3]:
+            mixer.blend(Order, book=book, member=member)
+
+        pages = self._walk(as_member, self.url, {"limit": 2, "reserved_by_me": ""})
+
+        assert sorted(sum(pages, [])) == sorted(book.id for book in books[:3])
+        assert len(pages) == 2
+
+    def test_paginates_enqueued_by_member(self, as_member, member, books):
+        for book in books[:3]:
+            mixer.blend(Order, book=book, member=mixer.blend(Member))
+            mixer.blend(Order, book=book, member=member, status=OrderStatus.IN_QUEUE)
+
+        pages = self._walk(as_member, self.url, {"limit": 2, "enqueued_by_me": ""})
+
+        assert sorted(sum(pages, [])) == sorted(book.id for book in books[:3])
+
+
+class TestBookListFilters:
+    url = reverse("books-list")
+
+    @pytest.fixture(autouse=True)
+    def books(self):
+        author = mixer.blend(Author)
+        publisher = mixer.blend(Publisher)
+        books = {
+            "en_1990": mixer.blend(Book, language=Language.ENGLISH, published_at=1990, author=author, publisher=publisher),
+            "en_2000": mixer.blend(Book, language=Language.ENGLISH, published_at=2000),
+            "lv_2010": mixer.blend(Book, language=Language.LATVIAN, published_at=2010, author=author),
+            "de_2020": mixer.blend(Book, language=Language.GERMAN, published_at=2020, publisher=publisher),
+        }
+        books["en_2000"].reservation = mixer.blend(Reservation)
+        books["en_2000"].save(update_fields=["reservation"])
+        return books
+
+    def ids(self, response):
+        data = response.data["results"] if isinstance(response.data, dict) else response.data
+        return {book["id"] for book in data}
+
+    def test_filter_by_language(self, client, books):
+        response = client.get(self.url, {"language": [Language.ENGLISH, Language.GERMAN]})
+
+        assert self.ids(response) == {books["en_1990"].id, books["en_2000"].id, books["de_2020"].id}
+
+    def test_filter_by_publisher_and_author(self, client, books):
+        response = client.get(self.url, {"publisher": books["en_1990"].publisher_id, "author": books["en_1990"].author_id})
+
+        assert self.ids(response) == {books["en_1990"].id}
+
+    def test_filter_by_multiple_authors(self, client, books):
+        response = client.get(self.url, {"author": f"{books['en_1990'].author_id},{books['de_2020'].author_id}"})
+
+        assert self.ids(response) == {books["en_1990"].id, books["lv_2010"].id, books["de_2020"].id}
+
+    def test_filter_by_published_at_range(self, client, books):
+        response = client.get(self.url, {"published_at_min": 2000, "published_at_max": 2010})
+
+        assert self.ids(response) == {books["en_2000"].id, books["lv_2010"].id}
+
+    @pytest.mark.parametrize("availability, expected", [("available", 3), ("reserved", 1)])
+    def test_filter_by_availability(self, client, availability, expected):
+        response = client.get(self.url, {"availability": availability})
+
+        assert len(response.data) == expected
+
+    def test_invalid_filter(self, client):
+        response = client.get(self.url, {"language": "xx"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_no_facets_by_default(self, client):
+        response = client.get(self.url)
+
+        assert isinstance(response.data, list)
+
+    def test_facets(self, client):
+        response = client.get(self.url, {"facets": ""})
+
+        assert len(response.data["results"]) == 4
+        assert response.data["facets"] == {
+            "total": 4,
+            "language": {**dict.fromkeys(Language.values, 0), "en": 2, "lv": 1, "de": 1},
+            "availability": {"available": 3, "reserved": 1},
+        }
+
+    def test_facets_exclude_own_filter(self, client):
+        response = client.get(self.url, {"facets": "", "language": Language.ENGLISH, "availability": "available"})
+
+        assert len(response.data["results"]) == 1
+        assert response.data["facets"]["total"] == 1
+        # other languages counted among available books
+        assert response.data["facets"]["language"] == {**dict.fromkeys(Language.values, 0), "en": 1, "lv": 1, "de": 1}
+        # availability counted among english books
+        assert response.data["facets"]["availability"] == {"available": 1, "reserved": 1}
+
+    def test_facets_respect_other_filters(self, client):
+        response = client.get(self.url, {"facets": "", "published_at_min": 2000})
+
+        assert response.data["facets"]["total"] == 3
+        assert response.data["facets"]["availability"] == {"available": 2, "reserved": 1}
+
+    def test_facets_with_pagination(self, client):
+        response = client.get(self.url, {"facets": "", "limit": 2})
+
+        assert set(response.data) == {"next", "previous", "results", "facets"}
+        assert response.data["facets"]["total"] == 4
+
+    def test_facets_in_single_query(self, client, django_assert_num_queries):
+        # list query + facets query
+        with django_assert_num_queries(2):
+            client.get(self.url, {"facets": "", "language": Language.ENGLISH})
+
+    def test_facets_with_search(self, client, books):
+        books["lv_2010"].title = "Searchable"
+        books["lv_2010"].save()
+
+        response = client.get(self.url, {"facets": "", "q": "Searchable"})
+
+        assert self.ids(response) == {books["lv_2010"].id}
+        assert response.data["facets"]["language"]["lv"] == 1
+        assert response.data["facets"]["total"] == 1
+
+
+class TestBookListCache:
+    url = reverse("books-list")
+
+    def test_anonymous_response_cached(self, client, django_assert_num_queries):
+        mixer.cycle(3).blend(Book)
+
+        response = client.get(self.url, {"q": "", "limit": 2})
+        assert response["X-Cache"] == "MISS"
+
+        with django_assert_num_queries(0):
+            cached_response = client.get(self.url, {"limit": 2, "q": ""})
+
+        assert cached_response["X-Cache"] == "HIT"
+        assert cached_response.json() == response.json()
+
+    def test_cache_keyed_by_query_params(self, client):
+        mixer.cycle(3).blend(Book)
+
+        client.get(self.url)
+        response = client.get(self.url, {"limit": 1})
+
+        assert response["X-Cache"] == "MISS"
+        assert len(response.data["results"]) == 1
+
+    def test_cache_invalidated_on_catalogue_change(self, client, create_book_order, book):
+        response = client.get(self.url, {"available": ""})
+        assert len(response.data) == 1
+
+        create_book_order()
+        response = client.get(self.url, {"available": ""})
+
+        assert response["X-Cache"] == "MISS"
+        assert len(response.data) == 0
+
+    def test_member_response_not_cached(self, as_member, book):
+        as_member.get(self.url)
+        response = as_member.get(self.url)
+
+        assert "X-Cache" not in response
+
+    def test_not_modified_when_etag_matches(self, client, book):
+        response = client.get(self.url)
+
+        not_modified = client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+        assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response["Cache-Control"] == "no-cache"
+
+    def test_etag_differs_per_query(self, client, book):
+        response = client.get(self.url)
+
+        other_response = client.get(self.url, {"available": ""}, HTTP_IF_NONE_MATCH=response["ETag"])
+
+        assert other_response.status_code == status.HTTP_200_OK
+
+    def test_member_not_modified(self, as_member, book, create_book_order):
+        create_book_order(status=OrderStatus.IN_QUEUE)
+        url = f"{self.url}?enqueued_by_me"
+        response = as_member.get(url)
+
+        assert as_member.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code == status.HTTP_304_NOT_MODIFIED
+        create_book_order(status=OrderStatus.MEMBER_CANCELLED)
+        assert as_member.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code == status.HTTP_200_OK
+
+
+class TestBookListProjection:
+    url = reverse("books-list")
+
+    @pytest.fixture(autouse=True)
+    def _use_projection(self, settings):
+        settings.BOOKS_LIST_PROJECTION = True
+
+    def test_same_response_as_serializer(self, as_member, settings, create_book_order):
+        mixer.cycle(3).blend(Book, cover=mixer.sequence("books/covers/cover{0}.jpg"))
+        for book in mixer.cycle(2).blend(Book):
+            mixer.blend(Order, book=book, status=OrderStatus.UNPROCESSED)
+            create_book_order(book=book, status=OrderStatus.IN_QUEUE)
+
+        for params in [{"limit": 10}, {"limit": 2}, {"limit": 2, "facets": ""}, {"limit": 10, "enqueued_by_me": ""}]:
+            response = as_member.get(self.url, params)
+            settings.BOOKS_LIST_PROJECTION = False
+            expected = as_member.get(self.url, params)
+            settings.BOOKS_LIST_PROJECTION = True
+
+            assert response.json() == expected.json()
+
+    def test_same_unpaginated_response_as_serializer(self, client, settings):
+        mixer.cycle(3).blend(Book)
+
+        response = client.get(self.url)
+        settings.BOOKS_LIST_PROJECTION = False
+        expected = client.get(self.url, {"q": ""})  # skips the cached response
+
+        # books never modified tie in `Book.Meta.ordering`, so only the keyset pagination order is stable
+        assert sorted(response.json(), key=lambda book: book["id"]) == sorted(expected.json(), key=lambda book: book["id"])
+
+    def test_paginated(self, client):
+        mixer.cycle(3).blend(Book)
+
+        first_page = client.get(self.url, {"limit": 2}).json()
+        second_page = client.get(first_page["next"]).json()
+
+        assert len(first_page["results"]) == 2
+        assert len(second_page["results"]) == 1
+        assert client.get(second_page["previous"]).json()["results"] == first_page["results"]
+
+    def test_not_used_for_reserved_by_member(self, as_member, book, create_book_order):
+        create_book_order(status=OrderStatus.PROCESSED)
+
+        response = as_member.get(self.url, {"reserved_by_me": ""})
+
+        assert response.data[0]["reservation_id"] == book.reservation_id
+
+
+class TestBookListSparseFields:
+    url = reverse("books-list")
+
+    def test_only_requested_fields_returned(self, client, book):
+        response = client.get(self.url, {"fields": "id,title"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == [{"id": book.id, "title": book.title}]
+
+    def test_only_requested_columns_loaded(self, client, book):
+        with CaptureQueriesContext(connection) as queries:
+            client.get(self.url, {"fields": "id, title"})
+
+        sql = queries.captured_queries[0]["sql"]
+        assert "JOIN" not in sql
+        assert "isbn" not in sql
+
+    def test_paginated_in_single_query_per_page(self, client, django_assert_num_queries):
+        mixer.cycle(7).blend(Book)
+        url, params, pages = self.url, {"fields": "title", "limit": 3}, 0
+
+        with django_assert_num_queries(3):
+            while url:
+                response = client.get(url, params)
+                url, params, pages = response.data["next"], None, pages + 1
+
+        assert pages == 3
+        assert set(response.data["results"][0]) == {"title"}
+
+    def test_requested_relations_joined(self, client, book, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            response = client.get(self.url, {"fields": "title,author"})
+
+        assert response.json() == [{"title": book.title, "author": {"first_name": book.author.first_name, "last_name": book.author.last_name}}]
+
+    def test_reserved_by_member(self, as_member, book, member):
+        mixer.blend(Order, book=book, member=member, status=OrderStatus.PROCESSED)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = as_member.get(self.url, {"reserved_by_me": "", "fields": "id,reservation_id"})
+
+        assert response.json() == [{"id": book.id, "reservation_id": book.reservation.id}]
+        assert "extension" not in queries.captured_queries[-1]["sql"]
+
+    def test_unknown_fields_rejected(self, client, book):
+        response = client.get(self.url, {"fields": "id,isbn,password"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {"fields": "Unknown fields: isbn, password"}
+
+    def test_empty_fields_ignored(self, client, book):
+        response = client.get(self.url, {"fields": ""})
+
+        assert list(response.json()[0]) == BookListSerializer.Meta.fields
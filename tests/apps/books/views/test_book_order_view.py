@@ -16,10 +16,6 @@ pytestmark = [
 
 
 class TestBookOrderView:
-    @pytest.fixture
-    def mock_send_order_created_email(self, mocker):
-        return mocker.patch("apps.books.api.views.send_order_created_email")
-
     @pytest.fixture
     def _setup_max_reservations(self, member):
         for _r in range(Reservation.MAX_RESERVATIONS_PER_MEMBER):
@@ -59,16 +55,16 @@ class TestBookOrderView:
 
         assert response.status_code == status_codes.HTTP_401_UNAUTHORIZED
 
-    def test_order_a_book_new_reservation(self, as_member, book, mock_send_order_created_email):
+    def test_order_a_book_new_reservation(self, as_member, book, outbox):
         url = reverse("book-order", kwargs={"book_id": book.id})
 
         response: Response = as_member.post(url)
 
         assert response.status_code == status_codes.HTTP_200_OK
         assert response.data["detail"] == "Book reserved"
-        mock_send_order_created_email.delay.assert_called_once_with(response.data["order_id"])
+        assert outbox() == [("books/send_order_created_email", [response.data["order_id"]])]
 
-    def test_member_already_has_book_order(self, as_member, book, book_order, mock_send_order_created_email):
+    def test_member_already_has_book_order(self, as_member, book, book_order, outbox):
         url = reverse("book-order", kwargs={"book_id": book.id})
 
         response: Response = as_member.post(url)
@@ -76,9 +72,9 @@ class TestBookOrderView:
         assert response.status_code == status_codes.HTTP_400_BAD_REQUEST
         assert response.data["detail"] == "Book is already ordered or your order is in queue"
         assert book_order.status == OrderStatus.UNPROCESSED
-        mock_send_order_created_email.delay.assert_not_called()
+        assert outbox() == []
 
-    def test_book_order_put_in_queue(self, as_member, book, another_book_order, mock_send_order_created_email):
+    def test_book_order_put_in_queue(self, as_member, book, another_book_order, outbox):
         url = reverse("book-order", kwargs={"book_id": book.id})
 
         response: Response = as_member.post(url)
@@ -89,7 +85,7 @@ class TestBookOrderView:
         # first, since sorted by created_at
         assert book.orders.first().id == response.data["order_id"]
         assert book.orders.last() == another_book_order
-        mock_send_order_created_email.delay.assert_not_called()
+        assert outbox() == []
 
     def test_cancel_book_order(self, as_member, book, book_order):
         url = reverse("book-order", kwargs={"book_id": book.id})
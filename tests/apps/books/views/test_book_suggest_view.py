@@ -0,0 +1,52 @@
+import pytest
+from django.urls import reverse
+from mixer.backend.django import mixer
+from rest_framework import status
+
+from apps.books.models import Author, Book
+
+pytestmark = pytest.mark.django_db
+
+url = reverse("books-suggest")
+
+
+@pytest.fixture(autouse=True)
+def books():
+    author = mixer.blend(Author, first_name="Rūdolfs", last_name="Blaumanis")
+    return [
+        mixer.blend(Book, title="Indrāni", author=author),
+        mixer.blend(Book, title="Ugunī", author=author),
+        mixer.blend(Book, title="Zaudētās tiesības", author=author),
+    ]
+
+
+def test_suggests_no_auth_needed(client, books):
+    response = client.get(url, {"q": "ugu"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["titles"] == [{"id": books[1].id, "title": "Ugunī"}]
+    assert response.data["authors"] == []
+
+
+def test_suggests_authors(client):
+    response = client.get(url, {"q": "blaum"})
+
+    assert [author["last_name"] for author in response.data["authors"]] == ["Blaumanis"]
+
+
+def test_too_short_query_returns_nothing(client, django_assert_num_queries):
+    with django_assert_num_queries(0):
+        response = client.get(url, {"q": "u"})
+
+    assert response.data == {"titles": [], "authors": []}
+
+
+@pytest.mark.parametrize("limit, expected", [(1, 1), (2, 2), ("invalid", 3), (0, 1)])
+def test_limit(client, books, limit, expected):
+    for book in books:
+        book.title = f"Stāsts {book.title}"
+        book.save()
+
+    response = client.get(url, {"q": "stā", "limit": limit})
+
+    assert len(response.data["titles"]) == expected
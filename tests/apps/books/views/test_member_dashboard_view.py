@@ -0,0 +1,66 @@
+import pytest
+from django.urls import reverse
+from mixer.backend.django import mixer
+from rest_framework import status
+
+from apps.books.const import OrderStatus, ReservationStatus
+from apps.books.models import Book, Order, Reservation, ReservationExtension
+
+pytestmark = pytest.mark.django_db
+
+url = reverse("member_dashboard")
+
+
+@pytest.fixture
+def create_member_books(member, another_member):
+    def _create(n: int) -> None:
+        for _ in range(n):
+            reserved_book, issued_book, enqueued_book = mixer.cycle(3).blend(Book)
+
+            mixer.blend(Order, book=reserved_book, member=member)
+
+            mixer.blend(Order, book=issued_book, member=member)
+            issued_book.reservation.status = ReservationStatus.ISSUED
+            issued_book.reservation.save()
+            mixer.blend(ReservationExtension, reservation=issued_book.reservation)
+
+            mixer.blend(Order, book=enqueued_book, member=another_member)
+            mixer.blend(Order, book=enqueued_book, member=member, status=OrderStatus.IN_QUEUE)
+
+    return _create
+
+
+def test_denied_for_unauthenticated_user(client):
+    response = client.get(url)
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_dashboard(as_member, member, create_member_books):
+    create_member_books(1)
+
+    response = as_member.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["profile"]["username"] == member.username
+    assert len(response.data["reserved"]) == 1
+    assert not response.data["reserved"][0]["reservation_extendable"]
+
+    [issued] = response.data["issued"]
+    assert issued["reservation_term"] == Reservation.objects.get(pk=issued["reservation_id"]).term
+    assert issued["has_requested_extension"]
+    assert not issued["reservation_extendable"]
+
+    [enqueued] = response.data["enqueued"]
+    assert enqueued["queue_position"] == 1
+    assert enqueued["amount_in_queue"] == 1
+
+
+def test_queries_do_not_grow_with_books(as_member, create_member_books, django_assert_num_queries):
+    create_member_books(3)
+
+    # authenticated user, reserved books, reservations of member, enqueued orders with books
+    with django_assert_num_queries(4):
+        response = as_member.get(url)
+
+    assert [len(response.data[section]) for section in ["reserved", "issued", "enqueued"]] == [3, 3, 3]
@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from mixer.backend.django import mixer
+from rest_framework import status
+
+from apps.books.const import ReservationStatus
+from apps.books.models import Book, Order, Reservation
+from apps.users.models import Member
+
+pytestmark = pytest.mark.django_db
+
+url = reverse("reservations-overdue")
+
+
+def create_overdue_reservations(*days_overdue: int) -> list[Reservation]:
+    reservations = []
+    for days in days_overdue:
+        book = mixer.blend(Book)
+        order = mixer.blend(Order, book=book, member=mixer.blend(Member))
+        Reservation.objects.filter(pk=order.reservation_id).update(status=ReservationStatus.ISSUED, term=timezone.localdate() - timedelta(days=days))
+        reservations.append(Reservation.objects.get(pk=order.reservation_id))
+    return reservations
+
+
+def test_denied_for_member(as_member):
+    response = as_member.get(url)
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_overdue_reservations(as_librarian_staff_client):
+    create_overdue_reservations(0)
+    late, latest, later = create_overdue_reservations(2, 30, 5)
+
+    response = as_librarian_staff_client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [(row["id"], row["days_overdue"]) for row in response.data["results"]] == [(latest.pk, 30), (later.pk, 5), (late.pk, 2)]
+    assert response.data["results"][0] == {
+        "id": latest.pk,
+        "term": latest.term.isoformat(),
+        "days_overdue": 30,
+        "book_id": latest.book.pk,
+        "book_title": latest.book.title,
+        "member": {
+            "username": latest.member.username,
+            "email": latest.member.email,
+            "first_name": latest.member.first_name,
+            "last_name": latest.member.last_name,
+        },
+    }
+
+
+def test_overdue_reservations_pages(as_librarian_staff_client):
+    reservations = create_overdue_reservations(*range(1, 6))
+
+    with CaptureQueriesContext(connection) as context:
+        first_page = as_librarian_staff_client.get(url, {"limit": 3}).data
+    second_page = as_librarian_staff_client.get(first_page["next"]).data
+
+    assert [row["id"] for row in first_page["results"] + second_page["results"]] == [reservation.pk for reservation in reversed(reservations)]
+    assert second_page["next"] is None
+    assert not any("COUNT" in query["sql"] for query in context.captured_queries)
@@ -0,0 +1,106 @@
+import pytest
+from django.urls import reverse
+from mixer.backend.django import mixer
+from rest_framework import status
+
+from apps.books.const import OrderStatus, ReservationStatus
+from apps.books.models import Book, Order, ReservationExtension
+
+pytestmark = pytest.mark.django_db
+
+BOOKS = 5
+
+
+@pytest.fixture
+def books(member, another_member) -> list[Book]:
+    """
+    Catalogue with books reserved, issued (with extensions) and enqueued by member,
+    so queries repeated per book show up in budgets.
+    """
+    books = mixer.cycle(BOOKS * 3).blend(Book)
+    for reserved_book, issued_book, enqueued_book in zip(books[:BOOKS], books[BOOKS : BOOKS * 2], books[BOOKS * 2 :]):
+        mixer.blend(Order, book=reserved_book, member=member)
+
+        mixer.blend(Order, book=issued_book, member=member)
+        issued_book.reservation.status = ReservationStatus.ISSUED
+        issued_book.reservation.save()
+        mixer.blend(ReservationExtension, reservation=issued_book.reservation)
+
+        mixer.blend(Order, book=enqueued_book, member=another_member)
+        mixer.blend(Order, book=enqueued_book, member=member, status=OrderStatus.IN_QUEUE)
+    return books
+
+
+@pytest.mark.parametrize(
+    "scenario, params",
+    [
+        ("books-list", {}),
+        ("books-list:paginated", {"limit": 10}),
+        ("books-list:facets", {"facets": "", "q": "book"}),
+        ("books-list:available", {"available": ""}),
+    ],
+)
+def test_books_list(client, books, query_budget, scenario, params):
+    with query_budget(scenario):
+        response = client.get(reverse("books-list"), params)
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.parametrize(
+    "scenario, params",
+    [
+        ("books-list:member", {}),
+        ("books-list:reserved_by_me", {"reserved_by_me": ""}),
+        ("books-list:enqueued_by_me", {"enqueued_by_me": ""}),
+    ],
+)
+def test_books_list_member(as_member, books, query_budget, scenario, params):
+    with query_budget(scenario):
+        response = as_member.get(reverse("books-list"), params)
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_book_detail(client, books, query_budget):
+    with query_budget("book-detail"):
+        response = client.get(reverse("book-detail", kwargs={"pk": books[0].id}))
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_book_detail_member(as_member, books, query_budget):
+    with query_budget("book-detail:member"):
+        response = as_member.get(reverse("book-detail", kwargs={"pk": books[0].id}))
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_books_batch_member(as_member, books, query_budget):
+    with query_budget("books-batch:member"):
+        response = as_member.get(reverse("books-batch"), {"ids": ",".join(str(book.id) for book in books)})
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_book_order(as_another_member, query_budget):
+    book = mixer.blend(Book)
+
+    with query_budget("book-order"):
+        response = as_another_member.post(reverse("book-order", kwargs={"book_id": book.id}))
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_book_order_enqueued(as_another_member, book_order, query_budget):
+    with query_budget("book-order:enqueued"):
+        response = as_another_member.post(reverse("book-order", kwargs={"book_id": book_order.book.id}))
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_member_dashboard(as_member, books, query_budget):
+    with query_budget("member-dashboard"):
+        response = as_member.get(reverse("member_dashboard"))
+
+    assert response.status_code == status.HTTP_200_OK
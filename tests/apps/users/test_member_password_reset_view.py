@@ -12,10 +12,6 @@ from apps.users.models import Member
 class TestMemberRegistrationRequestView:
     url = reverse("member_password_reset")
 
-    @pytest.fixture(autouse=True)
-    def mock_send_password_reset_link_to_member(self, mocker):
-        return mocker.patch("apps.users.api.views.send_password_reset_link_to_member")
-
     @pytest.fixture
     def valid_payload(self, member):
         return {
@@ -28,7 +24,7 @@ class TestMemberRegistrationRequestView:
         assert response.status_code == status.HTTP_400_BAD_REQUEST
         assert response.json() == {"email": ["This field is required."]}
 
-    def test_reset_link_sent_to_member(self, member, client, valid_payload, mock_send_password_reset_link_to_member):
+    def test_reset_link_sent_to_member(self, member, client, valid_payload, outbox):
         response = client.post(self.url, valid_payload)
 
         assert response.status_code == status.HTTP_204_NO_CONTENT
@@ -36,15 +32,15 @@ class TestMemberRegistrationRequestView:
         assert member.password_reset_token is not None
         assert member.password_reset_token_created_at is not None
 
-        assert mock_send_password_reset_link_to_member.called_once_with(member.id)
+        assert outbox() == [("core/send_password_reset_link_to_member", [member.id])]
 
-    def test_member_is_not_found(self, client, valid_payload, mock_send_password_reset_link_to_member):
+    def test_member_is_not_found(self, client, valid_payload, outbox):
         valid_payload["email"] = "not-a-member@member.com"
 
         response = client.post(self.url, valid_payload)
 
         assert response.status_code == status.HTTP_204_NO_CONTENT
-        assert mock_send_password_reset_link_to_member.not_called()
+        assert outbox() == []
 
     def test_same_password_reset_token_used_if_not_expired(self, member, client, valid_payload):
         client.post(self.url, valid_payload)
@@ -11,14 +11,6 @@ from apps.users.models import Member
 class TestMemberRegistrationRequestView:
     url = reverse("member_registration_request")
 
-    @pytest.fixture(autouse=True)
-    def mock_send_member_registration_request_received(self, mocker):
-        return mocker.patch("apps.users.api.serializers.send_member_registration_request_received")
-
-    @pytest.fixture(autouse=True)
-    def mock_send_registration_notification_to_member(self, mocker):
-        return mocker.patch("apps.users.api.serializers.send_registration_notification_to_member")
-
     @pytest.fixture
     def valid_payload(self):
         return {
@@ -90,9 +82,9 @@ class TestMemberRegistrationRequestView:
         assert response.status_code == status.HTTP_400_BAD_REQUEST
         assert str(response.data["password"][0]) == MemberRegistrationRequestSerializer.PASSWORD_MISMATCH_ERROR
 
-    def test_notification_emails_sent_to_admin_and_member(
-        self, _register_member, mock_send_member_registration_request_received, mock_send_registration_notification_to_member, valid_payload
-    ):
+    def test_notification_emails_sent_to_admin_and_member(self, _register_member, outbox, valid_payload):
         member = Member.objects.get(email=valid_payload["email"])
-        assert mock_send_member_registration_request_received.delay.called_once_with(member.id)
-        assert mock_send_registration_notification_to_member.delay.called_once_with(member.id)
+        assert outbox() == [
+            ("core/send_member_registration_request_received", [member.id]),
+            ("core/send_registration_notification_to_member", [member.id]),
+        ]
@@ -0,0 +1,26 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+pytestmark = pytest.mark.django_db
+
+
+def test_token_obtain(client, member, query_budget):
+    with query_budget("token-obtain"):
+        response = client.post(reverse("token_obtain_pair"), {"username": member.username, "password": member.raw_password})
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_token_refresh(as_member, query_budget):
+    with query_budget("token-refresh:fetch_user"):
+        response = as_member.post(reverse("token_refresh") + "?fetch_user")
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_member_profile(as_member, query_budget):
+    with query_budget("member-profile"):
+        response = as_member.get(reverse("member_profile"))
+
+    assert response.status_code == status.HTTP_200_OK
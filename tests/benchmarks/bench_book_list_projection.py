@@ -0,0 +1,45 @@
+"""
+Serialization benchmark of BookListProjection against BookListSerializer.
+Not collected by default, run explicitly with: make benchmark
+"""
+
+import timeit
+
+import pytest
+from mixer.backend.django import mixer
+from rest_framework.test import APIRequestFactory
+
+from apps.books.api.serializers import BookEnqueuedByMemberProjection, BookListProjection
+from apps.books.models import Author, Book
+
+pytestmark = pytest.mark.django_db
+
+ROWS = 1000
+REPEAT = 5
+MIN_SPEEDUP = 5
+
+
+@pytest.fixture
+def books() -> None:
+    authors = mixer.cycle(50).blend(Author)
+    mixer.cycle(ROWS).blend(Book, author=mixer.sequence(*authors), cover=mixer.sequence("books/covers/cover{0}.jpg"))
+
+
+@pytest.mark.parametrize("projection_class", [BookListProjection, BookEnqueuedByMemberProjection])
+def test_projection_speedup(books, member, projection_class):
+    context = {"request": APIRequestFactory().get("/api/v1/books/")}
+    queryset = Book.objects.with_author().with_queue_position(member)
+    projection = projection_class(context)
+
+    def serialize_instances() -> None:
+        projection_class.serializer_class(list(queryset.all()), many=True, context=context).data
+
+    def serialize_projection() -> None:
+        projection.serialize(list(projection.project(queryset.all())))
+
+    serializer_time = min(timeit.repeat(serialize_instances, number=1, repeat=REPEAT))
+    projection_time = min(timeit.repeat(serialize_projection, number=1, repeat=REPEAT))
+    speedup = serializer_time / projection_time
+
+    print(f"\n{projection_class.__name__}, {ROWS} rows: serializer {serializer_time:.4f}s, projection {projection_time:.4f}s, {speedup:.1f}x")
+    assert speedup >= MIN_SPEEDUP
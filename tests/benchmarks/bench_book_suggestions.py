@@ -0,0 +1,69 @@
+"""
+Latency benchmark of the typeahead suggestions endpoint on a 100k books catalogue.
+Not collected by default, run explicitly with: make benchmark
+"""
+
+import os
+import random
+import statistics
+import time
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from apps.books.models import Author, Book, Publisher
+
+pytestmark = pytest.mark.django_db
+
+BOOKS = int(os.environ.get("BENCHMARK_ROWS", 100_000))
+AUTHORS = BOOKS // 20
+BATCH_SIZE = 10_000
+REQUESTS = 200
+P95_TARGET = 0.020
+
+words = ["mežs", "jūra", "saule", "ugunī", "zelta", "zirgs", "nakts", "laiki", "dziesma", "vējš", "pils", "ceļš", "sapnis", "ezers", "kalns", "rīts"]
+
+
+@pytest.fixture
+def catalogue() -> list[str]:
+    rng = random.Random(0)
+    publisher = mixer.blend(Publisher)
+    authors = Author.objects.bulk_create(
+        [Author(first_name=f"{rng.choice(words).title()}{i}", last_name=f"{rng.choice(words).title()}s") for i in range(AUTHORS)],
+        batch_size=BATCH_SIZE,
+    )
+    titles = [f"{rng.choice(words).title()} {rng.choice(words)} {i}" for i in range(BOOKS)]
+    Book.objects.bulk_create(
+        [
+            Book(title=title, author=authors[i % AUTHORS], publisher=publisher, language="lv", published_at=2000, pages=100, isbn=f"{i:013d}")
+            for i, title in enumerate(titles)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE books_book, books_author")
+    return titles
+
+
+def test_suggest_p95_latency(client, catalogue):
+    rng = random.Random(1)
+    url = reverse("books-suggest")
+    queries = [rng.choice(rng.choice(catalogue).split())[: rng.randint(3, 6)] for _ in range(REQUESTS)]
+    # builds the in-process prefix index on databases without pg_trgm
+    client.get(url, {"q": queries[0]})
+
+    latencies = []
+    for query in queries:
+        cache.clear()
+        start = time.perf_counter()
+        response = client.get(url, {"q": query})
+        latencies.append(time.perf_counter() - start)
+        assert response.data["titles"]
+
+    p95 = statistics.quantiles(latencies, n=20)[-1]
+    print(f"\nSuggestions, {BOOKS} books, {REQUESTS} uncached requests: median {statistics.median(latencies) * 1000:.1f}ms, p95 {p95 * 1000:.1f}ms")
+    assert p95 < P95_TARGET
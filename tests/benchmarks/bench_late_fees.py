@@ -0,0 +1,76 @@
+"""
+Late fee computation benchmark of LateFeeService against fees summed up per reservation in Python.
+Not collected by default, run explicitly with: make benchmark
+"""
+
+import os
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from apps.books.const import ReservationStatus
+from apps.books.fees import LateFeeService, Tariff
+from apps.books.models import MemberFee, Reservation
+from apps.users.models import Member
+
+pytestmark = pytest.mark.django_db
+
+ROWS = int(os.environ.get("BENCHMARK_ROWS", 1_000_000))
+MEMBERS = ROWS // 100
+BATCH_SIZE = 10_000
+MIN_SPEEDUP = 5
+
+today = date(2024, 7, 31)
+tariff = Tariff(grace_days=3, daily_rate=Decimal("0.20"), cap=Decimal("10.00"))
+statuses = [ReservationStatus.ISSUED, ReservationStatus.COMPLETED, ReservationStatus.COMPLETED, ReservationStatus.CANCELLED]
+
+
+@pytest.fixture
+def reservations() -> None:
+    members = Member.objects.bulk_create(
+        [Member(username=f"member{i}", email=f"member{i}@example.com", is_member=True) for i in range(MEMBERS)],
+        batch_size=BATCH_SIZE,
+    )
+    for start in range(0, ROWS, BATCH_SIZE):
+        Reservation.objects.bulk_create(
+            [
+                Reservation(member=members[i % MEMBERS], status=statuses[i // MEMBERS % len(statuses)], term=today - timedelta(days=i % 60 - 20))
+                for i in range(start, min(start + BATCH_SIZE, ROWS))
+            ]
+        )
+
+
+def compute_in_python() -> dict[int, Decimal]:
+    fees: dict[int, Decimal] = defaultdict(Decimal)
+    for reservation in Reservation.objects.filter(status=ReservationStatus.ISSUED).iterator(chunk_size=BATCH_SIZE):
+        days_overdue = (today - reservation.term).days
+        if days_overdue > tariff.grace_days:
+            fees[reservation.member_id] += tariff.fee(days_overdue)
+    return fees
+
+
+def test_late_fees_speedup(reservations):
+    start = time.perf_counter()
+    python_fees = compute_in_python()
+    python_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    totals = list(LateFeeService.member_totals(tariff, today))
+    totals_time = time.perf_counter() - start
+    speedup = python_time / totals_time
+
+    # including the ledger upsert
+    start = time.perf_counter()
+    charged = LateFeeService.compute(tariff, today)
+    compute_time = time.perf_counter() - start
+
+    print(
+        f"\nLate fees, {ROWS} reservations, {charged} members: "
+        f"python {python_time:.4f}s, database {totals_time:.4f}s, {speedup:.1f}x, with ledger upsert {compute_time:.4f}s"
+    )
+    assert {total["member_id"]: total["amount"] for total in totals} == python_fees
+    assert dict(MemberFee.objects.values_list("member", "amount")) == python_fees
+    assert speedup >= MIN_SPEEDUP
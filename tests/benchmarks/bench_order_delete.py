@@ -0,0 +1,92 @@
+"""
+Order deletion benchmark of OrderService against the deletion collector of QuerySet.delete on the same rows.
+Not collected by default, run explicitly with: make benchmark
+"""
+
+import os
+import time
+from typing import Any, Callable
+
+import pytest
+from django.db import connection, transaction
+from mixer.backend.django import mixer
+
+from apps.books.const import OrderStatus, ReservationExtensionStatus, ReservationStatus
+from apps.books.models import Book, Order, Reservation
+from apps.books.models.book import ReservationExtension
+from apps.books.services import OrderService, QueuePromotionService
+from apps.users.models import Member
+
+pytestmark = pytest.mark.django_db
+
+ROWS = int(os.environ.get("BENCHMARK_ROWS", 10_000))
+BATCH_SIZE = 1_000
+MIN_SPEEDUP = 5
+
+
+@pytest.fixture
+def order_ids() -> tuple[list[int], list[int]]:
+    book = mixer.blend(Book)
+    members = Member.objects.bulk_create(
+        [Member(username=f"member{i}", email=f"member{i}@example.com", is_member=True) for i in range(2 * ROWS)], batch_size=BATCH_SIZE
+    )
+    reservations = Reservation.objects.bulk_create(
+        [Reservation(member=member, status=ReservationStatus.COMPLETED) for member in members], batch_size=BATCH_SIZE
+    )
+    ReservationExtension.objects.bulk_create(
+        [ReservationExtension(reservation=reservation, status=ReservationExtensionStatus.APPROVED) for reservation in reservations], batch_size=BATCH_SIZE
+    )
+    orders = Order.objects.bulk_create(
+        [Order(member=reservation.member, book=book, reservation=reservation, status=OrderStatus.PROCESSED) for reservation in reservations],
+        batch_size=BATCH_SIZE,
+    )
+    ids = sorted(order.pk for order in orders)
+    return ids[:ROWS], ids[ROWS:]
+
+
+class QueryCounter:
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, execute: Callable, sql: str, params: Any, many: bool, context: dict[str, Any]) -> Any:
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def delete_with_collector(order_ids: list[int]) -> None:
+    for start in range(0, len(order_ids), BATCH_SIZE):
+        with transaction.atomic():
+            orders = list(Order.objects.filter(pk__in=order_ids[start : start + BATCH_SIZE]).select_for_update(of=("self",)))
+            reservation_ids = [order.reservation_id for order in orders if order.reservation_id]
+            book_ids = {order.book_id for order in orders if order.book_id}
+            Order.objects.filter(pk__in=[order.pk for order in orders]).delete()
+            Reservation.objects.filter(pk__in=reservation_ids).delete()
+            QueuePromotionService.promote(book_ids)
+            Book.objects.filter(pk__in=book_ids).recount_counters()
+
+
+def test_delete_speedup(order_ids):
+    collector_ids, service_ids = order_ids
+
+    collector_queries, service_queries = QueryCounter(), QueryCounter()
+    with connection.execute_wrapper(collector_queries):
+        start = time.perf_counter()
+        delete_with_collector(collector_ids)
+        collector_time = time.perf_counter() - start
+
+    with connection.execute_wrapper(service_queries):
+        start = time.perf_counter()
+        OrderService.delete(service_ids)
+        service_time = time.perf_counter() - start
+    speedup = collector_time / service_time
+
+    print(
+        f"\nOrder deletion, {ROWS} orders in batches of {BATCH_SIZE}: "
+        f"collector {collector_time:.3f}s in {collector_queries.count} queries, "
+        f"service {service_time:.3f}s in {service_queries.count} queries, {speedup:.1f}x"
+    )
+    assert not Order.objects.exists()
+    assert not Reservation.objects.exists()
+    assert not ReservationExtension.objects.exists()
+    assert Order.history.filter(history_type="-").count() == 2 * ROWS
+    assert speedup >= MIN_SPEEDUP
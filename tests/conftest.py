@@ -1,5 +1,8 @@
 import django
 import pytest
+from django.core.cache import cache
+
+from core.models import OutboxMessage
 
 # this allows to run pytest --help / pytest --version without erorrs :shrug:
 django.setup()
@@ -9,6 +12,7 @@ pytest_plugins = [
     "tests.fixtures.api",
     "tests.fixtures.users",
     "tests.fixtures.books",
+    "tests.plugins.query_budget",
 ]
 
 
@@ -25,3 +29,22 @@ def mock_mailer(mocker):
     mocked = mocker.patch("core.tasks.Mailer")
     mocked.send_templated_email.return_value = 1
     return mocked
+
+
+@pytest.fixture
+def outbox():
+    """
+    Task calls waiting in the outbox, as `(task name, args)` pairs.
+    Test transactions are never committed, so nothing is dispatched.
+    """
+
+    def _outbox() -> list[tuple[str, list]]:
+        return list(OutboxMessage.objects.values_list("task_name", "args"))
+
+    return _outbox
+
+
+@pytest.fixture(autouse=True)
+def _clear_caches():
+    yield
+    cache.clear()
@@ -0,0 +1,106 @@
+import pytest
+from django.db import transaction
+
+from core.celery import celery
+from core.models import OutboxMessage
+from core.outbox import Outbox
+from core.tasks import dispatch_outbox, send_order_created_email, send_registration_notification_to_member
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def broker():
+    """
+    Messages published to the in-memory stand-in broker, as `(task name, args)` pairs.
+    """
+    celery.conf.task_always_eager = False
+    with celery.connection_for_read() as connection:
+        queue = connection.SimpleQueue(celery.conf.task_default_queue)
+        queue.clear()
+
+        def _broker() -> list[tuple[str, list]]:
+            messages = []
+            while queue.qsize():
+                message = queue.get(timeout=1)
+                messages.append((message.headers["task"], list(message.payload[0])))
+                message.ack()
+            return messages
+
+        yield _broker
+        queue.close()
+    celery.conf.task_always_eager = True
+
+
+def test_enqueue_dispatched_once_on_commit(outbox, django_capture_on_commit_callbacks, mocker):
+    schedule_dispatch = mocker.patch.object(Outbox, "schedule_dispatch")
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        Outbox.enqueue(send_order_created_email, 1)
+        Outbox.enqueue_many(send_order_created_email, [(2,), (3,)])
+
+    assert len(callbacks) == 1
+    schedule_dispatch.assert_called_once_with()
+    assert outbox() == [("books/send_order_created_email", [order_id]) for order_id in [1, 2, 3]]
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        Outbox.enqueue(send_order_created_email, 4)
+
+    assert len(callbacks) == 1
+
+
+def test_rolled_back_enqueue_is_discarded(outbox, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks() as callbacks:
+        with pytest.raises(ZeroDivisionError), transaction.atomic():
+            Outbox.enqueue(send_order_created_email, 1)
+            1 / 0
+
+    assert callbacks == []
+    assert outbox() == []
+
+
+def test_enqueue_after_rolled_back_savepoint_is_dispatched(outbox, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks() as callbacks:
+        with pytest.raises(ZeroDivisionError), transaction.atomic():
+            Outbox.enqueue(send_order_created_email, 1)
+            1 / 0
+        Outbox.enqueue(send_order_created_email, 2)
+
+    assert len(callbacks) == 1
+    assert outbox() == [("books/send_order_created_email", [2])]
+
+
+def test_dispatch_in_batches(broker, outbox):
+    Outbox.enqueue_many(send_order_created_email, [(order_id,) for order_id in range(5)])
+    Outbox.enqueue(send_registration_notification_to_member, 1)
+
+    assert Outbox.dispatch(batch_size=2) == 6
+
+    assert outbox() == []
+    assert broker() == [("books/send_order_created_email", [order_id]) for order_id in range(5)] + [("core/send_registration_notification_to_member", [1])]
+
+
+def test_dispatch_off_request_thread(broker, mocker):
+    executor = mocker.patch("core.outbox._executor")
+
+    Outbox.schedule_dispatch()
+
+    executor.submit.assert_called_once_with(Outbox._dispatch_in_background)
+    assert broker() == []
+
+
+def test_dispatch_runs_eager_tasks_in_place(outbox, mock_mailer):
+    Outbox.enqueue(send_order_created_email, 1)
+
+    Outbox.schedule_dispatch()
+
+    assert outbox() == []
+    mock_mailer.send_templated_email.assert_called_once()
+
+
+def test_dispatch_outbox_task(broker):
+    Outbox.enqueue(send_order_created_email, 1)
+
+    assert dispatch_outbox() == {"dispatched": 1}
+    assert not OutboxMessage.objects.exists()
+    assert broker() == [("books/send_order_created_email", [1])]
@@ -0,0 +1,19 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+
+
+def test_caches_honour_cache_url():
+    # settings are loaded once per process, so they are loaded with another CACHE_URL in a new one
+    output = subprocess.run(
+        [sys.executable, "-c", "from django.conf import settings; print(settings.CACHES['default']['BACKEND'], settings.CACHES['default']['LOCATION'])"],
+        env={**os.environ, "CACHE_URL": "redis://redis:6379/1", "DJANGO_SETTINGS_MODULE": "core.settings"},
+        cwd=settings.BASE_DIR.parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+    assert output.split() == ["django.core.cache.backends.redis.RedisCache", "redis://redis:6379/1"]
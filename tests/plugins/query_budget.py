@@ -0,0 +1,106 @@
+"""
+SQL query budgets per endpoint scenario.
+
+    def test_books_list(client, query_budget):
+        with query_budget("books-list"):
+            client.get(url)
+
+Queries of a scenario are counted and compared with its baseline in `query_budgets.json`.
+A scenario making more queries than recorded fails, listing the repeated queries (likely N+1).
+Record new or lowered baselines with `make query_budgets`, i.e. `pytest --update-query-budgets`.
+"""
+
+import json
+import re
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Iterator
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+BASELINES_PATH = Path(__file__).parent.parent / "query_budgets.json"
+UPDATE_OPTION = "--update-query-budgets"
+
+
+def fingerprint(sql: str) -> str:
+    """
+    SQL with literal values replaced, so the same query with other parameters is recognized.
+    """
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    sql = re.sub(r"\b\d+(?:\.\d+)?\b", "?", sql)
+    sql = re.sub(r"\((?:\?, )+\?\)", "(?)", sql)
+    return " ".join(sql.split())
+
+
+class QueryBudgets:
+    def __init__(self, path: Path, update: bool = False) -> None:
+        self.path = path
+        self.update = update
+        self.recorded: dict[str, int] = {}
+
+    def load(self) -> dict[str, int]:
+        return json.loads(self.path.read_text()) if self.path.exists() else {}
+
+    def check(self, scenario: str, queries: list[dict[str, Any]]) -> None:
+        if scenario in self.recorded:
+            pytest.fail(f"Query budget scenario {scenario!r} is used more than once")
+        self.recorded[scenario] = len(queries)
+        if self.update:
+            return
+
+        baseline = self.load().get(scenario)
+        if baseline is None:
+            pytest.fail(f"No query budget recorded for {scenario!r}, record it with {UPDATE_OPTION}")
+        if len(queries) > baseline:
+            pytest.fail(self.report(scenario, queries, baseline), pytrace=False)
+
+    @staticmethod
+    def report(scenario: str, queries: list[dict[str, Any]], baseline: int) -> str:
+        lines = [f"Query budget of {scenario!r} exceeded: {len(queries)} queries, {baseline} expected"]
+        repeated = [(count, sql) for sql, count in Counter(fingerprint(query["sql"]) for query in queries).most_common() if count > 1]
+        if repeated:
+            lines.append("Repeated queries:")
+            lines.extend(f"  {count}x {sql}" for count, sql in repeated)
+        lines.append("Queries:")
+        lines.extend(f"  {position}. {query['sql']}" for position, query in enumerate(queries, start=1))
+        return "\n".join(lines)
+
+    def save(self) -> None:
+        if not self.update or not self.recorded:
+            return
+        baselines = self.load() | self.recorded
+        self.path.write_text(json.dumps(dict(sorted(baselines.items())), indent=2) + "\n")
+
+
+query_budgets_key = pytest.StashKey[QueryBudgets]()
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    parser.addoption(UPDATE_OPTION, action="store_true", help="Record query counts of query budget scenarios as their baselines")
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    update = config.getoption(UPDATE_OPTION)
+    if update and getattr(config.option, "numprocesses", None):
+        raise pytest.UsageError(f"{UPDATE_OPTION} can't be used with --numprocesses")
+    config.stash[query_budgets_key] = QueryBudgets(BASELINES_PATH, update=update)
+
+
+def pytest_sessionfinish(session: pytest.Session) -> None:
+    session.config.stash[query_budgets_key].save()
+
+
+@pytest.fixture
+def query_budget(request: pytest.FixtureRequest) -> Callable[[str], ContextManager[None]]:
+    budgets = request.config.stash[query_budgets_key]
+
+    @contextmanager
+    def _query_budget(scenario: str) -> Iterator[None]:
+        with CaptureQueriesContext(connection) as context:
+            yield
+        budgets.check(scenario, context.captured_queries)
+
+    return _query_budget
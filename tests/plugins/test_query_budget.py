@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from tests.plugins.query_budget import QueryBudgets, fingerprint
+
+
+def queries(*sqls: str) -> list[dict[str, str]]:
+    return [{"sql": sql, "time": "0.000"} for sql in sqls]
+
+
+@pytest.fixture
+def budgets(tmp_path) -> QueryBudgets:
+    path = tmp_path / "query_budgets.json"
+    path.write_text(json.dumps({"books": 2}))
+    return QueryBudgets(path)
+
+
+def test_fingerprint_ignores_values():
+    assert fingerprint("SELECT * FROM t WHERE id = 1 AND name = 'O''Brien'") == fingerprint("SELECT * FROM t WHERE id = 22 AND name = 'Doe'")
+    assert fingerprint('SELECT "t"."id" FROM "t" WHERE "t"."id" IN (1, 2, 3)') == 'SELECT "t"."id" FROM "t" WHERE "t"."id" IN (?)'
+
+
+def test_within_budget(budgets):
+    budgets.check("books", queries("SELECT 1"))
+
+
+def test_exceeded_budget_reports_repeated_queries(budgets):
+    with pytest.raises(pytest.fail.Exception) as error:
+        budgets.check("books", queries("SELECT * FROM t", "SELECT * FROM e WHERE id = 1", "SELECT * FROM e WHERE id = 2"))
+
+    assert "3 queries, 2 expected" in str(error.value)
+    assert "2x SELECT * FROM e WHERE id = ?" in str(error.value)
+
+
+def test_missing_baseline(budgets):
+    with pytest.raises(pytest.fail.Exception, match="No query budget recorded for 'authors'"):
+        budgets.check("authors", queries())
+
+
+def test_update_records_baselines(budgets):
+    budgets.update = True
+    budgets.check("books", queries("SELECT 1", "SELECT 2", "SELECT 3"))
+    budgets.check("authors", queries("SELECT 1"))
+
+    budgets.save()
+
+    assert json.loads(budgets.path.read_text()) == {"authors": 1, "books": 3}